@@ -3,30 +3,52 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from app.config import config
 from app.models import db
+from app.database import init_database
+from app.activity_log import init_activity_log
+from app.search import init_search
+from app.auth import init_auth
+from app.passwords import init_passwords
+from app.realtime import init_realtime
+from app.json_provider import init_json
+from app.instrumentation import init_instrumentation
+from app.compression import init_compression
+from app.metrics import init_metrics
 
 
-def create_app(config_name='development'):
+def create_app(config_name='development', overrides=None):
     """
     Application Factory Pattern
     Creates and configures the Flask app
+    overrides: settings applied over the config class before any extension
+    reads them, e.g. the database of a report worker or a benchmark
     """
     app = Flask(__name__)
     
     # Load configuration - this already includes JWT settings
     app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
+    app.config['CONFIG_NAME'] = config_name
     
     # DISABLE STRICT SLASHES - prevents 308 redirects that lose auth headers
     app.url_map.strict_slashes = False
     
     # Initialize extensions
+    init_json(app)
+    init_instrumentation(app)
+    init_compression(app)
     db.init_app(app)
+    init_database(app)
+    init_activity_log(app)
+    init_search(app)
+    init_passwords(app)
     
     # CRITICAL: CORS must be set up BEFORE JWT and blueprints
     CORS(app, 
          resources={r"/api/*": {
              "origins": ["http://localhost:5173", "http://localhost:3000"],
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-             "allow_headers": ["Content-Type", "Authorization"],
+             "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "If-Modified-Since"],
+             "expose_headers": ["ETag", "Last-Modified", "Server-Timing"],
              "supports_credentials": True
          }})
     
@@ -37,28 +59,30 @@ def create_app(config_name='development'):
             response = Response()
             response.headers['Access-Control-Allow-Origin'] = '*'
             response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, If-None-Match, If-Modified-Since'
             return response
     
     # ONLY set JWT configs that are NOT in config.py
     app.config['JWT_COOKIE_CSRF_PROTECT'] = False
     
     jwt = JWTManager(app)
+    init_auth(app, jwt)
+    init_realtime(app)
     
-    # Handle JWT errors gracefully with debug info
+    # Handle JWT errors gracefully, with details in the debug log
     @jwt.unauthorized_loader
     def unauthorized_callback(callback):
-        print(f"🔴 JWT Unauthorized: {callback}")
+        app.logger.debug("JWT unauthorized: %s", callback)
         return {'error': 'Missing or invalid token'}, 401
     
     @jwt.invalid_token_loader
     def invalid_token_callback(error_string):
-        print(f"🔴 JWT Invalid Token: {error_string}")
+        app.logger.debug("JWT invalid token: %s", error_string)
         return {'error': f'Invalid token: {error_string}'}, 401
     
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
-        print(f"🔴 JWT Expired Token")
+        app.logger.debug("JWT expired token")
         return {'error': 'Token has expired'}, 401
     
     # Import blueprints
@@ -74,6 +98,7 @@ def create_app(config_name='development'):
     app.register_blueprint(suppliers_bp, url_prefix='/api/suppliers')
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
     app.register_blueprint(users_bp, url_prefix='/api/users')
+    init_metrics(app)
     
     print("✅ All blueprints registered")
     print(f"✅ JWT Secret Key configured: {app.config.get('JWT_SECRET_KEY')[:10]}...")
@@ -81,11 +106,12 @@ def create_app(config_name='development'):
     # Health check endpoint (no auth required)
     @app.route('/api/health', methods=['GET', 'OPTIONS'])
     def health():
-        return {'status': 'healthy', 'message': 'Apex Stock API is running'}, 200
-    
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        print("✅ Database ready")
-    
+        return {
+            'status': 'healthy',
+            'message': 'Apex Stock API is running',
+            'activity_log': app.extensions['activity_log'].metrics()
+        }, 200
+    
+    # Tables are not created here, so booting a worker or running a CLI command
+    # never touches the schema: run `flask init-db` once per database instead
     return app
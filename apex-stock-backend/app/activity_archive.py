@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+from app.models import db, ActivityLog, User
+
+ARCHIVE_PREFIX = 'activity_logs-'
+ARCHIVE_SUFFIX = '.jsonl.gz'
+
+
+def archive_dir(app):
+    path = app.config.get('ACTIVITY_LOG_ARCHIVE_DIR') or os.path.join(app.instance_path, 'activity_archive')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def archive_path(directory, timestamp):
+    """Monthly bucket a log row belongs to, e.g. activity_logs-2024-03.jsonl.gz"""
+    return os.path.join(directory, f'{ARCHIVE_PREFIX}{timestamp:%Y-%m}{ARCHIVE_SUFFIX}')
+
+
+def archive_activity_logs(app, retention_days=None, batch_size=None, now=None):
+    """
+    Move activity logs older than the retention period out of the hot table,
+    oldest first, into one gzipped JSON-lines file per month under
+    archive_dir(app). Each batch is appended and fsynced before its rows are
+    deleted and committed, so a crash can at worst archive a row twice (the
+    archived 'id' tells duplicates apart) but never lose one. Each batch is
+    its own short transaction, so writers are only held up briefly.
+    Returns (archived rows, archive files written to).
+    """
+    retention_days = app.config['ACTIVITY_LOG_RETENTION_DAYS'] if retention_days is None else retention_days
+    batch_size = batch_size or app.config['ACTIVITY_LOG_ARCHIVE_BATCH']
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    directory = archive_dir(app)
+
+    archived, files = 0, set()
+    while True:
+        rows = db.session.query(
+            ActivityLog.id, ActivityLog.user_id, User.username, ActivityLog.action,
+            ActivityLog.resource_type, ActivityLog.resource_id, ActivityLog.details, ActivityLog.timestamp
+        ).outerjoin(User, User.id == ActivityLog.user_id) \
+            .filter(ActivityLog.timestamp < cutoff) \
+            .order_by(ActivityLog.timestamp, ActivityLog.id) \
+            .limit(batch_size) \
+            .all()
+        if not rows:
+            db.session.rollback()
+            return archived, sorted(files)
+
+        buckets = {}
+        for row in rows:
+            buckets.setdefault(archive_path(directory, row.timestamp), []).append({
+                'id': row.id,
+                'user_id': row.user_id,
+                'user': row.username or 'System',
+                'action': row.action,
+                'resource_type': row.resource_type,
+                'resource_id': row.resource_id,
+                'details': row.details,
+                'timestamp': row.timestamp.isoformat()
+            })
+        for path, records in buckets.items():
+            _append(path, records)
+        files.update(buckets)
+
+        db.session.execute(
+            db.delete(ActivityLog)
+            .where(ActivityLog.id.in_([row.id for row in rows]))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        archived += len(rows)
+
+
+def iter_archive(path):
+    """Yield the records of one archive file (every appended gzip member)"""
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _append(path, records):
+    # Every call adds a gzip member; readers see the members as one stream
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='ab') as archive:
+            for record in records:
+                archive.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
@@ -0,0 +1,215 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event
+
+from app.metrics import observe_activity_log_write
+from app.models import db, ActivityLog
+
+logger = logging.getLogger(__name__)
+
+MODES = ('sync', 'transaction', 'async')
+PENDING_KEY = 'pending_activity_logs'
+
+
+class ActivityLogWriter:
+    """
+    Bounded in-process queue of ActivityLog rows, drained by a background
+    thread that bulk inserts every `batch_size` rows or `flush_interval` seconds
+    """
+
+    def __init__(self, app, max_queue_size=10000, batch_size=500, flush_interval=0.2):
+        self.app = app
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {
+            'received': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+            'last_flush_ms': 0.0
+        }
+
+    def enqueue(self, entries):
+        self._ensure_started()
+        for entry in entries:
+            try:
+                self._queue.put_nowait(entry)
+                self._count(received=1)
+            except queue.Full:
+                self._count(dropped=1)
+                logger.warning('Activity log queue full, dropped entry: %s %s',
+                               entry['action'], entry['resource_type'])
+
+    def write(self, entries):
+        """Write entries immediately from the calling thread, on a connection of their own"""
+        self._count(received=len(entries))
+        self._write(entries)
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        if self._queue is None:
+            return
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self, timeout=5):
+        """Stop the background thread and write whatever is still queued"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self.flush()
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_capacity': self.max_queue_size,
+            **stats
+        }
+
+    def _count(self, **increments):
+        # Request threads and the writer thread all update the counters
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so a preloaded app starts a fresh writer in each worker
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            # A writer that died in this process leaves its queue behind for the next one to drain
+            if self._pid != os.getpid() or self._queue is None:
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+            elif self._thread is not None:
+                logger.warning('Activity log writer thread died, restarting it with %d entries queued',
+                               self._queue.qsize())
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def _drain(self, block):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        failed = False
+        with self.app.app_context():
+            engine = db.engine
+        try:
+            # Not db.session: this also runs inside the request session's after_commit hook
+            with engine.begin() as connection:
+                connection.execute(ActivityLog.__table__.insert(), batch)
+            self._count(written=len(batch), batches=1)
+        except Exception:
+            # A failed audit write is counted and logged, never raised into the request
+            failed = True
+            self._count(failed=len(batch))
+            logger.exception('Failed to write %d activity log entries', len(batch))
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats['last_flush_ms'] = round(elapsed * 1000, 3)
+        observe_activity_log_write(self.app.config['ACTIVITY_LOG_MODE'], elapsed, len(batch), failed)
+
+
+def init_activity_log(app):
+    """
+    Set up activity logging for ACTIVITY_LOG_MODE:
+      sync        - entries are written in their own transaction right after the caller commits
+      transaction - entries are added to the caller's session and commit atomically with it
+      async       - entries are handed to the background writer once the caller commits
+    """
+    mode = app.config['ACTIVITY_LOG_MODE']
+    if mode not in MODES:
+        raise ValueError(f"ACTIVITY_LOG_MODE must be one of {', '.join(MODES)}, got '{mode}'")
+
+    writer = ActivityLogWriter(
+        app,
+        max_queue_size=app.config['ACTIVITY_LOG_QUEUE_SIZE'],
+        batch_size=app.config['ACTIVITY_LOG_BATCH_SIZE'],
+        flush_interval=app.config['ACTIVITY_LOG_FLUSH_MS'] / 1000
+    )
+    app.extensions['activity_log'] = writer
+    atexit.register(writer.stop)
+
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_commit', _write_pending):
+        event.listen(session_class, 'after_commit', _write_pending)
+        event.listen(session_class, 'after_rollback', _discard_pending)
+
+    return writer
+
+
+def record(app, user_id, action, resource_type, resource_id=None, details=None):
+    mode = app.config['ACTIVITY_LOG_MODE']
+    values = {
+        'user_id': user_id,
+        'action': action,
+        'resource_type': resource_type,
+        'resource_id': resource_id,
+        'details': details,
+        'timestamp': datetime.utcnow()
+    }
+
+    if mode == 'transaction':
+        db.session.add(ActivityLog(**values))
+        return
+
+    # Held on the session until it commits, so a rolled back change is never logged
+    db.session.info.setdefault(PENDING_KEY, []).append(values)
+
+
+def _write_pending(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+
+    app = current_app._get_current_object()
+    writer = app.extensions['activity_log']
+    if app.config['ACTIVITY_LOG_MODE'] == 'async':
+        writer.enqueue(pending)
+    else:
+        writer.write(pending)
+
+
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
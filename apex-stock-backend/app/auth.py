@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from app.models import db, User
+
+
+class UserCache:
+    """
+    Small LRU cache of user records keyed by id, each entry kept for at most
+    `ttl` seconds. Entries are plain dicts, safe to share across sessions.
+    """
+
+    def __init__(self, max_size=1024, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, record):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, record)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_auth(app, jwt):
+    """
+    Check every token's version claim against the user's current token_version,
+    so bumping it (role change, password reset, deletion) revokes older tokens
+    """
+    app.extensions['user_cache'] = UserCache(app.config['AUTH_CACHE_SIZE'], app.config['AUTH_CACHE_TTL'])
+
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_payload):
+        return token_is_revoked(jwt_payload)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return {'error': 'Token has been revoked, please log in again'}, 401
+
+
+def token_is_revoked(jwt_payload):
+    """True if the token's user is gone or its version claim is outdated"""
+    user = get_cached_user(jwt_payload['sub'])
+    return user is None or jwt_payload.get('ver') != user['token_version']
+
+
+def token_claims(user):
+    """Extra claims for create_access_token: role and token version"""
+    return {'role': user.role, 'ver': user.token_version}
+
+
+def get_cached_user(user_id):
+    """
+    User.to_dict() plus token_version, from the cache when possible
+    Returns None if the user does not exist.
+    """
+    cache = current_app.extensions['user_cache']
+    record = cache.get(user_id)
+    if record is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        record = remember_user(user)
+    return record
+
+
+def remember_user(user):
+    record = {**user.to_dict(), 'token_version': user.token_version}
+    current_app.extensions['user_cache'].put(user.id, record)
+    return record
+
+
+def invalidate_user(user_id):
+    """Call after committing a change to (or deletion of) a user"""
+    current_app.extensions['user_cache'].invalidate(user_id)
@@ -0,0 +1,155 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.models import db, BackfillProgress
+
+logger = logging.getLogger(__name__)
+
+# Registered backfills by name, see register_backfill
+BACKFILLS = {}
+
+
+class BackfillError(RuntimeError):
+    """The backfill is unknown or another process is already running it"""
+
+
+class Backfill:
+    """
+    A data change too big for one transaction, e.g. filling a column a
+    migration just added. The table is walked in primary key order, one
+    batch per transaction, and the progress row is updated in that same
+    transaction, so a run that is stopped or crashes resumes right after
+    the last committed batch. apply_batch must therefore be safe to run
+    again on the rows of a batch that did not commit.
+
+    Subclass, set `name` and `table` (an ORM model or Table with an
+    integer primary key), implement apply_batch and decorate the class
+    with @register_backfill. Run it with `flask backfill NAME`;
+    benchmarks/backfill_check.py shows a complete one.
+    """
+    name = None
+    table = None
+
+    def apply_batch(self, connection, first_key, last_key):
+        """Change the rows with first_key <= key <= last_key; return how many changed"""
+        raise NotImplementedError
+
+
+def register_backfill(cls):
+    BACKFILLS[cls.name] = cls
+    return cls
+
+
+def run_backfill(app, name, batch_size=None, duty_cycle=None, restart=False, max_seconds=None):
+    """
+    Run (or resume) a registered backfill until the table is done, or for
+    at most `max_seconds`, after which it is left 'paused' for the next run.
+    Running a finished backfill again only visits rows added since; pass
+    restart=True to start over from the first row.
+
+    Self-throttling: the batch size adapts so one batch takes about
+    BACKFILL_BATCH_SECONDS, keeping every lock short, and after each batch
+    the run sleeps so that it works only `duty_cycle` (BACKFILL_DUTY_CYCLE)
+    of the time, leaving the database to regular traffic the rest.
+    Returns the progress as a dict.
+    """
+    if name not in BACKFILLS:
+        raise BackfillError(f"Unknown backfill '{name}', registered: {', '.join(sorted(BACKFILLS)) or 'none'}")
+    backfill = BACKFILLS[name]()
+    batch_size = batch_size or app.config['BACKFILL_BATCH_SIZE']
+    duty_cycle = duty_cycle or app.config['BACKFILL_DUTY_CYCLE']
+    if not 0 < duty_cycle <= 1:
+        raise ValueError(f'duty_cycle must be in (0, 1], got {duty_cycle}')
+    target_seconds = app.config['BACKFILL_BATCH_SECONDS']
+    min_batch, max_batch = max(batch_size // 100, 1), batch_size * 10
+
+    table = getattr(backfill.table, '__table__', backfill.table)
+    key = list(table.primary_key.columns)[0]
+    progress_table = BackfillProgress.__table__
+
+    last_key = _claim(app, name, restart)
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    status = 'paused'
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            started = time.perf_counter()
+            with db.engine.begin() as connection:
+                query = db.select(key).order_by(key).limit(batch_size)
+                if last_key is not None:
+                    query = query.where(key > last_key)
+                keys = connection.execute(query).scalars().all()
+                if not keys:
+                    status = 'done'
+                    break
+                changed = backfill.apply_batch(connection, keys[0], keys[-1])
+                last_key = keys[-1]
+                connection.execute(
+                    progress_table.update()
+                    .where(progress_table.c.name == name)
+                    .values(
+                        last_key=last_key,
+                        rows_done=progress_table.c.rows_done + (changed or 0),
+                        batches=progress_table.c.batches + 1,
+                        updated_at=datetime.utcnow()
+                    )
+                )
+            elapsed = time.perf_counter() - started
+
+            if elapsed > target_seconds * 1.5:
+                batch_size = max(batch_size // 2, min_batch)
+            elif elapsed < target_seconds / 2:
+                batch_size = min(batch_size * 2, max_batch)
+            time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+    except BaseException as e:
+        # KeyboardInterrupt too: the last committed batch is kept and the run can resume
+        status = 'paused' if isinstance(e, KeyboardInterrupt) else 'failed'
+        _finish(name, status, error=None if status == 'paused' else repr(e))
+        raise
+
+    return _finish(name, status)
+
+
+def backfill_status():
+    """Progress of every backfill that has run, and the registered ones that have not"""
+    rows = {progress.name: progress.to_dict() for progress in BackfillProgress.query.all()}
+    for name in BACKFILLS:
+        rows.setdefault(name, {'name': name, 'status': 'pending'})
+    return [rows[name] for name in sorted(rows)]
+
+
+def _claim(app, name, restart):
+    """Mark the backfill running and return the key to resume after, refusing to run it twice at once"""
+    progress = db.session.get(BackfillProgress, name, with_for_update=True)
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=app.config['BACKFILL_STALE_SECONDS'])
+    if progress is None:
+        progress = BackfillProgress(name=name, rows_done=0, batches=0, started_at=now)
+        db.session.add(progress)
+    elif progress.status == 'running' and progress.updated_at and progress.updated_at > stale_before:
+        db.session.rollback()
+        raise BackfillError(f"Backfill '{name}' is already running (last batch at {progress.updated_at:%H:%M:%S} UTC)")
+    elif restart:
+        progress.last_key, progress.rows_done, progress.batches, progress.started_at = None, 0, 0, now
+
+    progress.status = 'running'
+    progress.error = None
+    progress.finished_at = None
+    progress.updated_at = now
+    last_key = progress.last_key
+    db.session.commit()
+    logger.info('Backfill %s started in process %d after key %s', name, os.getpid(), last_key)
+    return last_key
+
+
+def _finish(name, status, error=None):
+    db.session.rollback()
+    progress = db.session.get(BackfillProgress, name)
+    progress.status = status
+    progress.error = error
+    progress.updated_at = datetime.utcnow()
+    if status == 'done':
+        progress.finished_at = progress.updated_at
+    db.session.commit()
+    return progress.to_dict()
@@ -0,0 +1,336 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import db, Item, Supplier
+from app.search import index_items
+from app.realtime import publish_item_changes
+from app.reorder import record_reorder_changes
+from app.stats import record_item_changes
+from app.versions import bump_version
+
+# Content types accepted by POST /api/inventory/bulk, and ?format= values
+FORMATS = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/x-jsonlines': 'jsonl',
+    'application/json': 'json'
+}
+REQUIRED_FIELDS = ['name', 'category', 'quantity', 'price']
+DEFAULT_REORDER_LEVEL = 10
+READ_SIZE = 64 * 1024
+
+
+class RowError(ValueError):
+    """A row that cannot be imported; reported back with its row number"""
+
+
+def detect_format(mimetype, requested=None):
+    """Import format from ?format= or the Content-Type, or None if unsupported"""
+    if requested:
+        return requested if requested in FORMATS.values() else None
+    return FORMATS.get(mimetype)
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (row_number, row) from a binary request stream without reading it all
+    into memory. A row is a dict, or a RowError for a record that could not be parsed.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8-sig', newline='')
+    parse = {'csv': _csv_rows, 'jsonl': _jsonl_rows, 'json': _json_array_rows}[fmt]
+    row_number = 0
+    try:
+        for row_number, row in parse(text):
+            yield row_number, row
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield row_number + 1, RowError(f'Unreadable input, import stopped: {e}')
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(text)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row_number, row in enumerate(reader, 1):
+        # Empty cells mean "not given", like a missing key in JSON
+        yield row_number, {key: value.strip() for key, value in row.items()
+                           if key and isinstance(value, str) and value.strip()}
+
+
+def _jsonl_rows(text):
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, RowError(f'Invalid JSON: {e}')
+
+
+def _json_array_rows(text):
+    """Decode the elements of a top-level JSON array one at a time"""
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+    expecting = '['
+    row_number = 0
+
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position >= len(buffer) and not eof:
+            data = text.read(READ_SIZE)
+            buffer, position, eof = buffer[position:] + data, 0, not data
+            continue
+        if position >= len(buffer):
+            if expecting != 'end':
+                yield row_number + 1, RowError('Unexpected end of input, expected a complete JSON array')
+            return
+
+        char = buffer[position]
+        if expecting == '[':
+            if char != '[':
+                yield 1, RowError('Body must be a JSON array of items')
+                return
+            position += 1
+            expecting = 'first'
+        elif expecting == 'end':
+            yield row_number + 1, RowError('Unexpected data after the JSON array')
+            return
+        elif char == ']' and expecting in ('first', 'separator'):
+            position += 1
+            expecting = 'end'
+        elif expecting == 'separator':
+            if char != ',':
+                yield row_number + 1, RowError("Invalid JSON: expected ',' or ']' between items")
+                return
+            position += 1
+            expecting = 'value'
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # A value running up to the end of the buffer (e.g. a number) may continue in the next read
+                complete = end < len(buffer) or eof
+            except ValueError as e:
+                if eof:
+                    yield row_number + 1, RowError(f'Invalid JSON: {e}')
+                    return
+                complete = False
+            if not complete:
+                data = text.read(READ_SIZE)
+                buffer, position, eof = buffer[position:] + data, 0, not data
+                continue
+            row_number += 1
+            yield row_number, value
+            position = end
+            expecting = 'separator'
+            if position > READ_SIZE:
+                buffer, position = buffer[position:], 0
+
+
+def clean_row(row):
+    """
+    Validate and coerce one imported row
+    Rows with an "id" update that item (only the given fields, like PUT, and
+    only if "version", when given, still matches); rows without one create an
+    item and need the same fields as POST.
+    Returns (item_id or None, values)
+    """
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError('Row must be an object')
+
+    item_id = _to_int(row, 'id') if row.get('id') not in (None, '') else None
+    if item_id is None:
+        # Same rule and message as validate_request_data, except that 0 counts as given:
+        # a catalog row with no stock yet is normal, and CSV sends it as the string "0"
+        missing = [field for field in REQUIRED_FIELDS if row.get(field) in (None, '')]
+        if missing:
+            raise RowError(f"Missing required fields: {', '.join(missing)}")
+
+    values = {}
+    for field in ('name', 'category'):
+        if field in row:
+            value = str(row[field]).strip()
+            limit = Item.__table__.c[field].type.length
+            if not value:
+                raise RowError(f'{field} cannot be empty')
+            if len(value) > limit:
+                raise RowError(f'{field} must be at most {limit} characters')
+            values[field] = value
+    values.update(parse_item_numbers(row))
+    if 'supplier_id' in row:
+        values['supplier_id'] = _to_int(row, 'supplier_id') if row['supplier_id'] else None
+    if item_id is not None and row.get('version') not in (None, ''):
+        values['version'] = _to_int(row, 'version')
+
+    if item_id is None:
+        values.setdefault('reorder_level', DEFAULT_REORDER_LEVEL)
+        values.setdefault('supplier_id', None)
+    return item_id, values
+
+
+def parse_item_numbers(row):
+    """
+    quantity, reorder_level and price from an item row or request body,
+    converted and checked; only the fields present are returned.
+    Raises RowError for a value that is not a non-negative number.
+    """
+    values = {}
+    for field in ('quantity', 'reorder_level'):
+        if field in row:
+            values[field] = _to_int(row, field, minimum=0)
+    if 'price' in row:
+        values['price'] = _to_float(row, 'price')
+    return values
+
+
+def _to_int(row, field, minimum=None):
+    value = row[field]
+    try:
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError
+        value = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{field} must be a whole number')
+    if minimum is not None and value < minimum:
+        raise RowError(f'{field} cannot be negative')
+    return value
+
+
+def _to_float(row, field):
+    value = row[field]
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        value = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{field} must be a number')
+    if value < 0 or value != value:
+        raise RowError(f'{field} cannot be negative')
+    return value
+
+
+def import_items(rows, chunk_size=1000, max_errors=1000):
+    """
+    Upsert parsed rows in chunks, committing each chunk in its own transaction
+    together with its aggregate, data version and search index updates.
+    A chunk that fails in the database is rolled back and reported row by row;
+    other chunks are unaffected.
+    """
+    summary = {'received': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+    def fail(row_number, error):
+        summary['failed'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append({'row': row_number, 'error': str(error)})
+        else:
+            summary['errors_truncated'] = True
+
+    chunk = []
+    for row_number, row in rows:
+        summary['received'] += 1
+        try:
+            item_id, values = clean_row(row)
+        except RowError as e:
+            fail(row_number, e)
+            continue
+        chunk.append((row_number, item_id, values))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, summary, fail)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, summary, fail)
+
+    summary['errors'].sort(key=lambda error: error['row'])
+    return summary
+
+
+def _import_chunk(chunk, summary, fail):
+    update_ids = {item_id for _, item_id, _ in chunk if item_id is not None}
+    rows = db.session.query(Item.id, Item.category, Item.quantity, Item.price, Item.reorder_level, Item.version) \
+        .filter(Item.id.in_(update_ids)).all() if update_ids else []
+    current = {
+        row.id: {'category': row.category, 'quantity': row.quantity, 'price': row.price,
+                 'reorder_level': row.reorder_level}
+        for row in rows
+    }
+    versions = {row.id: row.version for row in rows}
+
+    supplier_ids = {values['supplier_id'] for _, _, values in chunk if values.get('supplier_id')}
+    known_suppliers = {
+        supplier_id for (supplier_id,) in db.session.query(Supplier.id).filter(Supplier.id.in_(supplier_ids))
+    } if supplier_ids else set()
+
+    now = datetime.utcnow()
+    inserts, changes, accepted = [], [], []
+    item_changes = {}  # item id -> (snapshot before this chunk, latest snapshot)
+    updates = {}  # item id -> parameters of its single UPDATE
+    updated_rows = 0
+    for row_number, item_id, values in chunk:
+        if values.get('supplier_id') and values['supplier_id'] not in known_suppliers:
+            fail(row_number, f"Supplier {values['supplier_id']} not found")
+            continue
+        if item_id is None:
+            inserts.append({**values, 'updated_at': now})
+            changes.append((None, _snapshot(values)))
+        elif item_id not in current:
+            fail(row_number, f'Item {item_id} not found')
+            continue
+        elif values.pop('version', versions[item_id]) != versions[item_id]:
+            fail(row_number, f'Item {item_id} has changed since the given version (now {versions[item_id]})')
+            continue
+        else:
+            # Later rows for the same item build on the earlier ones
+            before = current[item_id]
+            after = {**before, **values}
+            current[item_id] = after
+            # Passing the version read above makes the UPDATE match it and bump it
+            updates.setdefault(item_id, {'id': item_id, 'version': versions[item_id]}).update(values, updated_at=now)
+            changes.append((_snapshot(before), _snapshot(after)))
+            item_changes[item_id] = (item_changes.get(item_id, (_snapshot(before),))[0], _snapshot(after))
+            updated_rows += 1
+        accepted.append(row_number)
+
+    if not accepted:
+        return
+
+    try:
+        new_ids = []
+        if inserts:
+            new_ids = db.session.execute(
+                db.insert(Item).returning(Item.id, sort_by_parameter_order=True), inserts
+            ).scalars().all()
+        if updates:
+            # ORM bulk UPDATE by primary key: one executemany per set of columns
+            db.session.execute(db.update(Item), list(updates.values()))
+        record_item_changes(changes)
+        bump_version('items')
+        index_items(list(new_ids) + sorted(update_ids & set(current)))
+        item_changes = (
+            [(item_id, None, _snapshot(values)) for item_id, values in zip(new_ids, inserts)]
+            + [(item_id, before, after) for item_id, (before, after) in item_changes.items()]
+        )
+        record_reorder_changes(item_changes)
+        publish_item_changes(item_changes)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        for row_number in accepted:
+            fail(row_number, f'Database error: {e.__class__.__name__}')
+        return
+
+    summary['created'] += len(inserts)
+    summary['updated'] += updated_rows
+
+
+def _snapshot(values):
+    return (values['category'], int(values['quantity'] or 0), float(values['price'] or 0),
+            int(values['reorder_level'] or 0))
@@ -0,0 +1,54 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+# Bodies worth compressing; PDFs and other binary formats are already compressed
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/csv', 'text/plain', 'text/html'}
+
+
+def init_compression(app):
+    """
+    Compress responses of at least COMPRESS_MIN_SIZE bytes with brotli or gzip,
+    whichever the client prefers in Accept-Encoding (brotli only when the
+    brotli package is installed). Streamed responses such as the CSV exports
+    are left alone, since compressing them would mean buffering the stream.
+    """
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            min_size <= 0
+            or response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None or response.content_length is None or response.content_length < min_size:
+            return response
+
+        body = response.get_data()
+        if encoding == 'br':
+            body = brotli.compress(body, quality=app.config['COMPRESS_BROTLI_QUALITY'])
+        else:
+            body = gzip.compress(body, compresslevel=app.config['COMPRESS_GZIP_LEVEL'])
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed bytes differ from the identity representation, so a
+        # strong ETag becomes weak (conditional GETs compare weakly)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -3,6 +3,35 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def database_url():
+    url = os.getenv('DATABASE_URL', 'sqlite:///apex_stock.db')
+    # Some hosts still hand out the postgres:// scheme, which SQLAlchemy 2 rejects
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the given database URL
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection, file
+    SQLite gets a sized pool, and server databases also get pre-ping and
+    recycling so connections dropped by the server or a proxy are replaced.
+    """
+    if url.startswith('sqlite'):
+        if url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url:
+            return {}
+        return {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_timeout': pool_timeout}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping
+    }
+
+
 class Config:
     """Base configuration with common settings"""
     
@@ -11,8 +40,24 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     
     # Database
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///apex_stock.db')
+    SQLALCHEMY_DATABASE_URI = database_url()  # PostgreSQL also needs a driver such as psycopg2
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # Saves memory
+
+    # Connection pool, per process (pre-ping and recycle apply to server databases only)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))  # Extra connections opened under load
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # Reconnect connections older than this
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+    )
+
+    # SQLite connection PRAGMAs (app.database); WAL lets readers run while a write is in progress
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # Durable in WAL mode except on power loss
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # Milliseconds a writer waits for the lock
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))  # Bytes of the file read via mmap; 0 disables
     
     # JWT Settings
     JWT_TOKEN_LOCATION = ['headers']  # Tokens come in request headers
@@ -21,6 +66,78 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour in seconds
     JWT_VERIFY_SUB = False
     
+    # User records cached per process for token checks (app.auth); other workers see changes within the TTL
+    AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', 30))
+    AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', 1024))
+    
+    # Password hashing (app.passwords): 'scrypt:N:r:p', 'pbkdf2:sha256:iterations' or 'argon2:t:m:p'
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))  # Hashes computed at once per process
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 0))  # Hashes that may wait for a busy pool; beyond that 503
+    PASSWORD_HASH_TIMEOUT = int(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # Pagination (GET /api/inventory)
+    INVENTORY_PAGE_SIZE = int(os.getenv('INVENTORY_PAGE_SIZE', 50))
+    INVENTORY_MAX_PAGE_SIZE = int(os.getenv('INVENTORY_MAX_PAGE_SIZE', 200))
+    
+    # Bulk import (POST /api/inventory/bulk)
+    BULK_IMPORT_CHUNK_SIZE = int(os.getenv('BULK_IMPORT_CHUNK_SIZE', 1000))  # Rows per transaction
+    BULK_IMPORT_MAX_ERRORS = int(os.getenv('BULK_IMPORT_MAX_ERRORS', 1000))  # Row errors listed in the response
+    
+    # Activity log: 'sync', 'transaction' or 'async' (see app.activity_log)
+    ACTIVITY_LOG_MODE = os.getenv('ACTIVITY_LOG_MODE', 'transaction')
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.getenv('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 500))
+    ACTIVITY_LOG_FLUSH_MS = int(os.getenv('ACTIVITY_LOG_FLUSH_MS', 200))
+    ACTIVITY_LOG_PAGE_SIZE = int(os.getenv('ACTIVITY_LOG_PAGE_SIZE', 20))  # GET /api/reports/activity-logs
+    ACTIVITY_LOG_MAX_PAGE_SIZE = int(os.getenv('ACTIVITY_LOG_MAX_PAGE_SIZE', 200))
+    
+    # Activity log retention: `flask archive-activity-logs` moves older rows to monthly .jsonl.gz files
+    ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv('ACTIVITY_LOG_RETENTION_DAYS', 90))
+    ACTIVITY_LOG_ARCHIVE_DIR = os.getenv('ACTIVITY_LOG_ARCHIVE_DIR')  # Default: instance/activity_archive
+    ACTIVITY_LOG_ARCHIVE_BATCH = int(os.getenv('ACTIVITY_LOG_ARCHIVE_BATCH', 5000))  # Rows moved per transaction
+
+    # Data backfills (`flask backfill NAME`, app.backfill): batched, resumable and throttled
+    BACKFILL_BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', 1000))  # Starting rows per transaction, then adapted
+    BACKFILL_BATCH_SECONDS = float(os.getenv('BACKFILL_BATCH_SECONDS', 0.5))  # Batch duration the size adapts towards
+    BACKFILL_DUTY_CYCLE = float(os.getenv('BACKFILL_DUTY_CYCLE', 0.5))  # Share of wall time spent working, sleeping the rest
+    BACKFILL_STALE_SECONDS = int(os.getenv('BACKFILL_STALE_SECONDS', 300))  # A 'running' backfill this quiet is taken over
+    
+    # Report jobs: rendered artifacts are cached in REPORT_DIR (default: instance/reports)
+    REPORT_DIR = os.getenv('REPORT_DIR')
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))  # 0 renders in a background thread instead
+    REPORT_JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', 600))  # Seconds before an unfinished job is retried
+    REPORT_RENDER_WORKERS = int(os.getenv('REPORT_RENDER_WORKERS', 0))  # Processes rendering inventory PDF segments
+    REPORT_SEGMENT_ROWS = int(os.getenv('REPORT_SEGMENT_ROWS', 2000))  # Items per parallel PDF segment
+    
+    # Search: 'auto' uses SQLite FTS5 when available, otherwise an in-process trigram index
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+    SEARCH_REFRESH_SECONDS = int(os.getenv('SEARCH_REFRESH_SECONDS', 30))  # Trigram index: check for other workers' writes; FTS5: reload typo candidates
+    SEARCH_MAX_PAGE_SIZE = int(os.getenv('SEARCH_MAX_PAGE_SIZE', 50))
+    SEARCH_CANDIDATE_LIMIT = int(os.getenv('SEARCH_CANDIDATE_LIMIT', 200))  # Matches ranked per query; pages past them are empty
+    
+    # Responses: JSON encoder ('auto' picks orjson when installed) and gzip/brotli compression
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # Smaller bodies are sent as is; 0 disables
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))  # Low qualities are far cheaper
+
+    # Per-request diagnostics (app.instrumentation): Server-Timing headers and one JSON log line per request
+    INSTRUMENTATION = os.getenv('INSTRUMENTATION', 'false').lower() == 'true'
+    INSTRUMENTATION_LOG = os.getenv('INSTRUMENTATION_LOG', 'true').lower() == 'true'
+    INSTRUMENTATION_TRACE_ALLOC = os.getenv('INSTRUMENTATION_TRACE_ALLOC', 'false').lower() == 'true'  # tracemalloc, slows every request
+    PROFILE_SLOW_MS = int(os.getenv('PROFILE_SLOW_MS', 0))  # Sample every request, keep profiles of slower ones; 0 disables
+    PROFILE_INTERVAL_MS = int(os.getenv('PROFILE_INTERVAL_MS', 5))
+    PROFILE_DIR = os.getenv('PROFILE_DIR')  # Default: instance/profiles
+
+    # Prometheus metrics at /metrics (app.metrics); set PROMETHEUS_MULTIPROC_DIR when running several workers
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Real-time stock changes over Socket.IO (app.realtime)
+    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'threading')  # 'eventlet' under eventlet workers
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')  # e.g. redis://..., needed with several workers
+    SOCKETIO_COALESCE_MS = int(os.getenv('SOCKETIO_COALESCE_MS', 200))  # Changes are batched per room for this long
+
     # CORS (allows React to talk to Flask)
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000,http://localhost:80,http://localhost').split(',')
 
@@ -34,6 +151,14 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
 
+    # Larger pool for multi-threaded workers
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+        Config.DB_POOL_TIMEOUT, Config.DB_POOL_RECYCLE, Config.DB_POOL_PRE_PING
+    )
+
 # Choose config based on environment
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,80 @@
+import os
+
+from sqlalchemy import event, inspect
+
+from app.models import db
+
+SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# The four tables db.create_all() built before there were migrations; later changes are revisions of their own
+BASELINE_REVISION = '0001'
+
+
+def init_database(app):
+    """
+    Apply the SQLITE_* PRAGMAs to every new SQLite connection (journal mode,
+    synchronous level, busy timeout and mmap size); no-op for other databases.
+    Call after db.init_app(app).
+    """
+    journal_mode = app.config['SQLITE_JOURNAL_MODE'].upper()
+    synchronous = app.config['SQLITE_SYNCHRONOUS'].upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Unknown SQLITE_JOURNAL_MODE '{journal_mode}'")
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Unknown SQLITE_SYNCHRONOUS '{synchronous}'")
+    pragmas = [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}",
+    ]
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def init_migrations(app):
+    """
+    Register `flask db` (Flask-Migrate) for the migrations/ directory. Only the
+    CLI entry point (run.py) calls this: alembic is slow to import and no web
+    worker needs it.
+
+    render_as_batch makes autogenerated ALTERs use batch mode, which SQLite
+    needs (it copies the table) and other databases run as plain ALTERs.
+    transaction_per_migration commits after each revision, so a revision may
+    leave its transaction for work like CREATE INDEX CONCURRENTLY (see
+    app.migration_ops).
+    """
+    from flask_migrate import Migrate
+    return Migrate(
+        app, db, directory=MIGRATIONS_DIR,
+        render_as_batch=True, compare_type=True, transaction_per_migration=True
+    )
+
+
+def upgrade_database():
+    """
+    Bring the schema up to date. A database that db.create_all() built before
+    there were migrations has tables but no alembic_version: it is stamped at
+    the baseline first, so only later revisions run against it.
+    Needs an app context and init_migrations(app).
+    """
+    from flask_migrate import stamp, upgrade
+    tables = inspect(db.engine).get_table_names()
+    if tables and 'alembic_version' not in tables:
+        stamp(directory=MIGRATIONS_DIR, revision=BASELINE_REVISION)
+    upgrade(directory=MIGRATIONS_DIR)
@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = '_instrumentation'
+
+
+class RequestTimings:
+    """What one request spent its time on, collected in flask.g"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.alloc_start = None
+
+
+class SamplingProfiler:
+    """
+    One background thread that, every `interval` seconds, records the stack
+    of each thread currently serving a watched request. The stacks are kept
+    as collapsed "root;...;leaf count" lines, the input format of
+    flamegraph.pl, speedscope and inferno. Only OS threads are sampled, so
+    requests served by eventlet green threads are not profiled.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watched = {}
+        self._pid = None
+        self._thread = None
+
+    def watch(self):
+        samples = Counter()
+        with self._lock:
+            self._watched[threading.get_ident()] = samples
+        self._ensure_started()
+        return samples
+
+    def unwatch(self):
+        with self._lock:
+            return self._watched.pop(threading.get_ident(), None)
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so each worker starts its own sampler
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._watched:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self._watched.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_collapse(frame)] += 1
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+def init_instrumentation(app):
+    """
+    Opt-in per-request diagnostics (INSTRUMENTATION=true). Every response
+    gets a Server-Timing header (total, sql with the statement count, json
+    encoding, and the allocation delta when INSTRUMENTATION_TRACE_ALLOC is
+    on) and one JSON log line on the app.instrumentation logger. With
+    PROFILE_SLOW_MS set, requests are sampled every PROFILE_INTERVAL_MS and
+    the stacks of those slower than the threshold are written to
+    PROFILE_DIR as .folded files for a flamegraph.
+
+    Call after init_json, so JSON encoding is timed, and before
+    init_compression, so the total includes compressing the body.
+    """
+    if not app.config['INSTRUMENTATION']:
+        return None
+
+    slow_ms = app.config['PROFILE_SLOW_MS']
+    profiler = SamplingProfiler(app.config['PROFILE_INTERVAL_MS'] / 1000) if slow_ms else None
+    profile_dir = app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+    trace_alloc = app.config['INSTRUMENTATION_TRACE_ALLOC']
+    if trace_alloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    if app.config['INSTRUMENTATION_LOG'] and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    # jsonify() goes through the provider's response(), whichever provider init_json installed
+    json_response = app.json.response
+
+    def timed_json_response(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return json_response(*args, **kwargs)
+        finally:
+            timings = _current()
+            if timings is not None:
+                timings.serialize_seconds += time.perf_counter() - started
+
+    app.json.response = timed_json_response
+
+    @app.before_request
+    def start_timing():
+        timings = RequestTimings()
+        if trace_alloc:
+            timings.alloc_start = tracemalloc.get_traced_memory()[0]
+        if profiler is not None:
+            profiler.watch()
+        setattr(g, STATE_KEY, timings)
+
+    @app.after_request
+    def report_timing(response):
+        timings = _current()
+        if timings is None:
+            return response
+        total_ms = (time.perf_counter() - timings.started) * 1000
+        alloc_kib = None
+        if timings.alloc_start is not None:
+            alloc_kib = (tracemalloc.get_traced_memory()[0] - timings.alloc_start) / 1024
+
+        metrics = [
+            f'total;dur={total_ms:.2f}',
+            f'sql;dur={timings.sql_seconds * 1000:.2f};desc="{timings.sql_count} queries"',
+            f'json;dur={timings.serialize_seconds * 1000:.2f}',
+        ]
+        if alloc_kib is not None:
+            metrics.append(f'alloc;desc="{alloc_kib:+.1f} KiB"')
+        response.headers.add('Server-Timing', ', '.join(metrics))
+
+        profile_path = None
+        if profiler is not None:
+            samples = profiler.unwatch()
+            if samples and total_ms >= slow_ms:
+                profile_path = _write_profile(profile_dir, samples, total_ms)
+
+        if app.config['INSTRUMENTATION_LOG']:
+            logger.info(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(total_ms, 2),
+                'sql_count': timings.sql_count,
+                'sql_ms': round(timings.sql_seconds * 1000, 2),
+                'serialize_ms': round(timings.serialize_seconds * 1000, 2),
+                'alloc_kib': round(alloc_kib, 1) if alloc_kib is not None else None,
+                'streamed': response.is_streamed,  # Timings stop before a streamed body is sent
+                'profile': profile_path,
+            }))
+        return response
+
+    @app.teardown_request
+    def stop_profiling(exc):
+        # after_request does not run when a view raises
+        if profiler is not None:
+            profiler.unwatch()
+
+    return profiler
+
+
+def _current():
+    if not has_request_context():
+        return None
+    return g.get(STATE_KEY)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own context, not the pooled connection: a statement that
+    # raises never reaches after_cursor_execute and would leave a stale start behind
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'query_started', None)
+    timings = _current()
+    if timings is not None and started is not None:
+        timings.sql_count += 1
+        timings.sql_seconds += time.perf_counter() - started
+
+
+def _write_profile(directory, samples, total_ms):
+    os.makedirs(directory, exist_ok=True)
+    name = (request.endpoint or 'unknown').replace('.', '-')
+    path = os.path.join(
+        directory, f'{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.method}-{name}-{total_ms:.0f}ms.folded'
+    )
+    with open(path, 'w') as f:
+        for stack, count in samples.most_common():
+            f.write(f'{stack} {count}\n')
+    return path
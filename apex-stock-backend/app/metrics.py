@@ -0,0 +1,122 @@
+import os
+import time
+
+from flask import Response, request
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # Optional: without it there is no /metrics endpoint
+    prometheus_client = None
+
+# Blueprints whose routes get request counters and latency histograms
+BLUEPRINTS = ('auth', 'inventory', 'supplier', 'reports', 'users')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+if prometheus_client is not None:
+    # In multiprocess mode (PROMETHEUS_MULTIPROC_DIR set before this import) every
+    # process writes its samples to its own mmap-backed files, so updates never
+    # wait on another process; /metrics sums the files of all processes
+    REQUESTS = prometheus_client.Counter(
+        'apex_http_requests_total', 'HTTP requests handled',
+        ['blueprint', 'endpoint', 'method', 'status']
+    )
+    REQUEST_LATENCY = prometheus_client.Histogram(
+        'apex_http_request_duration_seconds', 'Time from request start to response, excluding streamed bodies',
+        ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+    )
+    DB_POOL_IN_USE = prometheus_client.Gauge(
+        'apex_db_pool_connections_in_use', 'Database connections checked out of the pool',
+        multiprocess_mode='livesum'
+    )
+    DB_POOL_CAPACITY = prometheus_client.Gauge(
+        'apex_db_pool_capacity', 'Pool size plus overflow: the most connections the pool hands out at once',
+        multiprocess_mode='livesum'
+    )
+    ACTIVITY_LOG_WRITE = prometheus_client.Histogram(
+        'apex_activity_log_write_seconds', 'Time to write one batch of activity log entries',
+        ['mode'], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+    )
+    ACTIVITY_LOG_ROWS = prometheus_client.Counter(
+        'apex_activity_log_rows_total', 'Activity log entries written or failed', ['mode', 'outcome']
+    )
+    REPORT_RENDER = prometheus_client.Histogram(
+        'apex_report_render_seconds', 'Time to render a PDF report', ['report_type', 'outcome'],
+        buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    )
+
+
+def init_metrics(app):
+    """
+    Serve Prometheus metrics at /metrics (METRICS_ENABLED, on by default when
+    prometheus_client is installed). With several worker processes, set
+    PROMETHEUS_MULTIPROC_DIR to an empty directory shared by all of them
+    before the app is imported (gunicorn.conf.py does this), so a scrape of
+    any worker reports the totals of every process.
+    """
+    if not app.config['METRICS_ENABLED'] or prometheus_client is None:
+        return False
+
+    @app.before_request
+    def start_request_timer():
+        request.environ['apex.metrics_started'] = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = request.environ.get('apex.metrics_started')
+        if started is None or request.blueprint not in BLUEPRINTS:
+            return response
+        endpoint = request.endpoint.split('.', 1)[1]
+        REQUESTS.labels(request.blueprint, endpoint, request.method, response.status_code).inc()
+        REQUEST_LATENCY.labels(request.blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        return response
+
+    with app.app_context():
+        from app.models import db
+        _instrument_pool(db.engine)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+    return True
+
+
+def _instrument_pool(engine):
+    pool = engine.pool
+    try:
+        capacity = pool.size() + max(pool._max_overflow, 0)
+    except AttributeError:  # NullPool, StaticPool: nothing to size
+        capacity = None
+
+    @event.listens_for(pool, 'checkout')
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        # Set here rather than once, so each forked worker reports its own pool
+        if capacity is not None:
+            DB_POOL_CAPACITY.set(capacity)
+        DB_POOL_IN_USE.inc()
+
+    @event.listens_for(pool, 'checkin')
+    def checkin(dbapi_connection, connection_record):
+        DB_POOL_IN_USE.dec()
+
+
+def observe_activity_log_write(mode, seconds, rows, failed=False):
+    if prometheus_client is None:
+        return
+    ACTIVITY_LOG_WRITE.labels(mode).observe(seconds)
+    ACTIVITY_LOG_ROWS.labels(mode, 'failed' if failed else 'written').inc(rows)
+
+
+def observe_report_render(report_type, seconds, failed=False):
+    if prometheus_client is None:
+        return
+    REPORT_RENDER.labels(report_type, 'failed' if failed else 'done').observe(seconds)
+
@@ -0,0 +1,38 @@
+from alembic import op
+
+# Operations for revisions in migrations/versions that must not lock busy tables.
+# Column changes on SQLite go through op.batch_alter_table(), which copies the
+# table; autogenerate already writes them that way (render_as_batch).
+
+
+def _dialect():
+    return op.get_bind().dialect.name
+
+
+def create_index_online(name, table, columns, unique=False, where=None):
+    """
+    Create an index without blocking writes where the database allows it;
+    `where` makes it a partial index.
+
+    PostgreSQL builds it with CREATE INDEX CONCURRENTLY, which cannot run in
+    a transaction, so it runs in an autocommit block (each revision commits
+    on its own, see init_migrations). A failed concurrent build leaves an
+    INVALID index: drop it and upgrade again. SQLite has no online build and
+    holds the write lock while it indexes, so upgrade while traffic is low.
+    """
+    if _dialect() == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                name, table, columns, unique=unique, if_not_exists=True,
+                postgresql_concurrently=True, postgresql_where=where
+            )
+    else:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True, sqlite_where=where)
+
+
+def drop_index_online(name, table):
+    if _dialect() == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import get_hasher
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -10,15 +10,24 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key = True)
     username = db.Column(db.String(20), unique = True, nullable = False)
     email = db.Column(db.String(100), unique = True, nullable = False)
-    password_hash = db.Column(db.String(50), nullable = False)
+    password_hash = db.Column(db.String(255), nullable = False)
     role = db.Column(db.String(20), default = 'staff') # Admin or Staff
     created_at = db.Column(db.DateTime, default = datetime.now)
+    token_version = db.Column(db.Integer, nullable = False, default = 1, server_default = '1') # Tokens carry it as 'ver'
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        # Hashed with PASSWORD_HASH_METHOD on the hashing pool (see app.passwords)
+        self.password_hash = get_hasher().hash(password)
+
+    def revoke_tokens(self):
+        # Tokens issued with the old version are refused from now on
+        self.token_version = (self.token_version or 1) + 1
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return get_hasher().verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return get_hasher().needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -30,6 +39,10 @@ class User(db.Model):
         }
     
 
+# /api/users/stats counts per role from the index alone
+db.Index('ix_users_role', User.role)
+
+
 class Supplier(db.Model):
     __tablename__ = 'suppliers'
 
@@ -43,7 +56,14 @@ class Supplier(db.Model):
     
     items = db.relationship('Item', backref = 'supplier', lazy = True)
 
-    def to_dict(self):
+    def items_count(self):
+        return Item.query.filter_by(supplier_id=self.id).count()
+
+    def to_dict(self, items_count=None):
+        # Listing routes pass a precomputed count (see app.serializers) to avoid loading every item
+        if items_count is None:
+            items_count = self.items_count()
+
         return {
             'id' : self.id,
             'name' : self.name,
@@ -52,7 +72,7 @@ class Supplier(db.Model):
             'phone' : self.phone,
             'address' : self.address,
             'created_at' :self.created_at.isoformat(),
-            'items_count' : len(self.items)
+            'items_count' : items_count
         }
 
 
@@ -68,6 +88,13 @@ class Item(db.Model):
     supplier_id = db.Column(db.Integer,db.ForeignKey('suppliers.id')) 
     created_at = db.Column(db.DateTime, default = datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every write; ORM updates check it, so a stale read can't overwrite a newer one
+    version = db.Column(db.Integer, nullable = False, default = 1, server_default = '1')
+    # quantity <= reorder_level, kept by app.reorder on every write so the partial index below
+    # can serve low-stock reads; NULL on rows the items-low-stock backfill has not reached yet
+    is_low_stock = db.Column(db.Boolean, default=False)
+
+    __mapper_args__ = {'version_id_col': version}
 
     def to_dict(self):
         return {
@@ -81,10 +108,29 @@ class Item(db.Model):
             'supplier_name': self.supplier.name if self.supplier else None,
             'is_low_stock': self.quantity <= self.reorder_level,
             'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'updated_at': self.updated_at.isoformat(),
+            'version': self.version
         }
 
 
+# Only low items are indexed, so low-stock lookups cost the number of low items, not the catalog size
+db.Index(
+    'ix_items_low_stock', Item.supplier_id,
+    sqlite_where=Item.is_low_stock == db.true(),
+    postgresql_where=Item.is_low_stock == db.true()
+)
+
+# Inventory pages: the default name order, a category filter in name order and the
+# recently-updated order each walk an index and stop at the page limit (id breaks ties,
+# as in the keyset cursor). Quantity, price and reorder level sorts are left unindexed:
+# quantity changes on every stock adjustment and those sorts are rare.
+db.Index('ix_items_name', Item.name, Item.id)
+db.Index('ix_items_category_name', Item.category, Item.name, Item.id)
+db.Index('ix_items_updated_at', Item.updated_at, Item.id)
+# A supplier's items, per-supplier item counts and the check before deleting a supplier
+db.Index('ix_items_supplier_id', Item.supplier_id)
+
+
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
     
@@ -98,12 +144,120 @@ class ActivityLog(db.Model):
     
     user = db.relationship('User', backref='activities')
     
-    def to_dict(self):
+    def to_dict(self, username=None):
+        # Listing routes join the username in (see report_routes.get_activity_logs) instead of lazy-loading each user
+        if username is None and self.user_id is not None:
+            username = self.user.username if self.user else None
+
         return {
             'id': self.id,
-            'user': self.user.username if self.user else 'System',
+            'user': username or 'System',
             'action': self.action,
             'resource_type': self.resource_type,
+            'resource_id': self.resource_id,
             'details': self.details,
             'timestamp': self.timestamp.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+# Newest-first listing (timestamp), per-record history (resource) and per-user history (user, timestamp)
+db.Index('ix_activity_logs_timestamp', ActivityLog.timestamp)
+db.Index('ix_activity_logs_resource', ActivityLog.resource_type, ActivityLog.resource_id)
+db.Index('ix_activity_logs_user_timestamp', ActivityLog.user_id, ActivityLog.timestamp)
+
+
+class InventoryStats(db.Model):
+    """Running dashboard totals, maintained by app.stats alongside item writes"""
+    __tablename__ = 'inventory_stats'
+
+    id = db.Column(db.Integer, primary_key=True)  # Always a single row with id 1
+    total_items = db.Column(db.Integer, nullable=False, default=0)
+    total_value = db.Column(db.Float, nullable=False, default=0)
+    low_stock_count = db.Column(db.Integer, nullable=False, default=0)
+    rebuilt_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CategoryStats(db.Model):
+    """Per-category counts and values, maintained by app.stats alongside item writes"""
+    __tablename__ = 'category_stats'
+
+    category = db.Column(db.String(200), primary_key=True)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    total_value = db.Column(db.Float, nullable=False, default=0)
+    low_stock_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DataVersion(db.Model):
+    """Per-collection change counter, bumped by app.versions on every write"""
+    __tablename__ = 'data_versions'
+
+    collection = db.Column(db.String(50), primary_key=True)  # 'items', 'suppliers'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ReorderQueueEntry(db.Model):
+    """An item waiting to be reordered, queued by app.reorder when it drops to its reorder level"""
+    __tablename__ = 'reorder_queue'
+
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)  # Stock left when the item was queued
+    queued_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    item = db.relationship('Item')
+
+
+class ReportJob(db.Model):
+    """A queued or finished report rendering, see app.report_jobs"""
+    __tablename__ = 'report_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    report_type = db.Column(db.String(50), nullable=False)  # 'inventory-pdf', 'low-stock-pdf'
+    data_key = db.Column(db.String(100), nullable=False)  # Data versions the artifact was built from
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    error = db.Column(db.Text)
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_type': self.report_type,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+# submit_job looks for a job of the same report over the same data
+db.Index('ix_report_jobs_lookup', ReportJob.report_type, ReportJob.data_key)
+
+
+class BackfillProgress(db.Model):
+    """How far a data backfill has got, committed with each batch by app.backfill"""
+    __tablename__ = 'backfill_progress'
+
+    name = db.Column(db.String(100), primary_key=True)
+    last_key = db.Column(db.Integer)  # Highest primary key processed so far
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    batches = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, paused, done, failed
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'last_key': self.last_key,
+            'rows_done': self.rows_done,
+            'batches': self.batches,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
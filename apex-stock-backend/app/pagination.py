@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+class PaginationError(ValueError):
+    """Raised when a client sends a malformed limit, cursor, sort or fields parameter"""
+
+
+def parse_page_size(value, default, maximum):
+    """
+    Parse ?limit=... and clamp it to the server-enforced maximum
+    """
+    if value is None or value == '':
+        return default
+
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+
+    if size < 1:
+        raise PaginationError('limit must be at least 1')
+
+    return min(size, maximum)
+
+
+def parse_sort(value, sortable, default, tiebreaker='id'):
+    """
+    Parse ?sort=name,-updated_at into a list of (name, column, descending)
+
+    The tiebreaker column is always appended so every row has a unique
+    position, which keyset pagination needs to avoid skipping rows.
+    """
+    keys = [key.strip() for key in (value or default).split(',') if key.strip()]
+    spec = []
+    seen = set()
+
+    for key in keys:
+        descending = key.startswith('-')
+        name = key.lstrip('+-')
+        if name not in sortable:
+            raise PaginationError(f"Cannot sort by '{name}'. Allowed: {', '.join(sorted(sortable))}")
+        if name in seen:
+            continue
+        seen.add(name)
+        spec.append((name, sortable[name], descending))
+
+    if not spec:
+        raise PaginationError('sort must name at least one column')
+
+    if tiebreaker not in seen:
+        spec.append((tiebreaker, sortable[tiebreaker], spec[-1][2]))
+
+    return spec
+
+
+def parse_fields(value, allowed):
+    """
+    Parse ?fields=id,name,quantity into an ordered list of field names
+    """
+    if not value:
+        return list(allowed)
+
+    fields = []
+    for name in (field.strip() for field in value.split(',')):
+        if not name or name in fields:
+            continue
+        if name not in allowed:
+            raise PaginationError(f"Unknown field '{name}'. Allowed: {', '.join(allowed)}")
+        fields.append(name)
+
+    if not fields:
+        raise PaginationError('fields must name at least one field')
+
+    return fields
+
+
+def order_by_clauses(spec):
+    return [column.desc() if descending else column.asc() for _, column, descending in spec]
+
+
+def keyset_filter(spec, values):
+    """
+    Build the WHERE clause that selects rows strictly after `values`
+
+    For sort keys (a, b, id) this expands to
+    a > :a OR (a = :a AND b > :b) OR (a = :a AND b = :b AND id > :id),
+    flipping the comparison for descending keys.
+    """
+    clauses = []
+    for position, (_, column, descending) in enumerate(spec):
+        equal = [spec[i][1] == values[i] for i in range(position)]
+        after = column < values[position] if descending else column > values[position]
+        clauses.append(and_(*equal, after))
+
+    return or_(*clauses)
+
+
+def encode_cursor(values):
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, spec):
+    """
+    Decode an opaque cursor back into sort key values matching `spec`
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise PaginationError('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != len(spec):
+        raise PaginationError('Cursor does not match the requested sort order')
+
+    return [_decode_value(value, column) for value, (_, column, _) in zip(values, spec)]
+
+
+def _decode_value(value, column):
+    """Check a cursor value against the type of the column it is compared with"""
+    expression = getattr(column, 'expression', column)
+    if value is None:
+        if getattr(expression, 'nullable', False):
+            return None
+        raise PaginationError('Invalid cursor')
+
+    try:
+        python_type = expression.type.python_type
+    except NotImplementedError:
+        python_type = None
+
+    if python_type is datetime:
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise PaginationError('Invalid cursor')
+    # bool is an int subclass, but never a valid position in a numeric column
+    if python_type is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if python_type is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if python_type is str and isinstance(value, str):
+        return value
+    raise PaginationError('Invalid cursor')
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+try:
+    import argon2
+except ImportError:  # Optional: only needed for PASSWORD_HASH_METHOD = 'argon2:...'
+    argon2 = None
+
+
+class HasherBusy(RuntimeError):
+    """Every hashing slot is taken; the caller should answer 503 and let the client retry"""
+
+
+class PasswordHasher:
+    """
+    Hash and verify passwords with one configured method:
+      scrypt:N:r:p                       - werkzeug scrypt (werkzeug's default is scrypt:32768:8:1)
+      pbkdf2:sha256:iterations           - werkzeug PBKDF2
+      argon2:time_cost:memory_kib:lanes  - argon2id, needs the argon2-cffi package
+    Hashes made with any of them still verify, so the method can change at any time;
+    needs_rehash() tells the caller when a stored hash should be upgraded.
+
+    The work runs on a small dedicated thread pool (these hash functions release
+    the GIL) and at most `workers + queue_size` hashes may be in flight. With the
+    default queue_size of 0 a request is refused as soon as no hash worker is
+    free, so a login storm never has every request thread waiting on the pool.
+    """
+
+    def __init__(self, method, workers=2, queue_size=0, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._argon2 = None
+        self._dummy_hash = None
+
+        if method.startswith('argon2'):
+            if argon2 is None:
+                raise ValueError("PASSWORD_HASH_METHOD is argon2 but argon2-cffi is not installed")
+            time_cost, memory_cost, parallelism = (int(part) for part in method.split(':')[1:4])
+            self._argon2 = argon2.PasswordHasher(
+                time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+            )
+        else:
+            # Short forms ('scrypt', 'pbkdf2:sha256') are stored with werkzeug's defaults filled in
+            self.method = _werkzeug_method(method)
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def verify(self, password_hash, password):
+        """
+        Pass password_hash=None for an unknown user: a throwaway hash is still
+        checked, so the response time does not reveal which usernames exist
+        """
+        if password_hash is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash(os.urandom(16).hex())
+            self._run(self._verify, self._dummy_hash, password)
+            return False
+        return self._run(self._verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        if self._argon2 is not None:
+            if not password_hash.startswith('$argon2'):
+                return True
+            return self._argon2.check_needs_rehash(password_hash)
+        return not password_hash.startswith(f'{self.method}$')
+
+    def _hash(self, password):
+        if self._argon2 is not None:
+            return self._argon2.hash(password)
+        return generate_password_hash(password, method=self.method)
+
+    def _verify(self, password_hash, password):
+        if password_hash.startswith('$argon2'):
+            if argon2 is None:
+                return False
+            try:
+                return argon2.PasswordHasher().verify(password_hash, password)
+            except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+                return False
+        return check_password_hash(password_hash, password)
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Too many password checks in progress')
+        try:
+            future = self._get_executor().submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # Held until the hash actually finishes, even if the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HasherBusy('Password check timed out')
+
+    def _get_executor(self):
+        # Threads do not survive fork(), so each worker process starts its own pool
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+
+def _werkzeug_method(method):
+    """
+    The full method werkzeug writes into the hashes it makes, e.g. 'scrypt' ->
+    'scrypt:32768:8:1', parsed the way werkzeug does so a malformed method fails
+    at startup: hashing a throwaway password would cost a full scrypt on every boot
+    """
+    name, *args = method.split(':')
+    try:
+        if name == 'scrypt' and not args:
+            return 'scrypt:32768:8:1'
+        if name == 'scrypt' and len(args) == 3:
+            return 'scrypt:' + ':'.join(str(int(arg)) for arg in args)
+        if name == 'pbkdf2' and len(args) <= 2:
+            hash_name = args[0] if args else 'sha256'
+            hashlib.new(hash_name)
+            iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+            return f'pbkdf2:{hash_name}:{iterations}'
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid PASSWORD_HASH_METHOD '{method}'")
+
+
+def init_passwords(app):
+    hasher = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
+    app.extensions['password_hasher'] = hasher
+
+    @app.errorhandler(HasherBusy)
+    def hasher_busy(error):
+        return {'error': 'Too many login attempts right now, please retry shortly'}, 503, {'Retry-After': '1'}
+
+    return hasher
+
+
+def get_hasher():
+    return current_app.extensions['password_hasher']
@@ -0,0 +1,248 @@
+import os
+import threading
+
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from flask_socketio import SocketIO, Namespace, ConnectionRefusedError, join_room, leave_room, rooms
+from sqlalchemy import event
+
+from app.auth import token_is_revoked
+from app.models import db
+
+NAMESPACE = '/stock'
+ITEMS_ROOM = 'items'            # Every item change
+STATS_ROOM = 'stats'            # Dashboard aggregate deltas
+SUPPLIERS_ROOM = 'suppliers'    # Supplier changes
+CATEGORY_ROOM_PREFIX = 'category:'
+MAX_SUBSCRIBED_CATEGORIES = 100
+
+PENDING_KEY = 'realtime_pending'
+
+socketio = SocketIO()
+
+
+def category_room(category):
+    return f'{CATEGORY_ROOM_PREFIX}{category}'
+
+
+class Broadcaster:
+    """
+    Collects committed changes and emits them at most once per `window` seconds:
+    per room, later deltas for the same item or supplier replace earlier ones
+    and stats deltas are summed, so a burst of writes becomes one event each.
+    """
+
+    def __init__(self, socketio, window=0.2):
+        self.socketio = socketio
+        self.window = window
+        self._lock = threading.Lock()
+        self._pid = None
+        self._running = False
+        self._items = {}
+        self._stats = None
+        self._suppliers = {}
+        self.emitted = 0
+
+    def add(self, items=(), stats=None, suppliers=()):
+        with self._lock:
+            for rooms_, delta in items:
+                for room in rooms_:
+                    self._items.setdefault(room, {})[delta['id']] = delta
+            if stats is not None:
+                self._stats = stats if self._stats is None else _merge_stats(self._stats, stats)
+            for delta in suppliers:
+                self._suppliers[delta['id']] = delta
+        self._ensure_started()
+
+    def flush(self):
+        """Emit everything collected so far"""
+        with self._lock:
+            items, stats, suppliers = self._items, self._stats, self._suppliers
+            self._items, self._stats, self._suppliers = {}, None, {}
+
+        for room, deltas in items.items():
+            self._emit('items', {'items': list(deltas.values())}, room)
+        if stats is not None:
+            self._emit('stats', stats, STATS_ROOM)
+        if suppliers:
+            self._emit('suppliers', {'suppliers': list(suppliers.values())}, SUPPLIERS_ROOM)
+
+    def _emit(self, event_name, data, room):
+        self.socketio.emit(event_name, data, namespace=NAMESPACE, to=room)
+        self.emitted += 1
+
+    def _ensure_started(self):
+        # Background tasks do not survive fork(), so each worker starts its own
+        if self._running and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._running and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._running = True
+        self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.window)
+            self.flush()
+
+
+class StockNamespace(Namespace):
+    """
+    Socket.IO namespace pushing committed stock changes.
+
+    Connect with auth={'token': '<access token>'}; every client starts in the
+    items, stats and suppliers rooms. Emit 'subscribe' with
+    {'categories': ['Tools', ...]} to receive item deltas for those
+    categories only, or an empty list to go back to every item.
+
+    Events:
+      items      {'items': [{'id', 'category', 'quantity', 'is_low_stock'} or {'id', 'category', 'deleted'}]}
+      stats      {'total_items', 'total_value', 'low_stock_count', 'categories': {name: {'count', 'value', 'low_stock_count'}}}
+                 (differences to add to the last GET /api/inventory/stats)
+      suppliers  {'suppliers': [{'id', 'name'} or {'id', 'deleted'}]}
+    """
+
+    def on_connect(self, auth=None):
+        token = (auth or {}).get('token') or request.args.get('token')
+        if not token:
+            raise ConnectionRefusedError('Missing token')
+        try:
+            payload = decode_token(token)
+        except Exception:
+            raise ConnectionRefusedError('Invalid or expired token')
+        if token_is_revoked(payload):
+            raise ConnectionRefusedError('Token has been revoked, please log in again')
+
+        join_room(ITEMS_ROOM)
+        join_room(STATS_ROOM)
+        join_room(SUPPLIERS_ROOM)
+
+    def on_subscribe(self, data):
+        categories = (data or {}).get('categories') or []
+        if (not isinstance(categories, list) or len(categories) > MAX_SUBSCRIBED_CATEGORIES
+                or not all(isinstance(category, str) for category in categories)):
+            return {'error': f'categories must be a list of at most {MAX_SUBSCRIBED_CATEGORIES} names'}
+
+        for room in rooms(namespace=NAMESPACE):
+            if room == ITEMS_ROOM or room.startswith(CATEGORY_ROOM_PREFIX):
+                leave_room(room)
+        targets = [category_room(category) for category in categories] or [ITEMS_ROOM]
+        for room in targets:
+            join_room(room)
+        return {'rooms': targets}
+
+
+def init_realtime(app):
+    """
+    Attach Socket.IO to the app. SOCKETIO_ASYNC_MODE must match the server:
+    'threading' for the development server and gthread workers, 'eventlet'
+    for eventlet workers. With more than one worker process, set
+    SOCKETIO_MESSAGE_QUEUE so every process can emit to every client.
+    """
+    socketio.init_app(
+        app,
+        async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+        message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+        cors_allowed_origins=app.config['CORS_ORIGINS']
+    )
+    socketio.on_namespace(StockNamespace(NAMESPACE))
+
+    broadcaster = Broadcaster(socketio, window=app.config['SOCKETIO_COALESCE_MS'] / 1000)
+    app.extensions['realtime'] = broadcaster
+
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_commit', _publish_pending):
+        event.listen(session_class, 'after_commit', _publish_pending)
+        event.listen(session_class, 'after_rollback', _discard_pending)
+
+    return broadcaster
+
+
+def publish_item_changes(changes):
+    """
+    Queue [(item_id, before, after)] for broadcast once the caller's session
+    commits; before/after are app.stats item snapshots, None for a created or
+    deleted item. Nothing is sent if the session rolls back.
+    """
+    pending = db.session.info.setdefault(PENDING_KEY, {'items': [], 'stats': None, 'suppliers': []})
+    stats = _stats_delta(changes)
+    if stats is not None:
+        pending['stats'] = stats if pending['stats'] is None else _merge_stats(pending['stats'], stats)
+
+    for item_id, before, after in changes:
+        categories = {snapshot[0] for snapshot in (before, after) if snapshot is not None}
+        room_names = [ITEMS_ROOM] + [category_room(category) for category in sorted(categories)]
+        if after is None:
+            delta = {'id': item_id, 'category': before[0], 'deleted': True}
+        else:
+            category, quantity, _, reorder_level = after
+            delta = {'id': item_id, 'category': category, 'quantity': quantity,
+                     'is_low_stock': quantity <= reorder_level}
+        pending['items'].append((room_names, delta))
+
+
+def publish_item_change(item_id, before=None, after=None):
+    publish_item_changes([(item_id, before, after)])
+
+
+def publish_supplier_change(supplier_id, name=None, deleted=False):
+    """Queue a supplier change for broadcast once the caller's session commits"""
+    pending = db.session.info.setdefault(PENDING_KEY, {'items': [], 'stats': None, 'suppliers': []})
+    delta = {'id': supplier_id, 'deleted': True} if deleted else {'id': supplier_id, 'name': name}
+    pending['suppliers'].append(delta)
+
+
+def _stats_delta(changes):
+    # Same arithmetic as app.stats.record_item_changes, shaped like GET /api/inventory/stats
+    categories = {}
+    for _, before, after in changes:
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot is None:
+                continue
+            category, quantity, price, reorder_level = snapshot
+            delta = categories.setdefault(category, {'count': 0, 'value': 0.0, 'low_stock_count': 0})
+            delta['count'] += sign
+            delta['value'] += sign * quantity * price
+            delta['low_stock_count'] += sign * (1 if quantity <= reorder_level else 0)
+
+    categories = {
+        category: {**delta, 'value': round(delta['value'], 2)}
+        for category, delta in categories.items()
+        if delta['count'] or delta['low_stock_count'] or round(delta['value'], 2)
+    }
+    if not categories:
+        return None
+    return {
+        'total_items': sum(delta['count'] for delta in categories.values()),
+        'total_value': round(sum(delta['value'] for delta in categories.values()), 2),
+        'low_stock_count': sum(delta['low_stock_count'] for delta in categories.values()),
+        'categories': categories
+    }
+
+
+def _merge_stats(first, second):
+    categories = {name: dict(delta) for name, delta in first['categories'].items()}
+    for name, delta in second['categories'].items():
+        merged = categories.setdefault(name, {'count': 0, 'value': 0.0, 'low_stock_count': 0})
+        merged['count'] += delta['count']
+        merged['value'] = round(merged['value'] + delta['value'], 2)
+        merged['low_stock_count'] += delta['low_stock_count']
+    return {
+        'total_items': first['total_items'] + second['total_items'],
+        'total_value': round(first['total_value'] + second['total_value'], 2),
+        'low_stock_count': first['low_stock_count'] + second['low_stock_count'],
+        'categories': categories
+    }
+
+
+def _publish_pending(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    current_app.extensions['realtime'].add(pending['items'], pending['stats'], pending['suppliers'])
+
+
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
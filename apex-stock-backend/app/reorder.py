@@ -0,0 +1,149 @@
+from datetime import datetime
+
+from app.backfill import Backfill, register_backfill
+from app.models import db, Item, Supplier, ReorderQueueEntry
+
+
+def _is_low(snapshot):
+    return snapshot is not None and snapshot[1] <= snapshot[3]
+
+
+def record_reorder_changes(changes):
+    """
+    Keep the reorder queue and items.is_low_stock in step with
+    [(item_id, before, after)] item snapshots (app.stats.item_snapshot, None
+    for a created or deleted item): an item that drops to its reorder level
+    is queued and flagged, one that is restocked above it is unflagged, and
+    either that or deleting it takes it off the queue. Runs in the caller's
+    session, so both commit or roll back together with the item change.
+    """
+    queued, removed, deleted = {}, set(), set()
+    for item_id, before, after in changes:
+        if _is_low(after) and not _is_low(before):
+            queued[item_id] = after[1]
+            removed.discard(item_id)
+        elif _is_low(before) and not _is_low(after):
+            removed.add(item_id)
+            queued.pop(item_id, None)
+        if after is None:
+            deleted.add(item_id)
+        else:
+            deleted.discard(item_id)
+
+    # New items start unflagged (the column default), so only crossings need an update
+    for flag, item_ids in ((True, set(queued)), (False, removed - deleted)):
+        if item_ids:
+            db.session.execute(
+                db.update(Item).where(Item.id.in_(item_ids)).values(is_low_stock=flag)
+                .execution_options(synchronize_session=False)
+            )
+
+    if removed or queued:
+        # Also clears any stale entry for a re-queued item, so the insert below cannot collide
+        db.session.execute(
+            db.delete(ReorderQueueEntry)
+            .where(ReorderQueueEntry.item_id.in_(removed | set(queued)))
+            .execution_options(synchronize_session=False)
+        )
+    if queued:
+        now = datetime.utcnow()
+        db.session.execute(db.insert(ReorderQueueEntry), [
+            {'item_id': item_id, 'quantity': quantity, 'queued_at': now}
+            for item_id, quantity in queued.items()
+        ])
+
+
+def record_reorder_change(item_id, before=None, after=None):
+    record_reorder_changes([(item_id, before, after)])
+
+
+def get_reorder_queue():
+    """
+    Queued items grouped by supplier (items without one come last), oldest first:
+    [{'supplier_id', 'supplier_name', 'items': [{'id', 'name', 'category', 'quantity', 'reorder_level', ...}]}]
+    The queued ids are read first and the items looked up by primary key, so
+    the cost follows the queue length: left to itself the planner would
+    rather walk every item in supplier order and probe the queue for each.
+    """
+    item_ids = [item_id for (item_id,) in db.session.query(ReorderQueueEntry.item_id)]
+    if not item_ids:
+        return []
+
+    # Inlined rather than bound: a long queue would exceed SQLite's limit on parameters
+    queued = db.bindparam('item_ids', item_ids, expanding=True, literal_execute=True)
+    rows = db.session.query(
+        Item.id, Item.name, Item.category, Item.quantity, Item.reorder_level,
+        Item.supplier_id, Supplier.name.label('supplier_name'), ReorderQueueEntry.queued_at
+    ).join(ReorderQueueEntry, ReorderQueueEntry.item_id == Item.id) \
+        .outerjoin(Supplier, Supplier.id == Item.supplier_id) \
+        .filter(Item.id.in_(queued)) \
+        .order_by(Item.supplier_id.is_(None), Supplier.name, Item.supplier_id, ReorderQueueEntry.queued_at, Item.id) \
+        .all()
+
+    groups = []
+    for row in rows:
+        if not groups or groups[-1]['supplier_id'] != row.supplier_id:
+            groups.append({'supplier_id': row.supplier_id, 'supplier_name': row.supplier_name, 'items': []})
+        groups[-1]['items'].append({
+            'id': row.id,
+            'name': row.name,
+            'category': row.category,
+            'quantity': row.quantity,
+            'reorder_level': row.reorder_level,
+            'queued_at': row.queued_at.isoformat()
+        })
+    return groups
+
+
+def rebuild_reorder_queue():
+    """
+    Bring the queue back in line with the items table: correct any stale
+    is_low_stock flag, queue every low item that is missing (keeping existing
+    entries' queued_at) and drop the rest. Returns (queued, removed) counts.
+    """
+    db.session.execute(
+        db.update(Item).where(_stale_flag()).values(is_low_stock=Item.quantity <= Item.reorder_level)
+        .execution_options(synchronize_session=False)
+    )
+    removed = db.session.execute(
+        db.delete(ReorderQueueEntry)
+        .where(~ReorderQueueEntry.item_id.in_(db.select(Item.id).where(Item.is_low_stock == db.true())))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    missing = db.session.query(Item.id, Item.quantity) \
+        .filter(Item.is_low_stock == db.true()) \
+        .filter(~db.exists().where(ReorderQueueEntry.item_id == Item.id)) \
+        .all()
+    if missing:
+        now = datetime.utcnow()
+        db.session.execute(db.insert(ReorderQueueEntry), [
+            {'item_id': item_id, 'quantity': quantity, 'queued_at': now} for item_id, quantity in missing
+        ])
+    db.session.commit()
+    return len(missing), removed
+
+
+def _stale_flag():
+    """Items whose is_low_stock is unset or no longer matches their quantity"""
+    low = Item.quantity <= Item.reorder_level
+    return db.or_(Item.is_low_stock.is_(None), Item.is_low_stock != low)
+
+
+@register_backfill
+class ItemsLowStockBackfill(Backfill):
+    """
+    Sets items.is_low_stock on the rows that predate the column (migration
+    0009); the write paths keep it from then on. Migration 0013 builds the
+    partial index over it, so run this between the two:
+        flask db upgrade 0012 && flask backfill items-low-stock && flask db upgrade
+    """
+    name = 'items-low-stock'
+    table = Item
+
+    def apply_batch(self, connection, first_key, last_key):
+        return connection.execute(
+            db.update(Item.__table__)
+            .where(Item.id.between(first_key, last_key), _stale_flag())
+            .values(is_low_stock=Item.quantity <= Item.reorder_level)
+        ).rowcount
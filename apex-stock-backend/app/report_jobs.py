@@ -0,0 +1,222 @@
+import glob
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.metrics import observe_report_render
+from app.models import db, ReportJob
+from app.versions import get_versions
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+# Set in pool worker processes by _init_worker
+_worker_app = None
+
+# Report type -> (renderer in app.reports, download name prefix, data collections it depends on)
+# Named rather than imported: app.reports pulls in reportlab and pypdf, which only rendering needs
+PDF_REPORTS = {
+    'inventory-pdf': ('render_inventory_pdf', 'inventory_report', ('items',)),
+    'low-stock-pdf': ('render_low_stock_pdf', 'low_stock_report', ('items', 'suppliers'))
+}
+
+
+def report_dir(app):
+    path = app.config.get('REPORT_DIR') or os.path.join(app.instance_path, 'reports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def current_data_key(report_type):
+    """Identify the data a report would be built from, e.g. 'items-12.suppliers-3'"""
+    _, _, collections = PDF_REPORTS[report_type]
+    versions = get_versions(*collections)
+    return '.'.join(f'{collection}-{versions[collection][0]}' for collection in collections)
+
+
+def artifact_path(app, report_type, data_key):
+    return os.path.join(report_dir(app), f'{report_type}.{data_key}.pdf')
+
+
+def cached_artifact(report_type):
+    """Path of the artifact for the current data, or None if it has not been rendered yet"""
+    path = artifact_path(current_app, report_type, current_data_key(report_type))
+    return path if os.path.exists(path) else None
+
+
+def render_artifact(app, report_type, data_key):
+    """
+    Render a report to its artifact path and remove artifacts of older data
+    Runs inside an app context (request, thread or pool worker)
+    """
+    from app import reports
+    renderer = getattr(reports, PDF_REPORTS[report_type][0])
+    path = artifact_path(app, report_type, data_key)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+
+    started = time.perf_counter()
+    failed = True
+    try:
+        renderer(tmp_path)
+        os.replace(tmp_path, path)  # Atomic, so readers never see a half written file
+        failed = False
+    finally:
+        observe_report_render(report_type, time.perf_counter() - started, failed)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    for old in glob.glob(os.path.join(report_dir(app), f'{report_type}.*.pdf')):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    return path
+
+
+def submit_job(report_type, user_id):
+    """
+    Queue a report rendering, reusing a finished or in-flight job for the same data
+    Returns (job, created)
+    """
+    data_key = current_data_key(report_type)
+    stale_before = datetime.utcnow() - timedelta(seconds=current_app.config['REPORT_JOB_TIMEOUT'])
+
+    existing = (
+        ReportJob.query
+        .filter(ReportJob.report_type == report_type, ReportJob.data_key == data_key,
+                ReportJob.status.in_(['queued', 'running', 'done']))
+        .order_by(ReportJob.created_at.desc())
+        .first()
+    )
+    rendered = os.path.exists(artifact_path(current_app, report_type, data_key))
+    if existing:
+        if existing.status == 'done' and rendered:
+            return existing, False
+        if existing.status in ('queued', 'running') and existing.created_at > stale_before:
+            return existing, False
+
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        report_type=report_type,
+        data_key=data_key,
+        status='queued',
+        requested_by=user_id
+    )
+    if rendered:
+        # Already rendered for this data (the job row is gone or failed) - nothing to queue
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+    db.session.add(job)
+    db.session.commit()
+
+    if rendered:
+        return job, True
+
+    app = current_app._get_current_object()
+    try:
+        _submit(app, job.id)
+    except BrokenProcessPool as e:
+        # The job is already committed as queued: record why it will never run
+        app.logger.exception('Could not queue report job %s', job.id)
+        job.status = 'failed'
+        job.error = f'Report workers unavailable: {e}'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    return job, True
+
+
+def _submit(app, job_id):
+    """
+    Hand a job to the executor. A process pool breaks for good when one of its
+    workers dies, so a broken one is replaced and the submit retried once.
+    """
+    for attempt in range(2):
+        executor = _get_executor(app)
+        try:
+            if app.config['REPORT_WORKERS'] > 0:
+                executor.submit(_run_job_in_worker, job_id)
+            else:
+                executor.submit(run_job, app, job_id)
+            return
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            if attempt:
+                raise
+            app.logger.warning('Report worker pool is broken, starting a new one')
+
+
+def run_job(app, job_id):
+    with app.app_context():
+        job = db.session.get(ReportJob, job_id)
+        if job is None:
+            return
+        job.status = 'running'
+        db.session.commit()
+
+        try:
+            render_artifact(app, job.report_type, job.data_key)
+            job.status = 'done'
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ReportJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+            app.logger.exception('Report job %s failed', job_id)
+
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+def _get_executor(app):
+    """
+    One executor per process: a spawn-based process pool when REPORT_WORKERS > 0,
+    otherwise a single background thread in this process
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            workers = app.config['REPORT_WORKERS']
+            if workers > 0:
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(app.config['CONFIG_NAME'], {
+                        'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'],
+                        'SQLALCHEMY_ENGINE_OPTIONS': app.config['SQLALCHEMY_ENGINE_OPTIONS']
+                    })
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-job')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _discard_executor(executor):
+    """Forget a broken executor so the next _get_executor call builds a new one"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def _init_worker(config_name, overrides):
+    global _worker_app
+    from app import create_app
+
+    _worker_app = create_app(config_name, overrides)
+
+
+def _run_job_in_worker(job_id):
+    run_job(_worker_app, job_id)
@@ -0,0 +1,241 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from flask import current_app
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from app.models import db, Item
+from app.serializers import item_query
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # Optional: without pypdf inventory reports render in a single process
+    PdfReader = PdfWriter = None
+
+# Roughly one letter page of item rows
+ROWS_PER_TABLE = 40
+
+_render_pool = None
+_render_pool_key = None
+_render_pool_lock = threading.Lock()
+
+
+def render_inventory_pdf(output, workers=None, segment_rows=None):
+    """
+    Render the PDF report of all inventory items
+    `output` is a filename or a binary file object
+
+    The item list is split into page-sized tables (one huge Table lays out
+    in roughly quadratic time). With `workers` > 0 and pypdf installed,
+    segments of `segment_rows` items are rendered in parallel in a process
+    pool and concatenated; otherwise everything renders in this process.
+    """
+    if workers is None:
+        workers = current_app.config['REPORT_RENDER_WORKERS']
+    if segment_rows is None:
+        segment_rows = current_app.config['REPORT_SEGMENT_ROWS']
+    
+    summary = _inventory_summary()
+    rows = db.session.execute(
+        db.select(Item.id, Item.name, Item.category, Item.quantity, Item.price, Item.reorder_level)
+        .order_by(Item.id)
+        .execution_options(yield_per=segment_rows)
+    )
+    
+    if workers > 0 and PdfWriter is not None:
+        _render_inventory_parallel(output, summary, rows, workers, segment_rows)
+        return
+    
+    elements = _inventory_front_page(summary)
+    elements += _item_tables([_inventory_row(row) for row in rows])
+    SimpleDocTemplate(output, pagesize=letter).build(elements)
+
+
+def _inventory_summary():
+    """Totals for the front page, computed by one SQL aggregate instead of Python sum()s"""
+    low = db.case((Item.quantity <= Item.reorder_level, 1), else_=0)
+    total_items, total_quantity, total_value, low_stock_count = db.session.query(
+        db.func.count(Item.id),
+        db.func.coalesce(db.func.sum(Item.quantity), 0),
+        db.func.coalesce(db.func.sum(Item.quantity * Item.price), 0),
+        db.func.coalesce(db.func.sum(low), 0)
+    ).one()
+    
+    return {
+        'total_items': total_items,
+        'total_quantity': int(total_quantity),
+        'total_value': float(total_value),
+        'low_stock_count': int(low_stock_count)
+    }
+
+
+def _inventory_front_page(summary):
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Title
+    title = Paragraph("<b>Apex Stock - Inventory Report</b>", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+    
+    # Metadata
+    date_text = Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal'])
+    elements.append(date_text)
+    elements.append(Spacer(1, 12))
+    
+    # Summary
+    summary_table = Table([
+        ['Total Items', f"{summary['total_items']:,}"],
+        ['Total Quantity in Stock', f"{summary['total_quantity']:,} units"],
+        ['Total Inventory Value', f"${summary['total_value']:,.2f}"],
+        ['Low Stock Items', f"{summary['low_stock_count']:,}"]
+    ])
+    summary_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 12))
+    
+    return elements
+
+
+def _inventory_row(row):
+    item_id, name, category, quantity, price, reorder_level = row
+    status = '⚠️ Low Stock' if quantity <= reorder_level else '✓ OK'
+    return [str(item_id), name, category, str(quantity), f"${price:.2f}", status]
+
+
+INVENTORY_HEADER = ['ID', 'Name', 'Category', 'Quantity', 'Price', 'Status']
+INVENTORY_COL_WIDTHS = [40, 150, 100, 55, 60, 63]  # Fills the 468pt letter frame
+
+INVENTORY_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+]
+
+
+def _item_tables(data, header=INVENTORY_HEADER, style=INVENTORY_TABLE_STYLE, col_widths=INVENTORY_COL_WIDTHS):
+    """
+    Split rows into tables of ROWS_PER_TABLE rows, each with its own header
+    Fixed column widths keep the chunks aligned and spare reportlab from measuring every cell.
+    """
+    tables = []
+    for start in range(0, len(data), ROWS_PER_TABLE):
+        table = Table([header] + data[start:start + ROWS_PER_TABLE], colWidths=col_widths, repeatRows=1)
+        table.setStyle(TableStyle(style))
+        tables.append(table)
+    return tables
+
+
+def _render_item_segment(data):
+    """Render a list of item rows to PDF bytes - runs in a pool worker, no app or DB needed"""
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(_item_tables(data))
+    return buffer.getvalue()
+
+
+def _render_inventory_parallel(output, summary, rows, workers, segment_rows):
+    front = io.BytesIO()
+    SimpleDocTemplate(front, pagesize=letter).build(_inventory_front_page(summary))
+    
+    pool = _get_render_pool(workers)
+    futures = []
+    segment = []
+    for row in rows:
+        segment.append(_inventory_row(row))
+        if len(segment) == segment_rows:
+            futures.append(pool.submit(_render_item_segment, segment))
+            segment = []
+    if segment:
+        futures.append(pool.submit(_render_item_segment, segment))
+    
+    writer = PdfWriter()
+    writer.append(PdfReader(front))
+    for future in futures:
+        writer.append(PdfReader(io.BytesIO(future.result())))
+    writer.write(output)
+
+
+def _get_render_pool(workers):
+    """One spawn-based pool per process, recreated after fork or when the size changes"""
+    global _render_pool, _render_pool_key
+    key = (os.getpid(), workers)
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_key != key:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _render_pool_key = key
+        return _render_pool
+
+
+LOW_STOCK_HEADER = ['ID', 'Name', 'Current Qty', 'Reorder Level', 'Supplier']
+LOW_STOCK_COL_WIDTHS = [40, 160, 70, 78, 120]
+
+LOW_STOCK_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.red),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightpink),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+]
+
+
+def render_low_stock_pdf(output):
+    """
+    Render the PDF report of low stock items
+    `output` is a filename or a binary file object
+    """
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Title
+    title = Paragraph("<b>Apex Stock - Low Stock Alert Report</b>", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+    
+    date_text = Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal'])
+    elements.append(date_text)
+    elements.append(Spacer(1, 12))
+    
+    # Get low stock items
+    items = item_query().filter(Item.is_low_stock == db.true()).all()
+    
+    if not items:
+        no_items = Paragraph("No low stock items found!", styles['Normal'])
+        elements.append(no_items)
+    else:
+        data = []
+        
+        for item in items:
+            supplier_name = item.supplier.name if item.supplier else 'N/A'
+            data.append([
+                str(item.id),
+                item.name,
+                str(item.quantity),
+                str(item.reorder_level),
+                supplier_name
+            ])
+        
+        elements += _item_tables(data, LOW_STOCK_HEADER, LOW_STOCK_TABLE_STYLE, LOW_STOCK_COL_WIDTHS)
+    
+    doc.build(elements)
+
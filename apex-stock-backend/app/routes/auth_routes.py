@@ -2,6 +2,8 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app.models import db, User
 from app.utils import validate_request_data, log_activity
+from app.auth import token_claims, get_cached_user, remember_user, invalidate_user
+from app.passwords import get_hasher, HasherBusy
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -31,10 +33,11 @@ def register():
     user.set_password(data['password']) # use set_password function
 
     db.session.add(user)
-    db.session.commit()
+    db.session.flush()  # assigns user.id for the activity log
 
     # log the registred activity
     log_activity(user.id, 'created', 'user', user.id, f"User {user.username} registered!!")
+    db.session.commit()
     return jsonify({
         'message' : 'User registred successfully',
         'user' : user.to_dict()
@@ -51,17 +54,30 @@ def login():
     
     user  = User.query.filter_by(username=data['username']).first()
 
-    if not user or not user.check_password(data['password']):
+    if not user:
+        get_hasher().verify(None, data['password'])  # Same work as a wrong password
+        return jsonify({'error':'Invalid username or password'}), 401
+
+    if not user.check_password(data['password']):
         return jsonify({'error':'Invalid username or password'}), 401
     
-    access_token = create_access_token(identity=user.id)
+    # Upgrade hashes made with an older PASSWORD_HASH_METHOD while the password is at hand
+    if user.password_needs_rehash():
+        try:
+            user.set_password(data['password'])
+        except HasherBusy:
+            pass  # Next login will retry
+    
+    access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
+    record = remember_user(user)  # The token's first requests are served from the cache
 
     log_activity(user.id, 'logged_in', 'user', user.id, f"User {user.username} logged in")
+    db.session.commit()
 
     return jsonify({
         'message' : 'Login successful',
         'access_token' : access_token,
-        'user' : user.to_dict()
+        'user' : {key: value for key, value in record.items() if key != 'token_version'}
     }), 200
 
 
@@ -69,12 +85,12 @@ def login():
 @jwt_required()
 def get_current_user():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_cached_user(user_id)
 
     if not user:
         return jsonify({'error' : 'User not found'}), 404
     
-    return jsonify(user.to_dict()), 201
+    return jsonify({key: value for key, value in user.items() if key != 'token_version'}), 201
 
 
 @auth_bp.route('/change-password', methods = ['POST'])
@@ -92,10 +108,15 @@ def change_password():
         return jsonify({'error':'Current password is incorrect'}), 401
     
     user.set_password(data['new_password'])
-    db.session.commit()
+    user.revoke_tokens()  # Tokens issued before the change, wherever they are, stop working
 
     log_activity(user.id, 'updated', 'user', user.id, 'Password changed')
-    return jsonify({'message':'Password changed successfully'}), 200
+    db.session.commit()
+    invalidate_user(user.id)
+
+    # The caller's own token was just revoked too, so hand back one for the new version
+    access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
+    return jsonify({'message':'Password changed successfully', 'access_token': access_token}), 200
 
 
      
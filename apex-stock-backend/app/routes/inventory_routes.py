@@ -1,30 +1,177 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import db, Item, ActivityLog
+from sqlalchemy.orm.exc import StaleDataError
+from app.models import db, Item, Supplier, ActivityLog
+from app.pagination import (
+    PaginationError, parse_page_size, parse_sort, parse_fields,
+    order_by_clauses, keyset_filter, encode_cursor, decode_cursor
+)
+from app.serializers import item_query, serialize_items
+from app.stats import item_snapshot, record_item_change, get_stats
+from app.versions import bump_version, conditional
+from app.search import search_items, index_item, unindex_item
+from app.realtime import publish_item_change
+from app.reorder import record_reorder_change, get_reorder_queue
+from app.bulk_import import RowError, detect_format, iter_rows, import_items, parse_item_numbers
+from app.stock import (
+    MAX_BATCH_ADJUSTMENTS, StockAdjustmentError, parse_delta, adjust_quantity, adjust_many, stock_level
+)
 from app.utils import validate_request_data, log_activity
 
 inventory_bp = Blueprint('inventory', __name__)
 
+# Columns a client may ask for with ?fields=..., in Item.to_dict() order
+ITEM_FIELDS = {
+    'id': Item.id,
+    'name': Item.name,
+    'category': Item.category,
+    'quantity': Item.quantity,
+    'price': Item.price,
+    'reorder_level': Item.reorder_level,
+    'supplier_id': Item.supplier_id,
+    'supplier_name': Supplier.name,
+    'is_low_stock': Item.is_low_stock,
+    'created_at': Item.created_at,
+    'updated_at': Item.updated_at,
+    'version': Item.version
+}
+
+# Non-nullable columns a client may sort by with ?sort=...
+ITEM_SORTABLE = {
+    'id': Item.id,
+    'name': Item.name,
+    'category': Item.category,
+    'quantity': Item.quantity,
+    'price': Item.price,
+    'reorder_level': Item.reorder_level,
+    'updated_at': Item.updated_at
+}
+
+STALE_ITEM_ERROR = 'Item was changed by someone else. Reload it and try again'
+
+# Search results are ranked, not sorted by a column, so their cursor is just the offset
+SEARCH_CURSOR_SPEC = [('offset', Item.id, False)]
+
+
+def _serialize_item_row(row, fields):
+    """Turn a projected row into the same shape Item.to_dict() produces"""
+    data = {}
+    for name in fields:
+        value = row[name]
+        if name == 'is_low_stock':
+            value = bool(value)
+        elif name in ('created_at', 'updated_at') and value is not None:
+            value = value.isoformat()
+        data[name] = value
+    return data
+
+
 @inventory_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional('items', 'suppliers')
 def get_all_items():
     """
-    Get all inventory items
+    Get one page of inventory items
     GET /api/inventory
-    Query params: ?category=... (optional filter)
+    Query params:
+        ?category=...                 (optional filter)
+        ?limit=50                     (page size, capped at INVENTORY_MAX_PAGE_SIZE)
+        ?sort=name,-updated_at        (comma separated, '-' for descending; id is always the tiebreaker)
+        ?fields=id,name,quantity      (only select these columns)
+        ?cursor=...                   (next_cursor from the previous page)
+    Response: { "items": [...], "next_cursor": "..." | null, "limit": 50 }
     """
-    category = request.args.get('category')
+    try:
+        limit = parse_page_size(
+            request.args.get('limit'),
+            current_app.config['INVENTORY_PAGE_SIZE'],
+            current_app.config['INVENTORY_MAX_PAGE_SIZE']
+        )
+        sort_spec = parse_sort(request.args.get('sort'), ITEM_SORTABLE, 'name')
+        fields = parse_fields(request.args.get('fields'), list(ITEM_FIELDS))
+        cursor = request.args.get('cursor')
+        cursor_values = decode_cursor(cursor, sort_spec) if cursor else None
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Select the requested fields plus whatever the sort keys need for the next cursor
+    sort_labels = [f'_sort_{name}' for name, _, _ in sort_spec]
+    columns = [ITEM_FIELDS[name].label(name) for name in fields]
+    columns += [column.label(label) for (_, column, _), label in zip(sort_spec, sort_labels)]
+    
+    query = db.session.query(*columns)
+    if 'supplier_name' in fields:
+        query = query.outerjoin(Supplier, Item.supplier_id == Supplier.id)
     
+    category = request.args.get('category')
     if category:
-        items = Item.query.filter_by(category=category).all()
-    else:
-        items = Item.query.all()
+        query = query.filter(Item.category == category)
+    
+    if cursor_values is not None:
+        query = query.filter(keyset_filter(sort_spec, cursor_values))
+    
+    rows = query.order_by(*order_by_clauses(sort_spec)).limit(limit + 1).all()
     
-    return jsonify([item.to_dict() for item in items]), 200
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor([last[label] for label in sort_labels])
+    
+    return jsonify({
+        'items': [_serialize_item_row(row._mapping, fields) for row in rows],
+        'next_cursor': next_cursor,
+        'limit': limit
+    }), 200
+
+
+@inventory_bp.route('/search', methods=['GET'])
+@jwt_required()
+@conditional('items', 'suppliers')
+def search_inventory():
+    """
+    Ranked, typo tolerant search over item name, category and supplier name
+    GET /api/inventory/search?q=lapt
+    Query params:
+        ?q=...                        (required, words are matched as prefixes)
+        ?limit=20                     (page size, capped at SEARCH_MAX_PAGE_SIZE)
+        ?cursor=...                   (next_cursor from the previous page)
+    Response: { "items": [...], "next_cursor": "..." | null, "limit": 20 }
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'Search query (q) is required'}), 400
+
+    try:
+        limit = parse_page_size(request.args.get('limit'), 20, current_app.config['SEARCH_MAX_PAGE_SIZE'])
+        cursor = request.args.get('cursor')
+        offset = decode_cursor(cursor, SEARCH_CURSOR_SPEC)[0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise PaginationError('Invalid cursor')
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    ids = search_items(query, limit + 1, offset)
+
+    next_cursor = None
+    if len(ids) > limit:
+        ids = ids[:limit]
+        next_cursor = encode_cursor([offset + limit])
+
+    # Fetch the page in one query, then restore the ranking order
+    items = {item.id: item for item in item_query().filter(Item.id.in_(ids)).all()} if ids else {}
+    ranked = [items[item_id] for item_id in ids if item_id in items]
+
+    return jsonify({
+        'items': serialize_items(ranked),
+        'next_cursor': next_cursor,
+        'limit': limit
+    }), 200
 
 
 @inventory_bp.route('/<int:item_id>', methods=['GET'])
 @jwt_required()
+@conditional('items', 'suppliers')
 def get_item(item_id):
     """
     Get single item by ID
@@ -49,50 +196,94 @@ def create_item():
     data = request.get_json()
     user_id = get_jwt_identity()
     
-    print(f"📝 Creating item with data: {data}")  # DEBUG
+    current_app.logger.debug("Creating item with data: %s", data)
     
     # Validate required fields
     is_valid, error = validate_request_data(data, ['name', 'category', 'quantity', 'price'])
     if not is_valid:
-        print(f"❌ Validation error: {error}")  # DEBUG
+        current_app.logger.debug("Item validation error: %s", error)
         return jsonify({'error': error}), 400
+    try:
+        numbers = parse_item_numbers(data)
+    except RowError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
         # Create item
         item = Item(
             name=data['name'],
             category=data['category'],
-            quantity=data['quantity'],
-            price=data['price'],
-            reorder_level=data.get('reorder_level', 10),
+            quantity=numbers['quantity'],
+            price=numbers['price'],
+            reorder_level=numbers.get('reorder_level', 10),
             supplier_id=data.get('supplier_id') if data.get('supplier_id') else None
         )
         
         db.session.add(item)
-        db.session.commit()
+        db.session.flush()  # assigns item.id for the activity log
+        after = item_snapshot(item)
+        record_item_change(after=after)
+        bump_version('items')
+        index_item(item.id)
+        record_reorder_change(item.id, after=after)
+        publish_item_change(item.id, after=after)
         
         # Log activity
         log_activity(user_id, 'created', 'item', item.id, f"Added item: {item.name}")
+        db.session.commit()
         
-        print(f"✅ Item created successfully: {item.name}")  # DEBUG
+        current_app.logger.debug("Item created: %s", item.name)
         
         return jsonify({
             'message': 'Item created successfully',
             'item': item.to_dict()
         }), 201
     except Exception as e:
-        print(f"❌ Exception creating item: {str(e)}")  # DEBUG
+        current_app.logger.exception("Exception creating item")
         db.session.rollback()
         return jsonify({'error': f'Database error: {str(e)}'}), 500
 
 
+@inventory_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_import_items():
+    """
+    Create or update many items from one upload, read as it streams in
+    POST /api/inventory/bulk
+    Body: CSV (text/csv), JSON Lines (application/x-ndjson) or a JSON array (application/json),
+          or pass ?format=csv|jsonl|json. Rows with an "id" update that item, others create one.
+    Response: { "received", "created", "updated", "failed", "errors": [{"row": 3, "error": "..."}] }
+    """
+    user_id = get_jwt_identity()
+    
+    fmt = detect_format(request.mimetype, request.args.get('format'))
+    if fmt is None:
+        return jsonify({'error': 'Unsupported format. Send CSV, JSON Lines or a JSON array'}), 415
+    
+    summary = import_items(
+        iter_rows(request.stream, fmt),
+        chunk_size=current_app.config['BULK_IMPORT_CHUNK_SIZE'],
+        max_errors=current_app.config['BULK_IMPORT_MAX_ERRORS']
+    )
+    
+    # One entry for the whole upload rather than one per row
+    log_activity(user_id, 'imported', 'item', None,
+                 f"Bulk import: {summary['created']} created, {summary['updated']} updated, "
+                 f"{summary['failed']} failed")
+    db.session.commit()
+    
+    return jsonify(summary), 200
+
+
 @inventory_bp.route('/<int:item_id>', methods=['PUT'])
 @jwt_required()
 def update_item(item_id):
     """
     Update existing item
     PUT /api/inventory/123
-    Body: { "quantity": 150, "price": 24.99 } (any fields to update)
+    Body: { "quantity": 150, "price": 24.99, "version": 4 } (any fields to update)
+    Send the version from the last read to be refused (409) if the item changed since;
+    use POST /api/inventory/123/adjust for relative stock changes
     """
     item = Item.query.get(item_id)
     user_id = get_jwt_identity()
@@ -101,25 +292,44 @@ def update_item(item_id):
         return jsonify({'error': 'Item not found'}), 404
     
     data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    try:
+        # Checked the same way as bulk import rows, before anything is assigned
+        numbers = parse_item_numbers(data)
+    except RowError as e:
+        return jsonify({'error': str(e)}), 400
+    if 'version' in data and data['version'] != item.version:
+        return jsonify({'error': STALE_ITEM_ERROR, 'item': item.to_dict()}), 409
+    
+    before = item_snapshot(item)
     
     # Update fields if provided
     if 'name' in data:
         item.name = data['name']
     if 'category' in data:
         item.category = data['category']
-    if 'quantity' in data:
-        item.quantity = data['quantity']
-    if 'price' in data:
-        item.price = data['price']
-    if 'reorder_level' in data:
-        item.reorder_level = data['reorder_level']
+    for field, value in numbers.items():
+        setattr(item, field, value)
     if 'supplier_id' in data:
         item.supplier_id = data['supplier_id'] if data['supplier_id'] else None
     
-    db.session.commit()
+    try:
+        # The flush only matches the version read above, so a concurrent write wins cleanly
+        after = item_snapshot(item)
+        record_item_change(before, after)
+        bump_version('items')
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': STALE_ITEM_ERROR}), 409
+    index_item(item.id)
+    record_reorder_change(item.id, before, after)
+    publish_item_change(item.id, before, after)
     
     # Log activity
     log_activity(user_id, 'updated', 'item', item.id, f"Updated item: {item.name}")
+    db.session.commit()
     
     return jsonify({
         'message': 'Item updated successfully',
@@ -141,42 +351,144 @@ def delete_item(item_id):
         return jsonify({'error': 'Item not found'}), 404
     
     item_name = item.name
-    db.session.delete(item)
-    db.session.commit()
+    try:
+        before = item_snapshot(item)
+        record_item_change(before=before)
+        bump_version('items')
+        unindex_item(item_id)
+        record_reorder_change(item_id, before=before)
+        publish_item_change(item_id, before=before)
+        db.session.delete(item)
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': STALE_ITEM_ERROR}), 409
     
     # Log activity
     log_activity(user_id, 'deleted', 'item', item_id, f"Deleted item: {item_name}")
+    db.session.commit()
     
     return jsonify({'message': 'Item deleted successfully'}), 200
 
 
+@inventory_bp.route('/<int:item_id>/adjust', methods=['POST'])
+@jwt_required()
+def adjust_item_stock(item_id):
+    """
+    Add to or take from an item's stock in one atomic UPDATE
+    POST /api/inventory/123/adjust
+    Body: { "delta": -3, "allow_negative": false, "reason": "..." }
+    Refused with 409 if it would take the quantity below zero (unless allow_negative)
+    """
+    data = request.get_json() or {}
+    user_id = get_jwt_identity()
+    
+    delta = parse_delta(data.get('delta'))
+    if delta is None:
+        return jsonify({'error': 'delta must be a non-zero whole number'}), 400
+    
+    try:
+        row = adjust_quantity(item_id, delta, bool(data.get('allow_negative')))
+    except StockAdjustmentError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+    
+    bump_version('items')
+    details = f"Adjusted stock of item {item_id} by {delta:+d} to {row.quantity}"
+    if data.get('reason'):
+        details += f": {data['reason']}"
+    log_activity(user_id, 'adjusted', 'item', item_id, details)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Stock adjusted successfully',
+        'item': stock_level(row)
+    }), 200
+
+
+@inventory_bp.route('/adjust', methods=['POST'])
+@jwt_required()
+def adjust_stock_batch():
+    """
+    Adjust the stock of many items in one transaction - all or nothing
+    POST /api/inventory/adjust
+    Body: { "adjustments": [{ "id": 1, "delta": -2 }, ...], "allow_negative": false, "reason": "..." }
+    Deltas for the same id are added up. If any adjustment is refused, none is applied
+    and the response (409/404) lists every refused item.
+    """
+    data = request.get_json() or {}
+    user_id = get_jwt_identity()
+    
+    adjustments = data.get('adjustments')
+    if not isinstance(adjustments, list) or not adjustments:
+        return jsonify({'error': 'adjustments must be a non-empty list'}), 400
+    if len(adjustments) > MAX_BATCH_ADJUSTMENTS:
+        return jsonify({'error': f'At most {MAX_BATCH_ADJUSTMENTS} adjustments per request'}), 400
+    
+    deltas = {}
+    for index, adjustment in enumerate(adjustments):
+        item_id = adjustment.get('id') if isinstance(adjustment, dict) else None
+        delta = parse_delta(adjustment.get('delta')) if isinstance(adjustment, dict) else None
+        if not isinstance(item_id, int) or isinstance(item_id, bool) or delta is None:
+            return jsonify({'error': f'adjustments[{index}] needs an integer id and a non-zero whole number delta'}), 400
+        deltas[item_id] = deltas.get(item_id, 0) + delta
+    deltas = {item_id: delta for item_id, delta in deltas.items() if delta}
+    
+    rows, errors = adjust_many(deltas, bool(data.get('allow_negative')))
+    if errors:
+        db.session.rollback()
+        status_code = 409 if any(e.status_code == 409 for e in errors) else 404
+        return jsonify({
+            'error': 'No adjustments were applied',
+            'failed': [e.to_dict() for e in errors]
+        }), status_code
+    
+    if rows:
+        bump_version('items')
+    details = f"Adjusted stock of {len(rows)} items"
+    if data.get('reason'):
+        details += f": {data['reason']}"
+    log_activity(user_id, 'adjusted', 'item', None, details)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Stock adjusted successfully',
+        'items': [stock_level(row) for row in rows]
+    }), 200
+
+
 @inventory_bp.route('/low-stock', methods=['GET'])
 @jwt_required()
+@conditional('items', 'suppliers')
 def get_low_stock_items():
     """
     Get items that need reordering
     GET /api/inventory/low-stock
     """
-    items = Item.query.filter(Item.quantity <= Item.reorder_level).all()
+    items = item_query().filter(Item.is_low_stock == db.true()).all()
     
-    return jsonify([item.to_dict() for item in items]), 200
+    return jsonify(serialize_items(items)), 200
+
+
+@inventory_bp.route('/reorder-queue', methods=['GET'])
+@jwt_required()
+@conditional('items', 'suppliers')
+def get_reorder_queue_items():
+    """
+    Items waiting to be reordered, grouped by supplier
+    GET /api/inventory/reorder-queue
+    Response: [{ "supplier_id": 1, "supplier_name": "...", "items": [{ "id", "name", "quantity", "reorder_level", "queued_at", ... }] }]
+    """
+    return jsonify(get_reorder_queue()), 200
 
 
 @inventory_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional('items')
 def get_inventory_stats():
     """
     Get inventory statistics for dashboard
     GET /api/inventory/stats
+    Served from the aggregate tables maintained by app.stats
     """
-    total_items = Item.query.count()
-    total_value = db.session.query(db.func.sum(Item.quantity * Item.price)).scalar() or 0
-    low_stock_count = Item.query.filter(Item.quantity <= Item.reorder_level).count()
-    categories = db.session.query(Item.category, db.func.count(Item.id)).group_by(Item.category).all()
-    
-    return jsonify({
-        'total_items': total_items,
-        'total_value': round(total_value, 2),
-        'low_stock_count': low_stock_count,
-        'categories': [{'name': cat, 'count': count} for cat, count in categories]
-    }), 200
\ No newline at end of file
+    return jsonify(get_stats()), 200
@@ -1,17 +1,157 @@
-from flask import Blueprint, send_file, jsonify, request
+from flask import Blueprint, Response, current_app, send_file, jsonify, request, stream_with_context, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from datetime import datetime
+from datetime import datetime, timezone
 import io
+import os
 import csv
-from app.models import Item, Supplier, ActivityLog
-from app.utils import admin_required, log_activity
+from app.models import db, Item, Supplier, User, ActivityLog, ReportJob
+from app.pagination import (
+    PaginationError, parse_page_size, order_by_clauses, keyset_filter, encode_cursor, decode_cursor
+)
+from app.report_jobs import (
+    PDF_REPORTS, submit_job, cached_artifact, artifact_path
+)
+from app.serializers import supplier_items_count_subquery
+from app.utils import admin_required, log_activity, validate_request_data
 
 reports_bp = Blueprint('reports', __name__)
 
+# Rows fetched per round trip and written per streamed chunk
+CSV_CHUNK_ROWS = 1000
+
+# Newest first; id breaks ties between entries logged in the same instant
+ACTIVITY_LOG_ORDER = [('timestamp', ActivityLog.timestamp, True), ('id', ActivityLog.id, True)]
+
+
+def _csv_response(rows, filename):
+    """
+    Stream an iterable of CSV rows to the client in chunks of CSV_CHUNK_ROWS,
+    so memory stays flat no matter how many rows there are
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % CSV_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def _pdf_report_or_job(report_type, user_id):
+    """
+    Send the PDF when it is already rendered for the current data; otherwise
+    queue a report job and answer 202 with where to poll it, so no request
+    worker is held up rendering
+    """
+    path = cached_artifact(report_type)
+    if path:
+        return _send_pdf_report(report_type, path)
+
+    job, _ = submit_job(report_type, user_id)
+    status_url = url_for('reports.get_report_job', job_id=job.id)
+    body = {
+        **job.to_dict(),
+        'status_url': status_url,
+        'download_url': url_for('reports.download_report_job', job_id=job.id)
+    }
+    return jsonify(body), 202, {'Location': status_url}
+
+
+def _send_pdf_report(report_type, path):
+    _, download_prefix, _ = PDF_REPORTS[report_type]
+    
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'{download_prefix}_{datetime.now().strftime("%Y%m%d")}.pdf'
+    )
+
+
+def _stream(statement):
+    """Execute a SELECT with a server-side cursor, fetching CSV_CHUNK_ROWS at a time"""
+    return db.session.execute(statement.execution_options(yield_per=CSV_CHUNK_ROWS))
+
+
+def _inventory_csv_rows():
+    yield ['ID', 'Name', 'Category', 'Quantity', 'Price', 'Reorder Level', 'Supplier', 'Status']
+    
+    total_items = 0
+    total_quantity = 0
+    total_value = 0.0
+    low_stock_count = 0
+    
+    rows = _stream(
+        db.select(Item.id, Item.name, Item.category, Item.quantity, Item.price,
+                  Item.reorder_level, Supplier.name)
+        .outerjoin(Supplier, Item.supplier_id == Supplier.id)
+        .order_by(Item.id)
+    )
+    for item_id, name, category, quantity, price, reorder_level, supplier_name in rows:
+        is_low_stock = quantity <= reorder_level
+        total_items += 1
+        total_quantity += quantity
+        total_value += quantity * price
+        low_stock_count += is_low_stock
+        yield [
+            item_id,
+            name,
+            category,
+            quantity,
+            price,
+            reorder_level,
+            supplier_name or 'N/A',
+            'Low Stock' if is_low_stock else 'OK'
+        ]
+    
+    yield []
+    yield ['SUMMARY']
+    yield ['Total Items', total_items]
+    yield ['Total Quantity', total_quantity]
+    yield ['Total Inventory Value', f"{total_value:.2f}"]
+    yield ['Low Stock Items', low_stock_count]
+
+
+def _suppliers_csv_rows():
+    yield ['ID', 'Name', 'Contact Person', 'Email', 'Phone', 'Address', 'Items Count']
+    
+    total_suppliers = 0
+    total_items = 0
+    
+    counts = supplier_items_count_subquery()
+    rows = _stream(
+        db.select(Supplier.id, Supplier.name, Supplier.contact_person, Supplier.email,
+                  Supplier.phone, Supplier.address, db.func.coalesce(counts.c.items_count, 0))
+        .outerjoin(counts, counts.c.supplier_id == Supplier.id)
+        .order_by(Supplier.id)
+    )
+    for supplier_id, name, contact_person, email, phone, address, items_count in rows:
+        total_suppliers += 1
+        total_items += items_count
+        yield [
+            supplier_id,
+            name,
+            contact_person or 'N/A',
+            email or 'N/A',
+            phone or 'N/A',
+            address or 'N/A',
+            items_count
+        ]
+    
+    yield []
+    yield ['SUMMARY']
+    yield ['Total Suppliers', total_suppliers]
+    yield ['Total Items', total_items]
+
 @reports_bp.route('/inventory-pdf', methods=['GET'])
 @jwt_required()
 @admin_required()
@@ -19,65 +159,14 @@ def generate_inventory_pdf():
     """
     Generate PDF report of all inventory items
     GET /api/reports/inventory-pdf
+    Served from the artifact cache when the inventory has not changed, otherwise
+    answers 202 with a report job to poll (see /api/reports/jobs)
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title = Paragraph("<b>Apex Stock - Inventory Report</b>", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    
-    # Metadata
-    date_text = Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal'])
-    elements.append(date_text)
-    elements.append(Spacer(1, 12))
-    
-    # Table data
-    items = Item.query.all()
-    data = [['ID', 'Name', 'Category', 'Quantity', 'Price', 'Status']]
-    
-    for item in items:
-        status = '⚠️ Low Stock' if item.quantity <= item.reorder_level else '✓ OK'
-        data.append([
-            str(item.id),
-            item.name,
-            item.category,
-            str(item.quantity),
-            f"${item.price:.2f}",
-            status
-        ])
-    
-    # Create table
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    buffer.seek(0)
-    
-    # Log activity
     user_id = get_jwt_identity()
     log_activity(user_id, 'generated', 'report', None, 'Generated inventory PDF report')
+    db.session.commit()
     
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'inventory_report_{datetime.now().strftime("%Y%m%d")}.pdf'
-    )
+    return _pdf_report_or_job('inventory-pdf', user_id)
 
 
 @reports_bp.route('/inventory-csv', methods=['GET'])
@@ -85,42 +174,17 @@ def generate_inventory_pdf():
 @admin_required()
 def generate_inventory_csv():
     """
-    Generate CSV report of all inventory items
+    Stream CSV report of all inventory items, followed by summary totals
     GET /api/reports/inventory-csv
     """
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    
-    # Header
-    writer.writerow(['ID', 'Name', 'Category', 'Quantity', 'Price', 'Reorder Level', 'Supplier', 'Status'])
-    
-    # Data
-    items = Item.query.all()
-    for item in items:
-        status = 'Low Stock' if item.quantity <= item.reorder_level else 'OK'
-        supplier_name = item.supplier.name if item.supplier else 'N/A'
-        writer.writerow([
-            item.id,
-            item.name,
-            item.category,
-            item.quantity,
-            item.price,
-            item.reorder_level,
-            supplier_name,
-            status
-        ])
-    
-    buffer.seek(0)
-    
-    # Log activity
+    # Log activity before streaming starts - the response outlives this function
     user_id = get_jwt_identity()
     log_activity(user_id, 'generated', 'report', None, 'Generated inventory CSV report')
+    db.session.commit()
     
-    return send_file(
-        io.BytesIO(buffer.getvalue().encode()),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'inventory_report_{datetime.now().strftime("%Y%m%d")}.csv'
+    return _csv_response(
+        _inventory_csv_rows(),
+        f'inventory_report_{datetime.now().strftime("%Y%m%d")}.csv'
     )
 
 
@@ -131,67 +195,14 @@ def generate_low_stock_pdf():
     """
     Generate PDF report of low stock items
     GET /api/reports/low-stock-pdf
+    Served from the artifact cache when the inventory has not changed, otherwise
+    answers 202 with a report job to poll (see /api/reports/jobs)
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title = Paragraph("<b>Apex Stock - Low Stock Alert Report</b>", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    
-    date_text = Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal'])
-    elements.append(date_text)
-    elements.append(Spacer(1, 12))
-    
-    # Get low stock items
-    items = Item.query.filter(Item.quantity <= Item.reorder_level).all()
-    
-    if not items:
-        no_items = Paragraph("No low stock items found!", styles['Normal'])
-        elements.append(no_items)
-    else:
-        data = [['ID', 'Name', 'Current Qty', 'Reorder Level', 'Supplier']]
-        
-        for item in items:
-            supplier_name = item.supplier.name if item.supplier else 'N/A'
-            data.append([
-                str(item.id),
-                item.name,
-                str(item.quantity),
-                str(item.reorder_level),
-                supplier_name
-            ])
-        
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.red),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightpink),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-    
-    doc.build(elements)
-    buffer.seek(0)
-    
-    # Log activity
     user_id = get_jwt_identity()
     log_activity(user_id, 'generated', 'report', None, 'Generated low stock PDF report')
+    db.session.commit()
     
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'low_stock_report_{datetime.now().strftime("%Y%m%d")}.pdf'
-    )
+    return _pdf_report_or_job('low-stock-pdf', user_id)
 
 
 @reports_bp.route('/suppliers-csv', methods=['GET'])
@@ -199,39 +210,16 @@ def generate_low_stock_pdf():
 @admin_required()
 def generate_suppliers_csv():
     """
-    Generate CSV report of all suppliers
+    Stream CSV report of all suppliers, followed by summary totals
     GET /api/reports/suppliers-csv
     """
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    
-    # Header
-    writer.writerow(['ID', 'Name', 'Contact Person', 'Email', 'Phone', 'Address', 'Items Count'])
-    
-    # Data
-    suppliers = Supplier.query.all()
-    for supplier in suppliers:
-        writer.writerow([
-            supplier.id,
-            supplier.name,
-            supplier.contact_person or 'N/A',
-            supplier.email or 'N/A',
-            supplier.phone or 'N/A',
-            supplier.address or 'N/A',
-            len(supplier.items)
-        ])
-    
-    buffer.seek(0)
-    
-    # Log activity
     user_id = get_jwt_identity()
     log_activity(user_id, 'generated', 'report', None, 'Generated suppliers CSV report')
+    db.session.commit()
     
-    return send_file(
-        io.BytesIO(buffer.getvalue().encode()),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'suppliers_report_{datetime.now().strftime("%Y%m%d")}.csv'
+    return _csv_response(
+        _suppliers_csv_rows(),
+        f'suppliers_report_{datetime.now().strftime("%Y%m%d")}.csv'
     )
 
 
@@ -240,10 +228,144 @@ def generate_suppliers_csv():
 @admin_required()
 def get_activity_logs():
     """
-    Get recent activity logs (for dashboard)
-    GET /api/reports/activity-logs?limit=20
+    Get one page of activity logs, newest first (for dashboard and audit)
+    GET /api/reports/activity-logs
+    Query params:
+        ?limit=20                     (page size, capped at ACTIVITY_LOG_MAX_PAGE_SIZE)
+        ?user_id=3                    (optional filters, combined with AND)
+        ?action=updated
+        ?resource_type=item&resource_id=42
+        ?since=2024-01-01T00:00:00    (UTC, inclusive)
+        ?until=2024-02-01T00:00:00    (UTC, exclusive)
+        ?cursor=...                   (next_cursor from the previous page)
+    Response: { "logs": [...], "next_cursor": "..." | null, "limit": 20 }
+    """
+    try:
+        limit = parse_page_size(
+            request.args.get('limit'),
+            current_app.config['ACTIVITY_LOG_PAGE_SIZE'],
+            current_app.config['ACTIVITY_LOG_MAX_PAGE_SIZE']
+        )
+        filters = _activity_log_filters(request.args)
+        cursor = request.args.get('cursor')
+        cursor_values = decode_cursor(cursor, ACTIVITY_LOG_ORDER) if cursor else None
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Username joined in, so no per-row lazy load of ActivityLog.user
+    query = db.session.query(ActivityLog, User.username) \
+        .outerjoin(User, User.id == ActivityLog.user_id) \
+        .filter(*filters)
+    if cursor_values is not None:
+        query = query.filter(keyset_filter(ACTIVITY_LOG_ORDER, cursor_values))
+    
+    rows = query.order_by(*order_by_clauses(ACTIVITY_LOG_ORDER)).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor([last.timestamp, last.id])
+    
+    return jsonify({
+        'logs': [log.to_dict(username=username) for log, username in rows],
+        'next_cursor': next_cursor,
+        'limit': limit
+    }), 200
+
+
+def _activity_log_filters(args):
+    filters = []
+    for name in ('user_id', 'resource_id'):
+        value = args.get(name)
+        if value:
+            try:
+                filters.append(getattr(ActivityLog, name) == int(value))
+            except ValueError:
+                raise PaginationError(f'{name} must be an integer')
+    for name in ('action', 'resource_type'):
+        value = args.get(name)
+        if value:
+            filters.append(getattr(ActivityLog, name) == value)
+    if args.get('since'):
+        filters.append(ActivityLog.timestamp >= _parse_utc('since', args['since']))
+    if args.get('until'):
+        filters.append(ActivityLog.timestamp < _parse_utc('until', args['until']))
+    return filters
+
+
+def _parse_utc(name, value):
+    # Timestamps are stored as naive UTC
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise PaginationError(f'{name} must be an ISO 8601 timestamp')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@reports_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+@admin_required()
+def create_report_job():
+    """
+    Queue a PDF report for background rendering
+    POST /api/reports/jobs
+    Body: { "type": "inventory-pdf" | "low-stock-pdf" }
+    Returns the job right away; a job for unchanged data is reused instead of re-rendered
+    """
+    data = request.get_json() or {}
+    user_id = get_jwt_identity()
+    
+    is_valid, error = validate_request_data(data, ['type'])
+    if not is_valid:
+        return jsonify({'error': error}), 400
+    
+    if data['type'] not in PDF_REPORTS:
+        return jsonify({'error': f"Invalid report type. Must be one of: {', '.join(PDF_REPORTS)}"}), 400
+    
+    job, _ = submit_job(data['type'], user_id)
+    
+    log_activity(user_id, 'requested', 'report', None, f"Requested {data['type']} report")
+    db.session.commit()
+    
+    status_code = 200 if job.status == 'done' else 202
+    return jsonify(job.to_dict()), status_code
+
+
+@reports_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_report_job(job_id):
+    """
+    Poll a report job
+    GET /api/reports/jobs/<job_id>
     """
-    limit = int(request.args.get('limit', 20))
-    logs = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(limit).all()
+    job = db.session.get(ReportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Report job not found'}), 404
+    
+    return jsonify(job.to_dict()), 200
+
+
+@reports_bp.route('/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+@admin_required()
+def download_report_job(job_id):
+    """
+    Download the artifact of a finished report job
+    GET /api/reports/jobs/<job_id>/download
+    """
+    job = db.session.get(ReportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Report job not found'}), 404
+    
+    if job.status != 'done':
+        return jsonify({'error': f'Report is not ready (status: {job.status})'}), 409
+    
+    path = artifact_path(current_app, job.report_type, job.data_key)
+    if not os.path.exists(path):
+        return jsonify({'error': 'Report has expired, the data changed since it was rendered'}), 410
     
-    return jsonify([log.to_dict() for log in logs]), 200
\ No newline at end of file
+    return _send_pdf_report(job.report_type, path)
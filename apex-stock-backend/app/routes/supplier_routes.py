@@ -1,19 +1,24 @@
 from flask import jsonify, request, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import db, Supplier
+from app.models import db, Supplier, Item
+from app.serializers import item_query, serialize_items, supplier_query, serialize_suppliers
 from app.utils import validate_request_data, log_activity, admin_required
+from app.versions import bump_version, conditional
+from app.search import index_supplier
+from app.realtime import publish_supplier_change
 
 suppliers_bp = Blueprint('supplier',__name__)
 
 @suppliers_bp.route('/', methods = ['GET'])
 @jwt_required()
+@conditional('suppliers', 'items')
 def get_all_suppliers():
-    suppliers = Supplier.query.all()
-    return jsonify([supplier.to_dict() for supplier in suppliers]), 200
+    return jsonify(serialize_suppliers(supplier_query().all())), 200
 
 
 @suppliers_bp.route('<int:supplier_id>', methods=['GET'])
 @jwt_required()
+@conditional('suppliers', 'items')
 def get_supplier(supplier_id):
     supplier = Supplier.query.get(supplier_id)
     if not supplier:
@@ -41,9 +46,12 @@ def create_supplier():
     )
 
     db.session.add(supplier)
-    db.session.commit()
+    db.session.flush()  # assigns supplier.id for the activity log
+    bump_version('suppliers')
+    publish_supplier_change(supplier.id, supplier.name)
 
     log_activity(user_id, 'created', 'supplier', supplier.id, f"Added supplier {supplier.name}")
+    db.session.commit()
 
     return jsonify({
         'message' : 'Supplier added successfully',
@@ -77,9 +85,13 @@ def update_supplier(supplier_id):
     if 'address' in data:
         supplier.address = data['address']
 
-    db.session.commit()
-
+    bump_version('suppliers')
+    if 'name' in data:
+        db.session.flush()
+        index_supplier(supplier.id)
+    publish_supplier_change(supplier.id, supplier.name)
     log_activity(user_id, 'updated', 'supplier', supplier.id, f"Updated supplier {supplier.name}")
+    db.session.commit()
 
     return jsonify({
         'message' : 'Supplier updates sucessfully',
@@ -96,24 +108,29 @@ def delete_supplier(supplier_id):
     if not supplier:
         return jsonify({'error' : 'Supplier not found'}), 404
     
-    if supplier.items:
+    items_count = supplier.items_count()
+    if items_count:
         return jsonify({'error' : 'Cannot delete supplier with associated items',
-                        'items_count' : len(supplier.items)}), 400
+                        'items_count' : items_count}), 400
     
     supplier_name = supplier.name
     db.session.delete(supplier)
-    db.session.commit()
+    bump_version('suppliers')
+    publish_supplier_change(supplier_id, deleted=True)
 
-    log_activity(user_id, 'deleted', 'supplier', supplier.id, f"Deletes supplier: {supplier_name}")
+    log_activity(user_id, 'deleted', 'supplier', supplier_id, f"Deletes supplier: {supplier_name}")
+    db.session.commit()
 
     return jsonify({'message' : 'Supplier deleted successfully'}), 200
 
 
 @suppliers_bp.route('<int:supplier_id>/items', methods = ['GET'])
 @jwt_required()
+@conditional('suppliers', 'items')
 def get_supplier_items(supplier_id):
     supplier = Supplier.query.get(supplier_id)
     if not supplier:
         return jsonify({'error' : 'Supplier not found'}), 404
     
-    return jsonify([item.to_dict() for item in supplier.items]), 200
\ No newline at end of file
+    items = item_query().filter(Item.supplier_id == supplier.id).all()
+    return jsonify(serialize_items(items)), 200
\ No newline at end of file
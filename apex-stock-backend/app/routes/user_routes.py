@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import db, User
 from app.utils import admin_required, validate_request_data, log_activity
+from app.auth import invalidate_user
 
 users_bp = Blueprint('users', __name__)
 
@@ -61,11 +62,12 @@ def create_user():
     user.set_password(data['password'])
     
     db.session.add(user)
-    db.session.commit()
+    db.session.flush()  # assigns user.id for the activity log
     
     # Log activity
     log_activity(current_user_id, 'created', 'user', user.id, 
                  f"Admin created user: {user.username} ({user.role})")
+    db.session.commit()
     
     return jsonify({
         'message': 'User created successfully',
@@ -102,16 +104,19 @@ def update_user(user_id):
     if 'role' in data:
         if data['role'] not in ['admin', 'staff']:
             return jsonify({'error': 'Invalid role'}), 400
-        user.role = data['role']
+        if data['role'] != user.role:
+            user.role = data['role']
+            user.revoke_tokens()  # Tokens carry the role
     
     if 'password' in data:
         user.set_password(data['password'])
-    
-    db.session.commit()
+        user.revoke_tokens()
     
     # Log activity
     log_activity(current_user_id, 'updated', 'user', user.id, 
                  f"Admin updated user: {user.username}")
+    db.session.commit()
+    invalidate_user(user.id)
     
     return jsonify({
         'message': 'User updated successfully',
@@ -139,11 +144,12 @@ def delete_user(user_id):
     
     username = user.username
     db.session.delete(user)
-    db.session.commit()
     
     # Log activity
     log_activity(current_user_id, 'deleted', 'user', user_id, 
                  f"Admin deleted user: {username}")
+    db.session.commit()
+    invalidate_user(user_id)
     
     return jsonify({'message': 'User deleted successfully'}), 200
 
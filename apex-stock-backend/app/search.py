@@ -0,0 +1,522 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.exc import OperationalError
+
+from app.models import db, Item, Supplier
+from app.versions import get_versions
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'fts5', 'trigram')
+PENDING_KEY = 'pending_search_updates'
+
+# FTS5 score weights for (name, category, supplier_name)
+FTS_WEIGHTS = (10.0, 2.0, 1.0)
+# Trigram score weights for the same fields, and the minimum similarity to count as a hit
+TRIGRAM_WEIGHTS = (3.0, 1.0, 1.0)
+TRIGRAM_MIN_SIMILARITY = 0.3
+# Trigrams present in more than this share of documents carry little signal and are skipped
+TRIGRAM_MAX_DF = 0.2
+
+
+WORD = re.compile(r'\w+')
+
+
+def tokenize(query):
+    return WORD.findall((query or '').lower())
+
+
+def edit_distance(a, b, limit):
+    """
+    Edit distance counting a swap of two adjacent letters as one edit,
+    giving up early once it exceeds `limit`
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def typo_budget(token):
+    return 1 if len(token) < 8 else 2
+
+
+def _ranked(scores, limit, offset):
+    """Ids of the best scores, ties broken by id, for one page"""
+    best = heapq.nsmallest(offset + limit, scores.items(), key=lambda pair: (-pair[1], pair[0]))
+    return [item_id for item_id, _ in best[offset:]]
+
+
+class Fts5SearchIndex:
+    """
+    SQLite FTS5 table of (name, category, supplier_name) with rowid = item id
+    Writes go through the caller's session, so the index commits with the item.
+
+    Only the newest SEARCH_CANDIDATE_LIMIT matches are ranked, here rather
+    than with bm25(), whose statistics read every match of every term: a
+    query for a word in half the catalog would cost half the catalog.
+    """
+
+    name = 'fts5'
+
+    def __init__(self, app):
+        # Typo correction candidates by first letter, reloaded every SEARCH_REFRESH_SECONDS:
+        # counting a word's documents in items_fts_vocab reads its whole posting list
+        self.refresh_seconds = app.config['SEARCH_REFRESH_SECONDS']
+        self._words = {}  # letter -> (loaded at, [(term, doc count)])
+
+    def search(self, query, limit, offset):
+        terms = [self._term(token) for token in tokenize(query)]
+        terms = [term for term in terms if term]
+        if not terms:
+            return []
+
+        match = ' '.join(f'"{word}"*' if prefix else f'"{word}"' for word, prefix in terms)
+        rows = db.session.execute(text(
+            'SELECT rowid, name, category, supplier_name FROM items_fts WHERE items_fts MATCH :match '
+            'ORDER BY rowid DESC LIMIT :candidates'
+        ), {'match': match, 'candidates': current_app.config['SEARCH_CANDIDATE_LIMIT']})
+        patterns = [re.compile(rf'\b{re.escape(word)}' + ('' if prefix else r'\b')) for word, prefix in terms]
+        scores = {row[0]: _fts_score(patterns, row[1:]) for row in rows}
+        return _ranked(scores, limit, offset)
+
+    def _term(self, token):
+        """
+        (word, prefix) to match for a query token: the token itself if it is an
+        indexed word, otherwise as a prefix if some word starts with it,
+        otherwise the closest word; None if there is none.
+        A whole word is not also matched as a prefix, which would merge the
+        postings of every longer word into one list on each query.
+        """
+        if self._matches(f'"{token}"'):
+            return token, False
+        if self._matches(f'"{token}"*'):
+            return token, True
+        if not token[0].isalpha():
+            # Numbers and codes are not corrected, and may have a word per item to compare against
+            return None
+        term = self._correct(token)
+        return (term, False) if term else None
+
+    def _correct(self, token):
+        """The indexed word closest to a token that matches nothing, or None"""
+        budget = typo_budget(token)
+        best = None
+        for term, doc_count in self._words_starting_with(token[0]):
+            # Compare against the term's prefix too, so a typo in a partly typed word still matches
+            distance = min(edit_distance(token, term, budget), edit_distance(token, term[:len(token)], budget))
+            if distance <= budget and (best is None or (distance, -doc_count) < best[0]):
+                best = ((distance, -doc_count), term)
+        return best[1] if best else None
+
+    def _words_starting_with(self, letter):
+        """Indexed words sharing the first letter, which keeps the candidates few"""
+        loaded = self._words.get(letter)
+        if loaded is None or time.monotonic() - loaded[0] > self.refresh_seconds:
+            words = db.session.execute(text(
+                'SELECT term, doc FROM items_fts_vocab WHERE term >= :low AND term < :high'
+            ), {'low': letter, 'high': chr(ord(letter) + 1)}).all()
+            loaded = self._words[letter] = (time.monotonic(), words)
+        return loaded[1]
+
+    def _matches(self, match):
+        return db.session.execute(text(
+            'SELECT 1 FROM items_fts WHERE items_fts MATCH :match LIMIT 1'
+        ), {'match': match}).first() is not None
+
+    def index_items(self, item_ids):
+        ids = bindparam('ids', expanding=True)
+        db.session.execute(text('DELETE FROM items_fts WHERE rowid IN :ids').bindparams(ids), {'ids': item_ids})
+        db.session.execute(text(
+            'INSERT INTO items_fts (rowid, name, category, supplier_name) '
+            'SELECT items.id, items.name, items.category, COALESCE(suppliers.name, \'\') '
+            'FROM items LEFT JOIN suppliers ON suppliers.id = items.supplier_id WHERE items.id IN :ids'
+        ).bindparams(ids), {'ids': item_ids})
+
+    def unindex_item(self, item_id):
+        db.session.execute(text('DELETE FROM items_fts WHERE rowid = :id'), {'id': item_id})
+
+    def index_supplier(self, supplier_id):
+        db.session.execute(text(
+            'UPDATE items_fts SET supplier_name = '
+            '(SELECT COALESCE(name, \'\') FROM suppliers WHERE id = :id) '
+            'WHERE rowid IN (SELECT id FROM items WHERE supplier_id = :id)'
+        ), {'id': supplier_id})
+
+    def rebuild(self):
+        db.session.execute(text('DELETE FROM items_fts'))
+        db.session.execute(text(
+            'INSERT INTO items_fts (rowid, name, category, supplier_name) '
+            'SELECT items.id, items.name, items.category, COALESCE(suppliers.name, \'\') '
+            'FROM items LEFT JOIN suppliers ON suppliers.id = items.supplier_id'
+        ))
+        # Merge the segments the bulk insert left behind into one b-tree per term
+        db.session.execute(text("INSERT INTO items_fts (items_fts) VALUES ('optimize')"))
+        db.session.commit()
+
+
+def _fts_score(patterns, fields):
+    """
+    Query terms found in each field, weighted by FTS_WEIGHTS and divided by the
+    field's word count: as with bm25, a match in the name outranks one in the
+    category or supplier, and a match in a short name one in a long name
+    """
+    score = 0.0
+    for weight, value in zip(FTS_WEIGHTS, fields):
+        if not value:
+            continue
+        lowered = value.lower()
+        hits = sum(1 for pattern in patterns if pattern.search(lowered))
+        if hits:
+            score += weight * hits / len(WORD.findall(lowered))
+    return score
+
+
+class _TrigramTables:
+    """Postings and documents of one trigram index generation"""
+
+    def __init__(self):
+        self.names = {}  # item id -> name
+        self.categories = {}  # item id -> category
+        self.item_suppliers = {}  # item id -> supplier id
+        self.supplier_names = {}  # supplier id -> name
+        self.supplier_items = defaultdict(set)
+        self.name_postings = defaultdict(set)
+        self.category_postings = defaultdict(set)
+        self.supplier_postings = defaultdict(set)
+
+    def add_item(self, item_id, name, category, supplier_id):
+        self.names[item_id] = name
+        self.categories[item_id] = category
+        self.item_suppliers[item_id] = supplier_id
+        if supplier_id is not None:
+            self.supplier_items[supplier_id].add(item_id)
+        for gram in trigrams(name):
+            self.name_postings[gram].add(item_id)
+        for gram in trigrams(category):
+            self.category_postings[gram].add(item_id)
+
+    def remove_item(self, item_id):
+        if item_id not in self.names:
+            return
+        for gram in trigrams(self.names.pop(item_id)):
+            self.name_postings[gram].discard(item_id)
+        for gram in trigrams(self.categories.pop(item_id)):
+            self.category_postings[gram].discard(item_id)
+        supplier_id = self.item_suppliers.pop(item_id)
+        if supplier_id is not None:
+            self.supplier_items[supplier_id].discard(item_id)
+
+    def add_supplier(self, supplier_id, name):
+        self.supplier_names[supplier_id] = name
+        for gram in trigrams(name):
+            self.supplier_postings[gram].add(supplier_id)
+
+    def remove_supplier(self, supplier_id):
+        if supplier_id not in self.supplier_names:
+            return
+        for gram in trigrams(self.supplier_names.pop(supplier_id)):
+            self.supplier_postings[gram].discard(supplier_id)
+
+
+def trigrams(value):
+    grams = set()
+    for word in tokenize(value):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _similarities(grams, postings, total, limit):
+    """
+    Share of the query trigrams each document contains, for documents above the threshold
+    Trigrams found in most documents are skipped when rarer ones are available.
+    At most `limit` documents are scored, taken from the rarest trigrams first.
+    """
+    present = [postings[gram] for gram in grams if postings.get(gram)]
+    rare = [posting for posting in present if len(posting) <= total * TRIGRAM_MAX_DF]
+    considered = sorted(rare or present, key=len)
+    if not considered:
+        return {}
+
+    # Skipped common trigrams count as matched, missing ones as not
+    matched_bonus = len(present) - len(considered)
+    needed = max(math.ceil(TRIGRAM_MIN_SIMILARITY * len(grams) - matched_bonus - 1e-9), 1)
+
+    # A document with `needed` of the considered trigrams has at least one of the
+    # len(considered) - needed + 1 rarest, so only those are read for candidates
+    candidates = set()
+    for posting in considered[:len(considered) - needed + 1]:
+        for doc_id in posting:
+            candidates.add(doc_id)
+            if len(candidates) >= limit:
+                break
+        if len(candidates) >= limit:
+            break
+
+    similarities = {}
+    for doc_id in candidates:
+        similarity = (sum(doc_id in posting for posting in considered) + matched_bonus) / len(grams)
+        if similarity >= TRIGRAM_MIN_SIMILARITY:
+            similarities[doc_id] = similarity
+    return similarities
+
+
+class TrigramSearchIndex:
+    """
+    In-process trigram index, used when FTS5 is not available
+
+    Writes made by this process are applied once their session commits.
+    Writes made by other processes are noticed through the data versions
+    and picked up by a background rebuild, checked at most every
+    SEARCH_REFRESH_SECONDS.
+    """
+
+    name = 'trigram'
+
+    def __init__(self, app):
+        self.app = app
+        self.refresh_seconds = app.config['SEARCH_REFRESH_SECONDS']
+        self.tables = None
+        self._lock = threading.RLock()
+        self._versions = None
+        self._checked_at = 0.0
+        self._rebuilding = False
+
+    def search(self, query, limit, offset):
+        self._ensure_fresh()
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        # Each field contributes at most this many items, so a common word costs no more than a rare one
+        candidates = self.app.config['SEARCH_CANDIDATE_LIMIT']
+        with self._lock:
+            tables = self.tables
+            scores = defaultdict(float)
+            for item_id, similarity in _similarities(grams, tables.name_postings, len(tables.names), candidates).items():
+                scores[item_id] += TRIGRAM_WEIGHTS[0] * similarity
+            for item_id, similarity in _similarities(grams, tables.category_postings, len(tables.names),
+                                                     candidates).items():
+                scores[item_id] += TRIGRAM_WEIGHTS[1] * similarity
+            supplier_scores = _similarities(grams, tables.supplier_postings, len(tables.supplier_names), candidates)
+            supplied = 0
+            for supplier_id, similarity in sorted(supplier_scores.items(), key=lambda pair: -pair[1]):
+                for item_id in tables.supplier_items.get(supplier_id, ()):
+                    if supplied >= candidates:
+                        break
+                    scores[item_id] += TRIGRAM_WEIGHTS[2] * similarity
+                    supplied += 1
+
+            # Names starting with the query rank first
+            prefix = ' '.join(tokenize(query))
+            for item_id in scores:
+                if tables.names[item_id].lower().startswith(prefix):
+                    scores[item_id] += TRIGRAM_WEIGHTS[0]
+
+        return _ranked(scores, limit, offset)
+
+    def apply(self, updates):
+        """Apply (operation, id) pairs recorded by a committed session"""
+        if self.tables is None:
+            return
+        item_ids = {key for operation, key in updates if operation == 'item'}
+        deleted_ids = {key for operation, key in updates if operation == 'delete'}
+        supplier_ids = {key for operation, key in updates if operation == 'supplier'}
+
+        # A fresh app context gets its own session - the committing one cannot run SQL here
+        with self.app.app_context():
+            items = db.session.query(Item.id, Item.name, Item.category, Item.supplier_id) \
+                .filter(Item.id.in_(item_ids)).all() if item_ids else []
+            suppliers = db.session.query(Supplier.id, Supplier.name) \
+                .filter(Supplier.id.in_(supplier_ids)).all() if supplier_ids else []
+
+        with self._lock:
+            for item_id in item_ids | deleted_ids:
+                self.tables.remove_item(item_id)
+            for row in items:
+                self.tables.add_item(*row)
+            for supplier_id in supplier_ids:
+                self.tables.remove_supplier(supplier_id)
+            for row in suppliers:
+                self.tables.add_supplier(*row)
+
+    def _ensure_fresh(self):
+        if self.tables is None:
+            with self._lock:
+                if self.tables is None:
+                    self.rebuild()
+            return
+
+        now = time.monotonic()
+        if self._rebuilding or now - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = now
+        if get_versions('items', 'suppliers') != self._versions:
+            # Keep serving the current tables while another process's writes are loaded
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, name='search-rebuild', daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            with self.app.app_context():
+                self.rebuild()
+        except Exception:
+            logger.exception('Search index rebuild failed')
+        finally:
+            self._rebuilding = False
+
+    def rebuild(self):
+        versions = get_versions('items', 'suppliers')
+        tables = _TrigramTables()
+        for row in db.session.query(Supplier.id, Supplier.name).yield_per(5000):
+            tables.add_supplier(*row)
+        for row in db.session.query(Item.id, Item.name, Item.category, Item.supplier_id).yield_per(5000):
+            tables.add_item(*row)
+
+        with self._lock:
+            self.tables = tables
+            self._versions = versions
+            self._checked_at = time.monotonic()
+
+
+def init_search(app):
+    backend = app.config['SEARCH_BACKEND']
+    if backend not in BACKENDS:
+        raise ValueError(f"SEARCH_BACKEND must be one of {', '.join(BACKENDS)}, got '{backend}'")
+    app.extensions['search'] = None  # Chosen on first use, once the database is reachable
+
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_commit', _apply_pending):
+        event.listen(session_class, 'after_commit', _apply_pending)
+        event.listen(session_class, 'after_rollback', _discard_pending)
+
+
+def get_search_index():
+    index = current_app.extensions.get('search')
+    if index is None:
+        backend = current_app.config['SEARCH_BACKEND']
+        if backend == 'auto':
+            backend = 'fts5' if _fts5_ready() else 'trigram'
+        app = current_app._get_current_object()
+        index = Fts5SearchIndex(app) if backend == 'fts5' else TrigramSearchIndex(app)
+        current_app.extensions['search'] = index
+    return index
+
+
+def search_items(query, limit, offset):
+    """Ranked item ids for a free text query over name, category and supplier name"""
+    return get_search_index().search(query, limit, offset)
+
+
+def index_item(item_id):
+    """Call after a created or updated item is flushed, before commit"""
+    index_items([item_id])
+
+
+def index_items(item_ids):
+    index = get_search_index()
+    if isinstance(index, Fts5SearchIndex):
+        if item_ids:
+            index.index_items(list(item_ids))
+    else:
+        db.session.info.setdefault(PENDING_KEY, []).extend(('item', item_id) for item_id in item_ids)
+
+
+def unindex_item(item_id):
+    _record('delete', item_id)
+
+
+def index_supplier(supplier_id):
+    """Call after a supplier is renamed, before commit"""
+    _record('supplier', supplier_id)
+
+
+def rebuild_search_index():
+    get_search_index().rebuild()
+
+
+def _record(operation, key):
+    index = get_search_index()
+    if isinstance(index, Fts5SearchIndex):
+        {'delete': index.unindex_item, 'supplier': index.index_supplier}[operation](key)
+    else:
+        db.session.info.setdefault(PENDING_KEY, []).append((operation, key))
+
+
+def _apply_pending(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        current_app.extensions['search'].apply(pending)
+
+
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def _fts5_ready():
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    try:
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1 FROM items_fts LIMIT 1'))
+        return True
+    except OperationalError:
+        return False
+
+
+def create_fts_tables(target, connection, **kw):
+    """
+    Create and fill the FTS5 tables next to the regular ones (metadata after_create hook)
+    Silently skipped on other databases, or when SQLite was built without FTS5.
+    """
+    if connection.dialect.name != 'sqlite':
+        return
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+    )).first()
+    if exists:
+        return
+    try:
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE items_fts USING fts5("
+            "name, category, supplier_name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+    except OperationalError:
+        logger.warning('SQLite was built without FTS5, falling back to the in-process trigram index')
+        return
+    connection.execute(text("CREATE VIRTUAL TABLE items_fts_vocab USING fts5vocab(items_fts, 'row')"))
+    connection.execute(text(
+        'INSERT INTO items_fts (rowid, name, category, supplier_name) '
+        'SELECT items.id, items.name, items.category, COALESCE(suppliers.name, \'\') '
+        'FROM items LEFT JOIN suppliers ON suppliers.id = items.supplier_id'
+    ))
+
+
+def drop_fts_tables(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text('DROP TABLE IF EXISTS items_fts_vocab'))
+        connection.execute(text('DROP TABLE IF EXISTS items_fts'))
+
+
+event.listen(db.metadata, 'after_create', create_fts_tables)
+event.listen(db.metadata, 'before_drop', drop_fts_tables)
@@ -0,0 +1,40 @@
+from sqlalchemy.orm import joinedload
+from app.models import db, Item, Supplier
+
+
+def item_query():
+    """
+    Item query that loads each item's supplier in the same SELECT,
+    so Item.to_dict() never lazy-loads suppliers one by one
+    """
+    return Item.query.options(joinedload(Item.supplier))
+
+
+def serialize_items(items):
+    return [item.to_dict() for item in items]
+
+
+def supplier_items_count_subquery():
+    """
+    One grouped COUNT over items, joined to suppliers instead of len(supplier.items)
+    """
+    return (
+        db.session.query(Item.supplier_id, db.func.count(Item.id).label('items_count'))
+        .group_by(Item.supplier_id)
+        .subquery()
+    )
+
+
+def supplier_query():
+    """
+    Query yielding (Supplier, items_count) pairs in a single SELECT
+    """
+    counts = supplier_items_count_subquery()
+    return (
+        db.session.query(Supplier, db.func.coalesce(counts.c.items_count, 0))
+        .outerjoin(counts, counts.c.supplier_id == Supplier.id)
+    )
+
+
+def serialize_suppliers(rows):
+    return [supplier.to_dict(items_count=items_count) for supplier, items_count in rows]
@@ -0,0 +1,178 @@
+from datetime import datetime
+from app.models import db, Item, InventoryStats, CategoryStats
+
+STATS_ROW_ID = 1
+VALUE_TOLERANCE = 0.01
+
+
+def item_snapshot(item):
+    """
+    Capture the fields the dashboard aggregates depend on.
+    Take it before changing or deleting an item, and again after.
+    """
+    return (item.category, int(item.quantity or 0), float(item.price or 0), int(item.reorder_level or 0))
+
+
+def record_item_change(before=None, after=None):
+    """
+    Apply the difference between two item snapshots to the aggregates
+    Pass before=None for a new item and after=None for a deleted one.
+
+    Uses relative UPDATEs in the caller's session, so the aggregates are
+    committed (or rolled back) together with the item change itself.
+    """
+    record_item_changes([(before, after)])
+
+
+def record_item_changes(changes):
+    """
+    Same as record_item_change for many (before, after) pairs at once,
+    with one UPDATE per affected category rather than per item
+    """
+    deltas = {}
+    for before, after in changes:
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot is None:
+                continue
+            category, quantity, price, reorder_level = snapshot
+            delta = deltas.setdefault(category, [0, 0.0, 0])
+            delta[0] += sign
+            delta[1] += sign * quantity * price
+            delta[2] += sign * (1 if quantity <= reorder_level else 0)
+
+    deltas = {category: delta for category, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    total_count = sum(delta[0] for delta in deltas.values())
+    total_value = sum(delta[1] for delta in deltas.values())
+    total_low = sum(delta[2] for delta in deltas.values())
+
+    result = db.session.execute(
+        db.update(InventoryStats)
+        .where(InventoryStats.id == STATS_ROW_ID)
+        .values(
+            total_items=InventoryStats.total_items + total_count,
+            total_value=InventoryStats.total_value + total_value,
+            low_stock_count=InventoryStats.low_stock_count + total_low
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Never built yet - the first read of get_stats() builds it from a full scan
+        return
+
+    for category, (count, value, low) in deltas.items():
+        result = db.session.execute(
+            db.update(CategoryStats)
+            .where(CategoryStats.category == category)
+            .values(
+                item_count=CategoryStats.item_count + count,
+                total_value=CategoryStats.total_value + value,
+                low_stock_count=CategoryStats.low_stock_count + low
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.add(CategoryStats(
+                category=category, item_count=count, total_value=value, low_stock_count=low
+            ))
+
+    # Drop categories that no longer have any items, like the GROUP BY would
+    db.session.flush()
+    db.session.execute(
+        db.delete(CategoryStats)
+        .where(CategoryStats.category.in_(list(deltas)), CategoryStats.item_count <= 0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def compute_live_stats():
+    """Full-table scan of items, the way /stats used to answer every request"""
+    low = db.case((Item.quantity <= Item.reorder_level, 1), else_=0)
+    rows = db.session.query(
+        Item.category,
+        db.func.count(Item.id),
+        db.func.coalesce(db.func.sum(Item.quantity * Item.price), 0),
+        db.func.coalesce(db.func.sum(low), 0)
+    ).group_by(Item.category).order_by(Item.category).all()
+
+    categories = {category: (count, float(value), int(low_count)) for category, count, value, low_count in rows}
+    return {
+        'total_items': sum(row[0] for row in categories.values()),
+        'total_value': sum(row[1] for row in categories.values()),
+        'low_stock_count': sum(row[2] for row in categories.values()),
+        'categories': categories
+    }
+
+
+def rebuild_stats():
+    """Recompute the aggregate tables from scratch and commit"""
+    live = compute_live_stats()
+
+    db.session.execute(db.delete(CategoryStats))
+    db.session.execute(db.delete(InventoryStats))
+    db.session.add(InventoryStats(
+        id=STATS_ROW_ID,
+        total_items=live['total_items'],
+        total_value=live['total_value'],
+        low_stock_count=live['low_stock_count'],
+        rebuilt_at=datetime.utcnow()
+    ))
+    db.session.add_all([
+        CategoryStats(category=category, item_count=count, total_value=value, low_stock_count=low)
+        for category, (count, value, low) in live['categories'].items()
+    ])
+    db.session.commit()
+    return live
+
+
+def get_stats():
+    """
+    Dashboard statistics read from the aggregate tables
+    """
+    totals = db.session.get(InventoryStats, STATS_ROW_ID)
+    if totals is None:
+        rebuild_stats()
+        totals = db.session.get(InventoryStats, STATS_ROW_ID)
+
+    categories = CategoryStats.query.order_by(CategoryStats.category).all()
+
+    return {
+        'total_items': totals.total_items,
+        'total_value': round(totals.total_value, 2),
+        'low_stock_count': totals.low_stock_count,
+        'categories': [
+            {'name': c.category, 'count': c.item_count, 'value': round(c.total_value, 2)}
+            for c in categories
+        ]
+    }
+
+
+def check_stats():
+    """
+    Compare the aggregate tables against a live scan
+    Returns a list of human readable mismatches (empty when consistent)
+    """
+    live = compute_live_stats()
+    totals = db.session.get(InventoryStats, STATS_ROW_ID)
+    if totals is None:
+        return ['Aggregates have not been built yet (run: flask rebuild-stats)']
+
+    problems = []
+    if totals.total_items != live['total_items']:
+        problems.append(f"total_items: stored {totals.total_items}, live {live['total_items']}")
+    if abs(totals.total_value - live['total_value']) > VALUE_TOLERANCE:
+        problems.append(f"total_value: stored {totals.total_value:.2f}, live {live['total_value']:.2f}")
+    if totals.low_stock_count != live['low_stock_count']:
+        problems.append(f"low_stock_count: stored {totals.low_stock_count}, live {live['low_stock_count']}")
+
+    stored = {c.category: (c.item_count, c.total_value, c.low_stock_count) for c in CategoryStats.query.all()}
+    for category in sorted(set(stored) | set(live['categories'])):
+        stored_row = stored.get(category, (0, 0.0, 0))
+        live_row = live['categories'].get(category, (0, 0.0, 0))
+        if (stored_row[0] != live_row[0] or stored_row[2] != live_row[2]
+                or abs(stored_row[1] - live_row[1]) > VALUE_TOLERANCE):
+            problems.append(f"category '{category}': stored {stored_row}, live {live_row}")
+
+    return problems
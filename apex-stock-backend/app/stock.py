@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from app.models import db, Item
+from app.stats import record_item_change
+from app.realtime import publish_item_change
+from app.reorder import record_reorder_change
+
+# Largest number of items one batch adjustment may touch
+MAX_BATCH_ADJUSTMENTS = 500
+
+
+class StockAdjustmentError(ValueError):
+    """An adjustment that could not be applied to one item"""
+
+    status_code = 409
+
+    def __init__(self, item_id, message, quantity=None):
+        super().__init__(message)
+        self.item_id = item_id
+        self.quantity = quantity
+
+    def to_dict(self):
+        data = {'id': self.item_id, 'error': str(self)}
+        if self.quantity is not None:
+            data['quantity'] = self.quantity
+        return data
+
+
+class ItemNotFound(StockAdjustmentError):
+    status_code = 404
+
+    def __init__(self, item_id):
+        super().__init__(item_id, 'Item not found')
+
+
+class InsufficientStock(StockAdjustmentError):
+    def __init__(self, item_id, quantity):
+        super().__init__(item_id, f'Insufficient stock: only {quantity} available', quantity)
+
+
+def parse_delta(value):
+    """A non-zero whole number, or None if the value is not one"""
+    if isinstance(value, bool) or not isinstance(value, int) or value == 0:
+        return None
+    return value
+
+
+def adjust_quantity(item_id, delta, allow_negative=False):
+    """
+    Add `delta` to an item's quantity with a single relative UPDATE in the
+    caller's session, so concurrent adjustments never overwrite each other.
+    Unless allow_negative, a decrease that would take the quantity below zero
+    is refused by the UPDATE's own WHERE clause.
+
+    Returns the updated (id, quantity, reorder_level, version) row or raises
+    a StockAdjustmentError. The caller commits.
+    """
+    statement = db.update(Item).where(Item.id == item_id)
+    if delta < 0 and not allow_negative:
+        statement = statement.where(Item.quantity + delta >= 0)
+
+    row = db.session.execute(
+        statement
+        .values(quantity=Item.quantity + delta, version=Item.version + 1, updated_at=datetime.utcnow())
+        .returning(Item.id, Item.category, Item.quantity, Item.price, Item.reorder_level, Item.version)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    if row is None:
+        quantity = db.session.query(Item.quantity).filter(Item.id == item_id).scalar()
+        if quantity is None:
+            raise ItemNotFound(item_id)
+        raise InsufficientStock(item_id, quantity)
+
+    # Only the quantity changed, so the previous state follows from the delta
+    before = (row.category, row.quantity - delta, row.price, row.reorder_level)
+    after = (row.category, row.quantity, row.price, row.reorder_level)
+    record_item_change(before, after)
+    record_reorder_change(row.id, before, after)
+    publish_item_change(row.id, before, after)
+    return row
+
+
+def adjust_many(deltas, allow_negative=False):
+    """
+    Apply {item_id: delta} in ascending id order, so concurrent batches lock
+    rows in the same order and cannot deadlock each other.
+    Returns (rows, errors); the caller commits only if there are no errors.
+    """
+    rows, errors = [], []
+    for item_id in sorted(deltas):
+        try:
+            rows.append(adjust_quantity(item_id, deltas[item_id], allow_negative))
+        except StockAdjustmentError as e:
+            errors.append(e)
+    return rows, errors
+
+
+def stock_level(row):
+    return {
+        'id': row.id,
+        'quantity': row.quantity,
+        'is_low_stock': row.quantity <= row.reorder_level,
+        'version': row.version
+    }
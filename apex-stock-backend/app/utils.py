@@ -1,17 +1,16 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask import jsonify, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 from app.models import User, db
 
 def admin_required():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()  # Check if JWT token is valid
-            current_user_id = get_jwt_identity()  # Get user ID from token
-            user = User.query.get(current_user_id)
+            verify_jwt_in_request()  # Check if JWT token is valid (and not revoked, see app.auth)
             
-            if not user or user.role != 'admin':
+            # Role comes from the token; a role change revokes tokens carrying the old one
+            if get_jwt().get('role') != 'admin':
                 return jsonify({'error': 'Admin access required'}), 403
             
             return fn(*args, **kwargs)
@@ -20,17 +19,14 @@ def admin_required():
 
 
 def log_activity(user_id, action, resource_type, resource_id=None, details=None):
-    from app.models import ActivityLog
-    
-    log = ActivityLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        details=details
-    )
-    db.session.add(log)
-    db.session.commit()
+    """
+    Record an activity log entry for the current unit of work
+    Call it before db.session.commit(); ACTIVITY_LOG_MODE decides how the
+    entry is persisted (see app.activity_log.init_activity_log)
+    """
+    from app.activity_log import record
+
+    record(current_app, user_id, action, resource_type, resource_id, details)
 
 
 def validate_request_data(data, required_fields):
@@ -0,0 +1,85 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+from app.models import db, DataVersion
+
+
+def bump_version(*collections):
+    """
+    Increment the data version of each collection in the caller's session,
+    so the bump commits (or rolls back) together with the write itself
+    """
+    now = datetime.utcnow()
+    for collection in collections:
+        result = db.session.execute(
+            db.update(DataVersion)
+            .where(DataVersion.collection == collection)
+            .values(version=DataVersion.version + 1, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.add(DataVersion(collection=collection, version=1, updated_at=now))
+
+
+def get_versions(*collections):
+    """
+    Current {collection: (version, updated_at)}; collections never written are (0, None)
+    """
+    rows = DataVersion.query.filter(DataVersion.collection.in_(collections)).all()
+    versions = {collection: (0, None) for collection in collections}
+    versions.update({row.collection: (row.version, row.updated_at) for row in rows})
+    return versions
+
+
+def conditional(*collections):
+    """
+    Conditional GET for a read that depends only on `collections` and the URL.
+
+    The strong ETag is derived from the collections' data versions plus the
+    path and query string, and Last-Modified from the latest bump. A request
+    whose If-None-Match (or, without one, If-Modified-Since) still matches
+    gets an empty 304 after a single version lookup: the view never runs.
+    Place it below @jwt_required() so unauthenticated requests learn nothing.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            versions = get_versions(*collections)
+            etag = _etag(versions)
+            last_modified = max((updated_at for _, updated_at in versions.values() if updated_at), default=None)
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Cacheable per user, but always revalidated
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return decorator
+    return wrapper
+
+
+def _etag(versions):
+    key = '|'.join([request.path, request.query_string.decode('latin-1')]
+                   + [f'{collection}:{version}' for collection, (version, _) in sorted(versions.items())])
+    return hashlib.sha1(key.encode()).hexdigest()[:32]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    # HTTP dates have one second resolution, so If-Modified-Since is only a fallback
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
@@ -0,0 +1,127 @@
+"""
+Resume and self-throttling check for app.backfill
+
+Seeds a throwaway database and runs a backfill registered here that bumps
+items.version by one, then checks that:
+  - a run that fails part way keeps every batch committed before the
+    failure, and the next run resumes right after the last of them: every
+    row is changed exactly once
+  - a run stopped by max_seconds is left 'paused' and resumes the same way
+  - the batch size follows BACKFILL_BATCH_SECONDS: batches slowed down by
+    a per-row delay shrink, fast ones grow
+
+Usage: python benchmarks/backfill_check.py [--items 20000]
+"""
+import argparse
+import sys
+import time
+
+from common import make_app, seed
+from app.backfill import Backfill, register_backfill, run_backfill
+from app.models import db, Item
+
+
+@register_backfill
+class BumpItemVersions(Backfill):
+    name = 'check-bump-item-versions'
+    table = Item
+
+    # Set by the checks below
+    fail_at_batch = None
+    row_delay = 0.0
+    batch_sizes = []
+
+    def apply_batch(self, connection, first_key, last_key):
+        cls = type(self)
+        cls.batch_sizes.append(last_key - first_key + 1)  # Seeded ids have no gaps
+        if cls.fail_at_batch is not None and len(cls.batch_sizes) == cls.fail_at_batch:
+            raise RuntimeError('Simulated crash')
+        result = connection.execute(
+            db.update(Item.__table__)
+            .where(Item.id.between(first_key, last_key))
+            .values(version=Item.__table__.c.version + 1)
+        )
+        time.sleep(cls.row_delay * result.rowcount)
+        return result.rowcount
+
+
+def reset(fail_at_batch=None, row_delay=0.0):
+    BumpItemVersions.fail_at_batch = fail_at_batch
+    BumpItemVersions.row_delay = row_delay
+    BumpItemVersions.batch_sizes = []
+
+
+def versions():
+    """{version: row count} over all items"""
+    return dict(db.session.query(Item.version, db.func.count(Item.id)).group_by(Item.version).all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = make_app()
+    seed(app, suppliers=5, items=args.items)
+    name = BumpItemVersions.name
+    failures = []
+
+    def check(condition, message):
+        print(f"{'OK  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        total = db.session.query(db.func.count(Item.id)).scalar()
+
+        # A crash in the third batch: the first two stay committed
+        reset(fail_at_batch=3)
+        try:
+            run_backfill(app, name, batch_size=1000, duty_cycle=1)
+        except RuntimeError:
+            pass
+        progress = db.session.execute(db.text(
+            'SELECT status, last_key, rows_done FROM backfill_progress WHERE name = :name'), {'name': name}).one()
+        committed = sum(BumpItemVersions.batch_sizes[:2])
+        check(progress.status == 'failed', f"crashed run is marked failed (got '{progress.status}')")
+        check(progress.rows_done == committed and versions().get(2) == committed,
+              f'the {committed} rows of the committed batches are kept, the failed batch is rolled back')
+
+        reset()
+        result = run_backfill(app, name, batch_size=1000, duty_cycle=1)
+        check(result['status'] == 'done', f"resumed run finishes (got '{result['status']}')")
+        check(versions() == {2: total}, f'every one of {total} rows changed exactly once across both runs')
+
+        # Stopped by max_seconds, then resumed
+        reset(row_delay=0.00005)
+        paused = run_backfill(app, name, batch_size=500, duty_cycle=1, restart=True, max_seconds=0.2)
+        check(paused['status'] == 'paused' and 0 < paused['rows_done'] < total,
+              f"run over its time budget is paused part way ({paused['rows_done']} of {total} rows)")
+        reset()
+        result = run_backfill(app, name, batch_size=500, duty_cycle=1)
+        check(result['status'] == 'done' and versions() == {3: total},
+              'paused run resumes after its last batch and changes every row exactly once')
+
+        # Slow batches shrink towards BACKFILL_BATCH_SECONDS...
+        app.config['BACKFILL_BATCH_SECONDS'] = 0.05
+        reset(row_delay=0.0002)  # 1000 rows take 0.2s, four times the target
+        run_backfill(app, name, batch_size=1000, duty_cycle=1, restart=True, max_seconds=1.5)
+        sizes = BumpItemVersions.batch_sizes
+        check(sizes[-1] < sizes[0] and sizes[-1] * 0.0002 <= 0.05 * 1.5,
+              f"slow batches shrink to fit 0.05s: {' -> '.join(map(str, sizes[:6]))}")
+
+        # ...and fast ones grow, up to ten times the starting size
+        reset()
+        run_backfill(app, name, batch_size=100, duty_cycle=1, restart=True)
+        sizes = BumpItemVersions.batch_sizes
+        check(max(sizes) > sizes[0] and max(sizes) <= 1000,
+              f"fast batches grow: {' -> '.join(map(str, sizes[:6]))}")
+
+    if failures:
+        print(f'\n❌ {len(failures)} backfill checks failed')
+        sys.exit(1)
+    print('\n✅ Backfills resume after their last committed batch and adapt their batch size')
+
+
+if __name__ == '__main__':
+    main()
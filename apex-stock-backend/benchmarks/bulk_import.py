@@ -0,0 +1,74 @@
+"""
+Bulk import throughput against one-at-a-time item creation
+
+Creates a sample of items through POST /api/inventory, then uploads a whole
+catalog through POST /api/inventory/bulk in each format, and prints rows/s.
+
+Usage: python benchmarks/bulk_import.py [--rows 50000] [--single 500] [--chunk-size 1000]
+"""
+import argparse
+import csv
+import io
+import json
+import time
+
+from common import make_app, seed, auth_headers, CATEGORIES, PRODUCTS
+
+
+def catalog(rows, start):
+    return [
+        {'name': f'{PRODUCTS[n % len(PRODUCTS)]} {n:07d}', 'category': CATEGORIES[n % len(CATEGORIES)],
+         'quantity': 1 + n % 200, 'price': round(1 + (n % 1000) * 0.37, 2), 'reorder_level': 5, 'supplier_id': 1}
+        for n in range(start, start + rows)
+    ]
+
+
+def encode(rows, fmt):
+    if fmt == 'json':
+        return json.dumps(rows), 'application/json'
+    if fmt == 'jsonl':
+        return '\n'.join(json.dumps(row) for row in rows), 'application/x-ndjson'
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue(), 'text/csv'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='rows per bulk upload')
+    parser.add_argument('--single', type=int, default=500, help='items created one request at a time')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config['BULK_IMPORT_CHUNK_SIZE'] = args.chunk_size
+    seed(app, suppliers=5, items=0)
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    print(f"{'method':<16} {'rows':>8}  {'seconds':>8}  {'rows/s':>9}")
+
+    started = time.perf_counter()
+    for row in catalog(args.single, 0):
+        response = client.post('/api/inventory/', json=row, headers=headers)
+        assert response.status_code == 201, response.get_json()
+    elapsed = time.perf_counter() - started
+    print(f"{'single POST':<16} {args.single:>8}  {elapsed:>8.2f}  {args.single / elapsed:>9.0f}")
+
+    start = args.single
+    for fmt in ('csv', 'jsonl', 'json'):
+        body, content_type = encode(catalog(args.rows, start), fmt)
+        start += args.rows
+
+        started = time.perf_counter()
+        response = client.post('/api/inventory/bulk', data=body, content_type=content_type, headers=headers)
+        elapsed = time.perf_counter() - started
+        summary = response.get_json()
+        assert summary['created'] == args.rows, summary
+        print(f"{'bulk ' + fmt:<16} {args.rows:>8}  {elapsed:>8.2f}  {args.rows / elapsed:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Shared helpers for the scripts in this directory
+
+Every script builds its own app against a throwaway SQLite database
+(or BENCH_DATABASE_URL), so apex_stock.db is never touched. The throwaway
+file is removed when the script exits unless BENCH_KEEP_DB=1 is set.
+"""
+import atexit
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.config import config, engine_options
+from app.models import db, User, Supplier, Item, ActivityLog
+from app.stats import rebuild_stats
+from app.versions import bump_version
+from app.search import rebuild_search_index
+from app.reorder import rebuild_reorder_queue
+
+CATEGORIES = ['Electronics', 'Furniture', 'Supplies', 'Tools', 'Kitchen', 'Garden', 'Toys', 'Books']
+PRODUCTS = ['Laptop', 'Monitor', 'Keyboard', 'Desk Lamp', 'Office Chair', 'Stapler', 'Drill',
+            'Kettle', 'Hose', 'Puzzle', 'Notebook', 'Cable', 'Printer Paper', 'Toolbox', 'Blender']
+
+
+def _remove_database(path):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def make_app(database_url=None, config_name='development', overrides=None):
+    """
+    Create an app bound to a fresh database with an admin user
+    overrides are extra settings for this app only; the shared config classes
+    are left untouched
+    """
+    if database_url is None:
+        database_url = os.getenv('BENCH_DATABASE_URL')
+    if database_url is None:
+        fd, path = tempfile.mkstemp(prefix='apex_bench_', suffix='.db')
+        os.close(fd)
+        database_url = f'sqlite:///{path}'
+        if os.getenv('BENCH_KEEP_DB', '').lower() not in ('1', 'true'):
+            atexit.register(_remove_database, path)
+
+    settings = config[config_name]
+    app = create_app(config_name, {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(
+            database_url, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW,
+            settings.DB_POOL_TIMEOUT, settings.DB_POOL_RECYCLE, settings.DB_POOL_PRE_PING
+        ),
+        **(overrides or {})
+    })
+
+    with app.app_context():
+        db.create_all()
+        if not User.query.filter_by(username='admin').first():
+            admin = User(username='admin', email='admin@bench.local', role='admin')
+            admin.set_password('admin123')
+            db.session.add(admin)
+            db.session.commit()
+
+    return app
+
+
+def seed(app, suppliers=10, items=100, low_stock_ratio=0.1, logs=0):
+    """Bulk insert synthetic suppliers, items and activity logs (spread over the last year)"""
+    with app.app_context():
+        start = db.session.query(db.func.count(Supplier.id)).scalar()
+        if suppliers:
+            db.session.execute(insert(Supplier), [
+                {'name': f'Supplier {start + i}', 'contact_person': f'Contact {start + i}',
+                 'email': f'supplier{start + i}@bench.local', 'phone': '555-0000',
+                 'address': f'{start + i} Bench Street'}
+                for i in range(suppliers)
+            ])
+        supplier_ids = [row[0] for row in db.session.query(Supplier.id).all()]
+
+        low_every = int(1 / low_stock_ratio) if low_stock_ratio else 0
+        offset = db.session.query(db.func.count(Item.id)).scalar()
+        batch = []
+        for i in range(items):
+            n = offset + i
+            low = low_every and n % low_every == 0
+            batch.append({
+                'name': f'{PRODUCTS[n % len(PRODUCTS)]} {n:07d}',
+                'category': CATEGORIES[n % len(CATEGORIES)],
+                'quantity': 2 if low else 10 + n % 500,
+                'price': round(1 + (n % 1000) * 0.37, 2),
+                'reorder_level': 5,
+                'supplier_id': supplier_ids[n % len(supplier_ids)]
+            })
+            if len(batch) == 5000:
+                db.session.execute(insert(Item), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(Item), batch)
+        if logs:
+            _seed_activity_logs(logs)
+        bump_version('items', 'suppliers')
+        db.session.commit()
+        rebuild_stats()
+        rebuild_search_index()
+        rebuild_reorder_queue()
+
+
+def _seed_activity_logs(count):
+    user_ids = [row[0] for row in db.session.query(User.id).all()] + [None]
+    item_count = db.session.query(db.func.max(Item.id)).scalar() or 1
+    actions = ['created', 'updated', 'adjusted', 'adjusted', 'adjusted', 'deleted', 'logged_in', 'generated']
+    now = datetime.utcnow()
+    step = timedelta(days=365) / count
+    batch = []
+    for n in range(count):
+        action = actions[n % len(actions)]
+        resource_type = {'logged_in': 'user', 'generated': 'report'}.get(action, 'item')
+        batch.append({
+            'user_id': user_ids[n % len(user_ids)],
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': n % item_count + 1 if resource_type == 'item' else None,
+            'details': f'Synthetic {action} {resource_type} #{n}',
+            'timestamp': now - step * (count - n)
+        })
+        if len(batch) == 5000:
+            db.session.execute(insert(ActivityLog), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(ActivityLog), batch)
+
+
+def auth_headers(client, username='admin', password='admin123'):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+@contextmanager
+def count_queries(app):
+    """Count SQL statements executed inside the block: `with count_queries(app) as counter:`"""
+    counter = {'count': 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter['count'] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
@@ -0,0 +1,95 @@
+"""
+Concurrent reads and writes against the database, per SQLite journal mode
+
+Reader threads page through GET /api/inventory/ while writer threads post
+stock adjustments, for a few seconds per journal mode. Prints throughput,
+p50/p99 latency and failed requests for each side. With the rollback
+journal (DELETE) every write blocks all readers; in WAL mode they overlap.
+Set BENCH_DATABASE_URL to run once against another database instead.
+
+Usage: python benchmarks/db_concurrency.py [--modes DELETE,WAL] [--readers 4]
+                                           [--writers 2] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from common import make_app, seed, auth_headers
+from app.models import db, Item
+
+
+def run(app, headers, item_ids, readers, writers, seconds):
+    deadline = time.monotonic() + seconds
+    results = {'read': ([], Counter()), 'write': ([], Counter())}
+    lock = threading.Lock()
+
+    def loop(kind, n):
+        client = app.test_client()
+        rng = random.Random(n)
+        timings, statuses = [], Counter()
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            if kind == 'read':
+                response = client.get('/api/inventory/', headers=headers,
+                                      query_string={'limit': 50, 'sort': rng.choice(['name', '-quantity', 'price'])})
+            else:
+                response = client.post(f'/api/inventory/{rng.choice(item_ids)}/adjust', headers=headers,
+                                       json={'delta': rng.choice([-1, 1, 2])})
+            timings.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+        with lock:
+            results[kind][0].extend(timings)
+            results[kind][1].update(statuses)
+
+    threads = [threading.Thread(target=loop, args=('read', n)) for n in range(readers)]
+    threads += [threading.Thread(target=loop, args=('write', 100 + n)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def report(label, results, seconds):
+    for kind, (timings, statuses) in results.items():
+        if not timings:
+            continue
+        timings.sort()
+        ok = statuses[200] + statuses[409]  # 409: adjustment refused for lack of stock, still served
+        failed = sum(statuses.values()) - ok
+        p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+        print(f"{label:<10} {kind:<6} {ok / seconds:>8.1f}/s  p50 {statistics.median(timings):>7.1f}ms  "
+              f"p99 {p99:>7.1f}ms  failed {failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default='DELETE,WAL', help='SQLite journal modes to compare')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--items', type=int, default=2000)
+    args = parser.parse_args()
+
+    server_database = os.getenv('BENCH_DATABASE_URL')
+    modes = [None] if server_database else args.modes.split(',')
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per run")
+
+    for mode in modes:
+        app = make_app(overrides={'SQLITE_JOURNAL_MODE': mode} if mode else None)
+        seed(app, suppliers=20, items=args.items)
+        with app.app_context():
+            item_ids = [item_id for (item_id,) in db.session.query(Item.id)]
+            label = mode or db.engine.dialect.name
+        headers = auth_headers(app.test_client())
+        report(label, run(app, headers, item_ids, args.readers, args.writers, args.seconds), args.seconds)
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+HTTP load test of the production server: req/s as the worker count grows
+
+Seeds a database, then for each worker count starts gunicorn with
+gunicorn.conf.py (GUNICORN_WORKER_CLASS / WEB_CONCURRENCY set per run),
+drives the read endpoints from several client processes over keep-alive
+connections and stops it with SIGTERM (graceful shutdown). Prints req/s,
+p50/p99 latency, errors and the speedup over the first run.
+With --url, drives an already running server once instead.
+
+Usage: python benchmarks/load_test.py [--workers 1,2,4] [--worker-class sync]
+                                      [--threads 4] [--clients 8] [--seconds 10]
+       python benchmarks/load_test.py --url http://localhost:5000
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from common import make_app, seed
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = [
+    '/api/inventory/?limit=50',
+    '/api/inventory/?limit=50&sort=-quantity',
+    '/api/inventory/stats',
+    '/api/inventory/low-stock',
+    '/api/suppliers/',
+]
+
+
+def request(connection, method, path, body=None, headers=None):
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def client(base_url, token, seconds, offset, paths=PATHS):
+    """One client process: cycle through `paths` on a keep-alive connection"""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    headers = {'Authorization': f'Bearer {token}'}
+    timings, errors, n = [], 0, offset
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            status, _ = request(connection, 'GET', paths[n % len(paths)], headers=headers)
+        except (OSError, http.client.HTTPException):
+            status = None
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        timings.append((time.perf_counter() - started) * 1000)
+        errors += status is None or status >= 400
+        n += 1
+    connection.close()
+    return timings, errors
+
+
+def login(base_url):
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    status, body = request(connection, 'POST', '/api/auth/login',
+                           body=json.dumps({'username': 'admin', 'password': 'admin123'}),
+                           headers={'Content-Type': 'application/json'})
+    if status != 200:
+        raise SystemExit(f'Login failed with {status}: {body[:200]}')
+    return json.loads(body)['access_token']
+
+
+def drive(base_url, clients, seconds, paths=PATHS, token=None):
+    token = token or login(base_url)
+    with ProcessPoolExecutor(clients) as pool:
+        results = list(pool.map(client, [base_url] * clients, [token] * clients,
+                                [seconds] * clients, range(clients), [paths] * clients))
+    timings = sorted(t for result, _ in results for t in result)
+    errors = sum(e for _, e in results)
+    return {
+        'requests': len(timings),
+        'rps': (len(timings) - errors) / seconds,
+        'p50': statistics.median(timings),
+        'p95': timings[max(int(len(timings) * 0.95) - 1, 0)],
+        'p99': timings[max(int(len(timings) * 0.99) - 1, 0)],
+        'errors': errors
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url, workers, worker_class, threads):
+    port = free_port()
+    env = {
+        **os.environ,
+        'DATABASE_URL': database_url,
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_WORKER_CLASS': worker_class,
+        'GUNICORN_THREADS': str(threads),
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_LOG_LEVEL': 'warning',
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '', 'wsgi:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'gunicorn exited with {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            if request(connection, 'GET', '/api/health')[0] == 200:
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit('gunicorn did not become ready within 60s')
+
+
+def stop_server(process, timeout=35):
+    started = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        return None
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts')
+    parser.add_argument('--worker-class', default='sync', choices=['sync', 'gthread', 'eventlet'])
+    parser.add_argument('--threads', type=int, default=4, help='threads per gthread worker')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client processes')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--url', help='drive this running server instead of starting gunicorn')
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.seconds:g}s per run, {os.cpu_count()} CPUs")
+    if args.url:
+        result = drive(args.url.rstrip('/'), args.clients, args.seconds)
+        print(f"{result['rps']:.1f} req/s  p50 {result['p50']:.1f}ms  p99 {result['p99']:.1f}ms  "
+              f"errors {result['errors']}")
+        return
+
+    app = make_app()
+    seed(app, suppliers=20, items=args.items)
+    database_url = app.config['SQLALCHEMY_DATABASE_URI']
+
+    print(f"{'workers':>7} {'class':<9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} "
+          f"{'speedup':>8} {'shutdown':>9}")
+    baseline = None
+    for workers in (int(n) for n in args.workers.split(',')):
+        process, base_url = start_server(database_url, workers, args.worker_class, args.threads)
+        try:
+            result = drive(base_url, args.clients, args.seconds)
+        finally:
+            shutdown = stop_server(process)
+        baseline = baseline or result['rps']
+        print(f"{workers:>7} {args.worker_class:<9} {result['rps']:>8.1f} {result['p50']:>8.1f} "
+              f"{result['p99']:>8.1f} {result['errors']:>7} {result['rps'] / baseline:>7.2f}x "
+              f"{f'{shutdown:.1f}s' if shutdown is not None else 'killed':>9}")
+
+
+if __name__ == '__main__':
+    main()
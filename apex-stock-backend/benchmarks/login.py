@@ -0,0 +1,88 @@
+"""
+Login throughput per hashing method, and what a login storm does to the API
+
+For each method, threads log in as fast as they can for a few seconds
+while another thread times GET /api/inventory/. Prints logins/s (total and
+per hashing core, i.e. per min(workers, cores)), refused logins (503) and
+the inventory p50/p99 during the storm.
+
+Usage: python benchmarks/login.py [--methods pbkdf2:sha256:600000,scrypt:32768:8:1]
+                                  [--threads 8] [--seconds 5] [--workers 2]
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from collections import Counter
+
+from common import make_app, seed, auth_headers
+from app.passwords import PasswordHasher
+
+
+def storm(app, seconds, threads):
+    outcomes = Counter()
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def login():
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+            with lock:
+                outcomes[response.status_code] += 1
+
+    pool = [threading.Thread(target=login) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    return pool, outcomes
+
+
+def inventory_latency(app, headers, seconds):
+    client = app.test_client()
+    timings = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        client.get('/api/inventory/', headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[max(int(len(timings) * 0.99) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--methods', default='pbkdf2:sha256:600000,scrypt:32768:8:1')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent login clients')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=2, help='PASSWORD_HASH_WORKERS')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    hashing_cores = min(args.workers, cores)  # Hashing never runs on more threads than the pool has
+    app = make_app()
+    seed(app, suppliers=5, items=200)
+    headers = auth_headers(app.test_client())
+
+    p50, p99 = inventory_latency(app, headers, 1)
+    print(f"inventory without logins: p50 {p50:.1f}ms, p99 {p99:.1f}ms ({cores} cores, hashing on {hashing_cores})")
+    print(f"{'method':<26} {'logins/s':>9} {'per core':>9} {'503s':>6}  {'inventory p50/p99 ms':>21}")
+
+    for method in args.methods.split(','):
+        app.extensions['password_hasher'] = PasswordHasher(
+            method, workers=args.workers, queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE']
+        )
+        # First login rehashes the stored password with this method
+        app.test_client().post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+
+        pool, outcomes = storm(app, args.seconds, args.threads)
+        p50, p99 = inventory_latency(app, headers, args.seconds)
+        for thread in pool:
+            thread.join()
+
+        rate = outcomes[200] / args.seconds
+        print(f"{method:<26} {rate:>9.1f} {rate / hashing_cores:>9.1f} {outcomes[503]:>6}  {p50:>10.1f} / {p99:<8.1f}")
+
+
+if __name__ == '__main__':
+    main()
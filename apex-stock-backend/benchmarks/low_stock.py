@@ -0,0 +1,57 @@
+"""
+Low-stock reads as the catalog grows
+
+Seeds catalogs of increasing size with the same number of low items and
+times GET /api/inventory/low-stock and GET /api/inventory/reorder-queue.
+Both should stay flat: the first walks the partial index on the
+is_low_stock column, the second reads the reorder_queue table. Prints the
+query plan of the low-stock query for the last catalog.
+
+Usage: python benchmarks/low_stock.py [--sizes 10000,100000] [--low 100] [--repeat 50]
+"""
+import argparse
+import statistics
+import time
+
+from common import make_app, seed, auth_headers
+from app.models import db, Item
+
+
+def timed(client, url, headers, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000', help='catalog sizes, comma separated')
+    parser.add_argument('--low', type=int, default=100, help='low-stock items in every catalog')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'low':>5} {'low-stock p50 ms':>17} {'reorder-queue p50 ms':>21}")
+    for size in (int(size) for size in args.sizes.split(',')):
+        app = make_app()
+        seed(app, suppliers=20, items=size, low_stock_ratio=args.low / size)
+        client = app.test_client()
+        headers = auth_headers(client)
+        low_stock = timed(client, '/api/inventory/low-stock', headers, args.repeat)
+        queue = timed(client, '/api/inventory/reorder-queue', headers, args.repeat)
+        with app.app_context():
+            low = db.session.query(db.func.count(Item.id)).filter(Item.is_low_stock == db.true()).scalar()
+        print(f"{size:>8} {low:>5} {low_stock:>17.2f} {queue:>21.2f}")
+
+    with app.app_context():
+        query = db.select(Item.id).where(Item.is_low_stock == db.true())
+        sql = str(query.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')):
+            print(f"plan: {row[-1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Inventory PDF rendering: wall time against row count
+
+Renders the inventory report sequentially and with a process pool at each
+catalog size and prints one line per run.
+
+Usage: python benchmarks/pdf_render.py [--sizes 1000,10000,100000] [--workers 4]
+"""
+import argparse
+import io
+import os
+import time
+
+from common import make_app, seed
+from app.reports import render_inventory_pdf, PdfWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma separated item counts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='pool size for the parallel run')
+    parser.add_argument('--segment-rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    modes = [('sequential', 0)]
+    if PdfWriter is not None:
+        modes.append((f'{args.workers} workers', args.workers))
+    else:
+        print('pypdf is not installed - only the sequential renderer is measured')
+
+    app = make_app()
+    seeded = 0
+
+    # Start the pool processes up front - a server keeps them warm between reports
+    with app.app_context():
+        for _, workers in modes:
+            render_inventory_pdf(io.BytesIO(), workers=workers, segment_rows=args.segment_rows)
+
+    print(f"{'items':>8}  {'mode':<12} {'seconds':>8}  {'pages/s':>8}  {'size':>10}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        seed(app, suppliers=0 if seeded else 50, items=size - seeded)
+        seeded = size
+
+        for label, workers in modes:
+            buffer = io.BytesIO()
+            with app.app_context():
+                started = time.perf_counter()
+                render_inventory_pdf(buffer, workers=workers, segment_rows=args.segment_rows)
+                elapsed = time.perf_counter() - started
+            pages = buffer.getvalue().count(b'/Type /Page\n') or buffer.getvalue().count(b'/Type /Page')
+            print(f"{size:>8}  {label:<12} {elapsed:>8.2f}  {pages / elapsed:>8.1f}  "
+                  f"{len(buffer.getvalue()) / 1024:>8.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Query-count regression check for the list endpoints
+
+Seeds a small catalog, counts the SQL statements each endpoint issues,
+grows the catalog tenfold and counts again. Any endpoint whose count
+grows with the number of rows has an N+1 and fails the check.
+
+Usage: python benchmarks/query_counts.py
+"""
+import sys
+
+from common import make_app, seed, auth_headers, count_queries
+from app.models import db, Supplier
+
+ENDPOINTS = [
+    '/api/inventory/',
+    '/api/inventory/low-stock',
+    '/api/suppliers/',
+    '/api/suppliers/{supplier_id}/items',
+    '/api/reports/activity-logs'
+]
+
+
+def measure(app, client, headers):
+    with app.app_context():
+        supplier_id = db.session.query(db.func.min(Supplier.id)).scalar()
+
+    counts = {}
+    for endpoint in ENDPOINTS:
+        url = endpoint.format(supplier_id=supplier_id)
+        with count_queries(app) as counter:
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200, f'{url} returned {response.status_code}'
+        counts[endpoint] = counter['count']
+    return counts
+
+
+def main():
+    app = make_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    seed(app, suppliers=5, items=50)
+    small = measure(app, client, headers)
+
+    seed(app, suppliers=45, items=450)
+    large = measure(app, client, headers)
+
+    failed = False
+    for endpoint in ENDPOINTS:
+        ok = small[endpoint] == large[endpoint]
+        failed = failed or not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {endpoint}: {small[endpoint]} queries at 50 items, "
+              f"{large[endpoint]} at 500 items")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
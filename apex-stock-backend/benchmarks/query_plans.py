@@ -0,0 +1,181 @@
+"""
+Query-plan regression check for every endpoint
+
+Seeds a large throwaway database, calls each endpoint of the benchmark
+suite once through the test client while recording the SQL it issues,
+then EXPLAINs every distinct statement (EXPLAIN QUERY PLAN on SQLite,
+EXPLAIN on PostgreSQL via BENCH_DATABASE_URL). A full table scan fails
+the check unless ALLOWED_SCANS lists it for that endpoint: exports and
+full listings read every row by design. A walk over a whole index counts
+as a full scan too, unless the statement has a LIMIT that stops it early
+(a paginated ORDER BY ... LIMIT) or the index is partial.
+
+Usage: python benchmarks/query_plans.py [--items 20000] [--suppliers 500] [--logs 50000]
+                                        [--users 2000] [--analyze] [--verbose]
+"""
+import argparse
+import re
+import sys
+from contextlib import contextmanager
+
+from sqlalchemy import event, insert
+
+from common import make_app, seed
+from suite import ENDPOINTS, prepare
+from app.models import db, User
+
+# (endpoint name regex, table) -> why a full scan of the table is expected there
+ALLOWED_SCANS = {
+    (r'^reports\.inventory_(csv|pdf)$', 'items'): 'exports every item',
+    (r'^reports\.suppliers_csv$', 'suppliers'): 'exports every supplier',
+    (r'^suppliers\.list$', 'suppliers'): 'lists every supplier',
+    (r'^(suppliers\.list|reports\.suppliers_csv)$', 'items'): 'item count of every supplier, from ix_items_supplier_id',
+    (r'^users\.list$', 'users'): 'lists every user',
+    (r'^users\.stats$', 'users'): 'counts users by role, from ix_users_role',
+    (r'^inventory\.reorder_queue$', 'reorder_queue'): 'lists the whole queue',
+    (r'^inventory\.list_sorted$', 'items'): 'sort by quantity: an index on it would cost every stock adjustment',
+    (r'.*', 'category_stats'): 'one row per category',
+    (r'.*', 'inventory_stats'): 'a single row',
+    (r'.*', 'data_versions'): 'one row per collection',
+}
+
+# SQLite: 'SCAN items' is a table scan; so is 'SCAN items USING [COVERING] INDEX ...'
+# unless the statement has a LIMIT that stops the walk early or the index is
+# partial (it only holds the rows the query wants)
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+SQLITE_INDEX_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)? USING (?:COVERING )?INDEX (\w+)$')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+POSTGRES_INDEX_SCAN = re.compile(r'Index (?:Only )?Scan(?: Backward)? using (\w+) on (\w+)')
+LIMIT = re.compile(r'\bLIMIT\b', re.I)
+
+
+@contextmanager
+def record_statements(app):
+    """Collect (statement, parameters) of every single-row execute inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def partial_indexes():
+    """Names of the model indexes with a WHERE clause"""
+    return {
+        index.name
+        for table in db.metadata.tables.values() for index in table.indexes
+        if index.dialect_options['sqlite']['where'] is not None
+        or index.dialect_options['postgresql']['where'] is not None
+    }
+
+
+def explain(connection, statement, parameters, partial=frozenset()):
+    """Plan lines and the tables read in full, by table scan or by walking a whole index"""
+    limited = LIMIT.search(statement) is not None
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+        lines = [row[-1] for row in rows]
+        scanned = [match.group(1) for match in map(SQLITE_SCAN.match, lines) if match]
+        if not limited:
+            scanned += [match.group(1) for match in map(SQLITE_INDEX_SCAN.match, lines)
+                        if match and match.group(2) not in partial]
+    else:
+        lines = [row[0] for row in connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).all()]
+        scanned = [match.group(1) for line in lines for match in [POSTGRES_SCAN.search(line)] if match]
+        if not limited:
+            scanned += _postgres_unbounded_index_scans(lines, partial)
+    return lines, scanned
+
+
+def _postgres_unbounded_index_scans(lines, partial):
+    """Tables of index scan nodes with no Index Cond, i.e. that walk the whole index"""
+    tables = []
+    for number, line in enumerate(lines):
+        match = POSTGRES_INDEX_SCAN.search(line)
+        if not match or match.group(1) in partial:
+            continue
+        details = []
+        for detail in lines[number + 1:]:
+            if '->' in detail:
+                break
+            details.append(detail)
+        if not any('Index Cond' in detail for detail in details):
+            tables.append(match.group(2))
+    return tables
+
+
+def allowed(endpoint, table):
+    return any(table == allowed_table and re.search(pattern, endpoint)
+               for pattern, allowed_table in ALLOWED_SCANS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--suppliers', type=int, default=500)
+    parser.add_argument('--logs', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--analyze', action='store_true', help='Run ANALYZE first (always done on PostgreSQL)')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = parser.parse_args()
+
+    app = make_app()
+    seed(app, suppliers=args.suppliers, items=args.items, logs=args.logs)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'username': f'plan{n}', 'email': f'plan{n}@bench.local', 'password_hash': 'x',
+             'role': 'admin' if n % 50 == 0 else 'staff'}
+            for n in range(args.users)
+        ])
+        db.session.commit()
+        if args.analyze or db.engine.dialect.name != 'sqlite':
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+
+    client = app.test_client()
+    ctx = prepare(app, client, 1)
+    partial = partial_indexes()
+    failures = []
+    for endpoint in ENDPOINTS:
+        if endpoint.setup:
+            endpoint.setup(client, ctx)
+        with record_statements(app) as statements:
+            response = endpoint.call(client, ctx, 0)
+            response.get_data()
+            response.close()
+
+        seen = set()
+        with app.app_context(), db.engine.connect() as connection:
+            for statement, parameters in statements:
+                if statement in seen or not re.match(r'\s*(SELECT|UPDATE|DELETE|WITH)\b', statement, re.I):
+                    continue
+                seen.add(statement)
+                lines, scanned = explain(connection, statement, parameters, partial)
+                bad = [table for table in scanned if not allowed(endpoint.name, table)]
+                if bad or args.verbose:
+                    print(f"{'FAIL' if bad else 'ok  '} {endpoint.name}: {' '.join(statement.split())[:160]}")
+                    for line in lines:
+                        print(f'       {line}')
+                if bad:
+                    failures.append((endpoint.name, bad))
+        if not any(name == endpoint.name for name, _ in failures):
+            print(f'OK   {endpoint.name}: {len(seen)} statements')
+
+    if failures:
+        print(f'\n❌ {len(failures)} statements read a whole table:')
+        for name, tables in failures:
+            print(f"   {name}: {', '.join(tables)}")
+        sys.exit(1)
+    print('\n✅ No unexpected full table scans')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""
+Real-time push: event coalescing, idle subscribers and fan-out latency
+
+1. In process: a burst of stock adjustments is pushed to a Socket.IO test
+   client; prints writes per emitted event and the write latency with and
+   without the broadcaster.
+2. Over the network: starts the app on an eventlet server
+   (realtime_server.py), opens N raw
+   WebSocket subscribers on the /stock namespace from one thread, keeps them
+   idle (answering pings), then prints the server's RSS per subscriber and
+   how long one write takes to reach all of them.
+
+Usage: python benchmarks/realtime.py [--writes 500] [--subscribers 2000] [--idle 10]
+"""
+import argparse
+import base64
+import json
+import os
+import selectors
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import time
+import http.client
+
+from common import make_app, seed, auth_headers
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def coalescing(writes):
+    from app.realtime import socketio, NAMESPACE
+
+    app = make_app()
+    seed(app, suppliers=5, items=50)
+    client = app.test_client()
+    headers = auth_headers(client)
+    token = headers['Authorization'].split()[1]
+
+    def burst():
+        timings = []
+        for n in range(writes):
+            started = time.perf_counter()
+            client.post(f'/api/inventory/{n % 10 + 1}/adjust', headers=headers, json={'delta': 1})
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    baseline = burst()
+    subscriber = socketio.test_client(app, namespace=NAMESPACE, auth={'token': token}, flask_test_client=client)
+    subscriber.get_received(NAMESPACE)
+    started = time.perf_counter()
+    with_push = burst()
+    elapsed = time.perf_counter() - started
+    time.sleep(app.config['SOCKETIO_COALESCE_MS'] / 1000 * 3)
+    received = subscriber.get_received(NAMESPACE)
+    events = [packet for packet in received if packet['name'] == 'items']
+    deltas = sum(len(packet['args'][0]['items']) for packet in events)
+
+    print(f"{writes} adjustments in {elapsed:.2f}s -> {len(events)} 'items' events carrying {deltas} deltas "
+          f"({writes / max(len(events), 1):.0f} writes per event)")
+    print(f"adjust p50 without subscribers {baseline:.2f}ms, with push {with_push:.2f}ms")
+    return app
+
+
+class Subscriber:
+    """Minimal Engine.IO 4 WebSocket client: connects to /stock and answers pings"""
+
+    def __init__(self, host, port, token):
+        self.sock = socket.create_connection((host, port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall((
+            f"GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+            f"Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        self.token = token
+        self.buffer = b''
+        self.upgraded = False
+        self.connected = False
+        self.refused = False
+        self.items_at = None
+        self.sock.setblocking(False)
+
+    def on_readable(self):
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError('closed by server')
+        self.buffer += data
+        if not self.upgraded:
+            head, sep, rest = self.buffer.partition(b'\r\n\r\n')
+            if not sep:
+                return
+            if b' 101 ' not in head.split(b'\r\n')[0]:
+                raise ConnectionError(head.split(b'\r\n')[0].decode())
+            self.upgraded, self.buffer = True, rest
+        for message in self._frames():
+            self._handle(message)
+
+    def _frames(self):
+        while len(self.buffer) >= 2:
+            length, offset = self.buffer[1] & 0x7f, 2
+            if length == 126:
+                if len(self.buffer) < 4:
+                    return
+                length, offset = struct.unpack('!H', self.buffer[2:4])[0], 4
+            elif length == 127:
+                if len(self.buffer) < 10:
+                    return
+                length, offset = struct.unpack('!Q', self.buffer[2:10])[0], 10
+            if len(self.buffer) < offset + length:
+                return
+            opcode = self.buffer[0] & 0x0f
+            payload, self.buffer = self.buffer[offset:offset + length], self.buffer[offset + length:]
+            if opcode == 1:
+                yield payload.decode()
+
+    def _handle(self, message):
+        if message.startswith('0'):
+            self.send('40/stock,' + json.dumps({'token': self.token}))
+        elif message == '2':
+            self.send('3')
+        elif message.startswith('40/stock'):
+            self.connected = True
+        elif message.startswith('44/stock'):
+            self.refused = True
+        elif message.startswith('42/stock,["items"') and self.items_at is None:
+            self.items_at = time.perf_counter()
+
+    def send(self, text):
+        payload = text.encode()
+        mask = os.urandom(4)
+        header = bytes([0x81])
+        if len(payload) < 126:
+            header += bytes([0x80 | len(payload)])
+        else:
+            header += bytes([0x80 | 126]) + struct.pack('!H', len(payload))
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.sock.setblocking(True)
+        self.sock.sendall(header + mask + masked)
+        self.sock.setblocking(False)
+
+
+def rss_kib(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def pump(selector, seconds, until=None):
+    """Handle incoming frames for `seconds` (at least one pass), or until until() is true"""
+    deadline = time.monotonic() + seconds
+    while True:
+        for key, _ in selector.select(timeout=min(0.1, max(deadline - time.monotonic(), 0))):
+            try:
+                key.data.on_readable()
+            except (ConnectionError, OSError):
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+        if until is not None and until():
+            return True
+        if time.monotonic() >= deadline:
+            return until() if until is not None else True
+
+
+def subscribers(app, count, idle):
+    port = 5000 + os.getpid() % 1000 + 100
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'realtime_server.py'), str(port)],
+        env={**os.environ, 'DATABASE_URL': app.config['SQLALCHEMY_DATABASE_URI']},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+                connection.request('POST', '/api/auth/login', body=json.dumps({'username': 'admin', 'password': 'admin123'}),
+                                   headers={'Content-Type': 'application/json'})
+                token = json.loads(connection.getresponse().read())['access_token']
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise SystemExit('realtime server did not start')
+                time.sleep(0.3)
+
+        base_rss = rss_kib(server.pid)
+        selector = selectors.DefaultSelector()
+        clients = []
+        started = time.perf_counter()
+        for n in range(count):
+            client = Subscriber('127.0.0.1', port, token)
+            selector.register(client.sock, selectors.EVENT_READ, client)
+            clients.append(client)
+            # Let the handshakes complete in small batches rather than overflowing the listen backlog
+            if n % 50 == 49:
+                pump(selector, 5, until=lambda: all(c.connected or c.refused for c in clients))
+        pump(selector, 30, until=lambda: all(c.connected or c.refused for c in clients))
+        connected = sum(c.connected for c in clients)
+        print(f"{connected}/{count} subscribers connected in {time.perf_counter() - started:.1f}s")
+
+        pump(selector, idle)
+        rss = rss_kib(server.pid)
+        alive = sum(1 for key in selector.get_map().values() if key.data.connected)
+        print(f"after {idle:g}s idle: {alive} still connected, server RSS {rss / 1024:.0f} MiB "
+              f"({(rss - base_rss) / max(alive, 1):.1f} KiB per subscriber)")
+
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        sent = time.perf_counter()
+        connection.request('POST', '/api/inventory/1/adjust', body=json.dumps({'delta': 1}),
+                           headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'})
+        connection.getresponse().read()
+        pump(selector, 30, until=lambda: all(c.items_at for c in clients if c.connected))
+        arrivals = sorted((c.items_at - sent) * 1000 for c in clients if c.items_at)
+        if arrivals:
+            print(f"one write reached {len(arrivals)} subscribers: first {arrivals[0]:.0f}ms, "
+                  f"p50 {statistics.median(arrivals):.0f}ms, last {arrivals[-1]:.0f}ms")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writes', type=int, default=500, help='adjustments in the coalescing burst')
+    parser.add_argument('--subscribers', type=int, default=2000, help='idle WebSocket subscribers; 0 skips')
+    parser.add_argument('--idle', type=float, default=10, help='seconds to hold the subscribers idle')
+    args = parser.parse_args()
+
+    app = coalescing(args.writes)
+    if args.subscribers:
+        subscribers(app, args.subscribers, args.idle)
+
+
+if __name__ == '__main__':
+    main()
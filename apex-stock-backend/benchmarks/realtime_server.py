@@ -0,0 +1,21 @@
+"""
+Serve the app with Socket.IO on eventlet, for benchmarks/realtime.py
+
+Usage: python benchmarks/realtime_server.py PORT   (DATABASE_URL selects the database)
+"""
+import eventlet
+eventlet.monkey_patch()  # Before anything else imports socket or threading
+
+import os
+import sys
+
+os.environ['SOCKETIO_ASYNC_MODE'] = 'eventlet'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.realtime import socketio
+
+if __name__ == '__main__':
+    app = create_app('production')
+    # Each WebSocket holds a green thread; eventlet's default pool of 1024 would cap subscribers
+    socketio.run(app, host='127.0.0.1', port=int(sys.argv[1]), log_output=False, max_size=10000)
@@ -0,0 +1,69 @@
+"""
+Item search: request latency against catalog size, per backend
+
+Seeds the catalog, then sends a mix of prefix, full word, typo and
+multi-word queries to GET /api/inventory/search through the test client
+and prints p50/p99 per backend and size.
+
+Usage: python benchmarks/search.py [--sizes 10000,100000,500000] [--requests 200]
+"""
+import argparse
+import statistics
+import time
+
+from common import make_app, seed, auth_headers
+from app.search import get_search_index, rebuild_search_index, _fts5_ready
+
+QUERIES = ['lap', 'laptop', 'lapotp', 'office ch', 'kettel', 'electronics', 'supplier 7', 'desk lamp 00012']
+
+
+def measure(client, headers, count):
+    timings = []
+    for i in range(count):
+        query = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        response = client.get('/api/inventory/search', query_string={'q': query}, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_json()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000', help='comma separated item counts')
+    parser.add_argument('--requests', type=int, default=200, help='requests per backend and size')
+    parser.add_argument('--backends', default='fts5,trigram')
+    args = parser.parse_args()
+
+    app = make_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+    with app.app_context():
+        fts5 = _fts5_ready()
+    backends = [b for b in args.backends.split(',') if b != 'fts5' or fts5]
+    if len(backends) < len(args.backends.split(',')):
+        print('SQLite was built without FTS5 - only the trigram backend is measured')
+
+    seeded = 0
+    print(f"{'items':>8}  {'backend':<8} {'index s':>8}  {'p50 ms':>8}  {'p99 ms':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        seed(app, suppliers=0 if seeded else 50, items=size - seeded)
+        seeded = size
+
+        for backend in backends:
+            app.config['SEARCH_BACKEND'] = backend
+            app.extensions['search'] = None
+            with app.app_context():
+                started = time.perf_counter()
+                rebuild_search_index()
+                index_seconds = time.perf_counter() - started
+                assert get_search_index().name == backend
+
+            measure(client, headers, len(QUERIES))  # warm up caches
+            p50, p99 = measure(client, headers, args.requests)
+            print(f"{size:>8}  {backend:<8} {index_seconds:>8.2f}  {p50:>8.2f}  {p99:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
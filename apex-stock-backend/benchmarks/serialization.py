@@ -0,0 +1,85 @@
+"""
+JSON serialization and compression throughput for large item payloads
+
+Builds N dicts shaped like Item.to_dict() and times each JSON provider's
+response() on them (the work behind jsonify), then gzip/brotli on the
+result. Prints ms per payload, MB/s and compressed sizes.
+
+Usage: python benchmarks/serialization.py [--items 10000,100000] [--repeat 5]
+"""
+import argparse
+import gzip
+import time
+from datetime import datetime, timedelta
+
+from common import make_app, CATEGORIES, PRODUCTS
+from app.compression import brotli
+from app.json_provider import PROVIDERS, orjson
+
+
+def payload(count):
+    now = datetime(2025, 1, 1)
+    return [
+        {
+            'id': n,
+            'name': f'{PRODUCTS[n % len(PRODUCTS)]} {n:07d}',
+            'category': CATEGORIES[n % len(CATEGORIES)],
+            'quantity': n % 97,
+            'price': round(5 + (n % 500) * 1.37, 2),
+            'reorder_level': 5,
+            'supplier_id': n % 20 + 1,
+            'supplier_name': f'Supplier {n % 20 + 1}',
+            'is_low_stock': n % 97 <= 5,
+            'version': 1,
+            'created_at': (now + timedelta(minutes=n)).isoformat(),
+            'updated_at': (now + timedelta(minutes=n)).isoformat()
+        }
+        for n in range(count)
+    ]
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', default='10000,100000', help='comma separated payload sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    app = make_app()
+    app.debug = False  # Compact output, as in production
+    providers = {name: cls(app) for name, cls in PROVIDERS.items() if name != 'orjson' or orjson is not None}
+
+    for count in (int(n) for n in args.items.split(',')):
+        items = payload(count)
+        print(f"{count} items")
+
+        body = None
+        for name, provider in providers.items():
+            with app.app_context():
+                seconds, response = best_of(args.repeat, lambda: provider.response(items))
+            body = response.get_data()
+            print(f"  {name:<8} encode   {seconds * 1000:>8.1f}ms  {len(body) / seconds / 1e6:>7.1f} MB/s  "
+                  f"{len(body) / 1e6:.2f} MB")
+
+        codecs = [(f'gzip -{level}', lambda level=level: gzip.compress(body, compresslevel=level)) for level in (1, 6)]
+        if brotli is not None:
+            codecs += [(f'br q{quality}', lambda quality=quality: brotli.compress(body, quality=quality))
+                       for quality in (4, 11)]
+        for name, codec in codecs:
+            seconds, compressed = best_of(args.repeat, codec)
+            print(f"  {name:<8} compress {seconds * 1000:>8.1f}ms  {len(body) / seconds / 1e6:>7.1f} MB/s  "
+                  f"{len(compressed) / 1e6:.2f} MB ({len(compressed) / len(body):.0%})")
+        if brotli is None:
+            print("  (brotli not installed, skipped)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Cold-start budget check for the production entry point
+
+Imports wsgi (which builds the app) in fresh interpreters under
+`python -X importtime` and fails if:
+  - the import takes longer than the budget (best of --runs, so one slow
+    run on a busy machine does not fail the check)
+  - a module that only some requests need, such as reportlab, is imported at boot
+  - booting created tables: the schema is left to `flask init-db`
+
+The database is a throwaway empty SQLite file, so apex_stock.db is never touched.
+
+Usage: python benchmarks/startup_time.py [--budget-ms 1500] [--runs 3] [--top 15]
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use (or by the CLI) only; seeing one at boot means an eager import crept back in
+LAZY_MODULES = ['reportlab', 'pypdf', 'alembic']
+
+
+def import_times(database_url):
+    """One cold import of wsgi: {module: (self µs, cumulative µs)}"""
+    env = dict(os.environ, FLASK_ENV='production', DATABASE_URL=database_url, PYTHONDONTWRITEBYTECODE='1')
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f'❌ import wsgi failed:\n{result.stderr[-2000:]}')
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=1500, help='Most time import wsgi may take')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix='apex_startup_', suffix='.db')
+    os.close(fd)
+    try:
+        runs = [import_times(f'sqlite:///{path}') for _ in range(args.runs)]
+        with sqlite3.connect(path) as connection:
+            tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    finally:
+        os.remove(path)
+
+    best = min(runs, key=lambda times: times['wsgi'][1])
+    total_ms = best['wsgi'][1] / 1000
+    print(f'import wsgi: {total_ms:.0f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)')
+    print('Slowest imports (self time):')
+    for module, (self_us, cumulative_us) in sorted(best.items(), key=lambda entry: -entry[1][0])[:args.top]:
+        print(f'  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {module}')
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f'import wsgi took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget')
+    for name in LAZY_MODULES:
+        if name in best:
+            failures.append(f'{name} is imported at startup, it should only load on first use')
+    if tables:
+        failures.append(f"Booting created tables ({', '.join(sorted(tables))}); leave the schema to flask init-db")
+
+    for failure in failures:
+        print(f'❌ {failure}')
+    if not failures:
+        print('✅ Startup within budget')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Stock adjustment under concurrency: no lost updates, no negative stock
+
+Worker threads hammer POST /api/inventory/<id>/adjust and the batch
+endpoint on a few hot items, then the final quantities are checked against
+the sum of the accepted deltas, the stats aggregates against a live scan,
+and concurrent PUTs with the same version are checked to let exactly one win.
+Exits 1 on any inconsistency.
+
+Usage: python benchmarks/stock_adjust_stress.py [--threads 8] [--requests 200] [--items 5]
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from common import make_app, seed, auth_headers
+from app.models import db, Item
+from app.stats import check_stats, rebuild_stats
+
+START_QUANTITY = 50
+
+
+def worker(app, headers, item_ids, requests, seed_value, accepted, outcomes, lock):
+    client = app.test_client()
+    rng = random.Random(seed_value)
+    for _ in range(requests):
+        if rng.random() < 0.2:
+            picks = rng.sample(item_ids, 2)
+            deltas = {item_id: rng.choice([-3, -2, -1, 1, 2]) for item_id in picks}
+            response = client.post('/api/inventory/adjust', headers=headers, json={
+                'adjustments': [{'id': item_id, 'delta': delta} for item_id, delta in deltas.items()]
+            })
+        else:
+            item_id = rng.choice(item_ids)
+            deltas = {item_id: rng.choice([-5, -3, -1, 1, 2, 4])}
+            response = client.post(f'/api/inventory/{item_id}/adjust', headers=headers,
+                                   json={'delta': deltas[item_id]})
+
+        with lock:
+            outcomes[response.status_code] += 1
+            if response.status_code == 200:
+                for item_id, delta in deltas.items():
+                    accepted[item_id] += delta
+
+
+def check_versioned_updates(app, headers, item_id, threads):
+    """Concurrent full updates from the same read: exactly one may succeed"""
+    client = app.test_client()
+    version = client.get(f'/api/inventory/{item_id}', headers=headers).get_json()['version']
+    statuses = []
+    barrier = threading.Barrier(threads)
+
+    def put(n):
+        barrier.wait()
+        response = app.test_client().put(f'/api/inventory/{item_id}', headers=headers,
+                                         json={'price': 10 + n, 'version': version})
+        statuses.append(response.status_code)
+
+    pool = [threading.Thread(target=put, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per thread')
+    parser.add_argument('--items', type=int, default=5, help='hot items the threads compete for')
+    args = parser.parse_args()
+
+    app = make_app()
+    seed(app, suppliers=1, items=args.items, low_stock_ratio=0)
+    with app.app_context():
+        db.session.execute(db.update(Item).values(quantity=START_QUANTITY))
+        db.session.commit()
+        item_ids = [item_id for (item_id,) in db.session.query(Item.id).order_by(Item.id)]
+        rebuild_stats()
+    headers = auth_headers(app.test_client())
+
+    accepted = defaultdict(int)
+    outcomes = defaultdict(int)
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(app, headers, item_ids, args.requests, n, accepted, outcomes, lock))
+        for n in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = args.threads * args.requests
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.0f}/s): "
+          + ', '.join(f'{count}x {status}' for status, count in sorted(outcomes.items())))
+
+    failed = False
+    with app.app_context():
+        quantities = dict(db.session.query(Item.id, Item.quantity))
+        for item_id in item_ids:
+            expected = START_QUANTITY + accepted[item_id]
+            ok = quantities[item_id] == expected and quantities[item_id] >= 0
+            failed |= not ok
+            print(f"{'OK  ' if ok else 'FAIL'} item {item_id}: quantity {quantities[item_id]}, expected {expected}")
+        problems = check_stats()
+        failed |= bool(problems)
+        print(f"{'FAIL' if problems else 'OK  '} stats aggregates{': ' + '; '.join(problems) if problems else ''}")
+
+    unexpected = set(outcomes) - {200, 409}
+    failed |= bool(unexpected)
+    if unexpected:
+        print(f"FAIL unexpected status codes: {sorted(unexpected)}")
+
+    statuses = check_versioned_updates(app, headers, item_ids[0], args.threads)
+    ok = statuses.count(200) == 1 and statuses.count(409) == len(statuses) - 1
+    failed |= not ok
+    print(f"{'OK  ' if ok else 'FAIL'} versioned PUTs from one read: {sorted(statuses)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
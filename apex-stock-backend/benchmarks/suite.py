@@ -0,0 +1,497 @@
+"""
+Benchmark suite: every API endpoint at a configurable data scale, saved to JSON
+
+run      Seeds a throwaway database (--items, --suppliers, --logs), then
+         1. calls every endpoint of every blueprint through the Flask test
+            client: latency percentiles, throughput and SQL queries per request;
+         2. starts the server (gunicorn when installed, else run.py) and drives
+            each read endpoint over HTTP from --clients processes: req/s and
+            latency percentiles;
+         and writes both, with peak RSS of this process and of the server, to
+         --output. Heavy endpoints (password hashing, full reports) run
+         --heavy-repeat times only. --only/--skip take endpoint name regexes.
+compare  Prints every metric of two runs side by side and exits 1 if the
+         second regressed: latency or RSS up, or req/s down, by more than
+         --threshold (and by more than --min-ms for latencies), any increase
+         in queries per request, or new errors.
+
+Usage: python benchmarks/suite.py run [--items 10000] [--suppliers 500] [--logs 50000]
+                                      [--repeat 50] [--heavy-repeat 3] [--http-seconds 3]
+                                      [--clients 4] [--no-http] [--output results.json]
+       python benchmarks/suite.py compare base.json head.json [--threshold 0.15] [--min-ms 1]
+"""
+import argparse
+import csv
+import http.client
+import io
+import json
+import os
+import platform
+import re
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from common import BACKEND_DIR, make_app, seed, auth_headers, count_queries, CATEGORIES
+from load_test import drive, login, free_port, request, start_server, stop_server
+from app.models import db, User, Supplier, Item
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+class Endpoint:
+    """
+    One benchmarked call. `path` and `body` are format strings or callables
+    taking (ctx, n), n being the call number, so writes can target a fresh row each time.
+    """
+
+    def __init__(self, name, method, path, body=None, content_type=None, heavy=False, as_user='admin', setup=None,
+                 after=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.content_type = content_type
+        self.heavy = heavy
+        self.as_user = as_user
+        self.setup = setup  # Called with (client, ctx) before the endpoint's first call
+        self.after = after  # Called with (ctx, response) after every call
+
+    @property
+    def is_read(self):
+        return self.method == 'GET' and not self.heavy
+
+    def url(self, ctx, n):
+        return self.path(ctx, n) if callable(self.path) else self.path.format(**ctx)
+
+    def call(self, client, ctx, n):
+        kwargs = {'headers': ctx['headers'][self.as_user]}
+        body = self.body(ctx, n) if callable(self.body) else self.body
+        if isinstance(body, (bytes, str)):
+            kwargs['data'] = body
+            kwargs['content_type'] = self.content_type
+        elif body is not None:
+            kwargs['json'] = body
+        response = client.open(self.url(ctx, n), method=self.method, **kwargs)
+        if self.after:
+            self.after(ctx, response)
+        return response
+
+
+def _bulk_csv(ctx, n, rows=100):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['name', 'category', 'quantity', 'price', 'reorder_level', 'supplier_id'])
+    for row in range(rows):
+        writer.writerow([f"Bulk {ctx['tag']} {n}-{row}", CATEGORIES[row % len(CATEGORIES)],
+                         20 + row, 9.99, 5, ctx['supplier_id']])
+    return buffer.getvalue()
+
+
+def _use_new_token(ctx, response):
+    """Changing the password revokes the caller's token; carry on with the one it returns"""
+    if response.status_code == 200:
+        ctx['headers']['bench'] = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def _finished_job(client, ctx):
+    """Submit a low-stock PDF job for the current data and wait for it, so download does not get a 410"""
+    headers = ctx['headers']['admin']
+    job = client.post('/api/reports/jobs', json={'type': 'low-stock-pdf'}, headers=headers).get_json()
+    deadline = time.monotonic() + 120
+    while job['status'] not in ('done', 'failed') and time.monotonic() < deadline:
+        time.sleep(0.2)
+        job = client.get(f"/api/reports/jobs/{job['id']}", headers=headers).get_json()
+    ctx['job_id'] = job['id']
+
+
+ENDPOINTS = [
+    Endpoint('health', 'GET', '/api/health'),
+
+    Endpoint('auth.register', 'POST', '/api/auth/register', heavy=True, body=lambda ctx, n: {
+        'username': f"r{ctx['tag']}{n}", 'email': f"r{ctx['tag']}{n}@bench.local", 'password': 'bench-pass'}),
+    Endpoint('auth.login', 'POST', '/api/auth/login', heavy=True,
+             body={'username': 'admin', 'password': 'admin123'}),
+    Endpoint('auth.me', 'GET', '/api/auth/me'),
+    Endpoint('auth.change_password', 'POST', '/api/auth/change-password', heavy=True, as_user='bench',
+             body=lambda ctx, n: {'old_password': ('bench-a', 'bench-b')[n % 2],
+                                  'new_password': ('bench-b', 'bench-a')[n % 2]},
+             after=_use_new_token),
+
+    Endpoint('inventory.list', 'GET', '/api/inventory/?limit=50'),
+    Endpoint('inventory.list_sorted', 'GET', '/api/inventory/?limit=50&sort=-quantity'),
+    Endpoint('inventory.list_next_page', 'GET', '/api/inventory/?limit=50&cursor={cursor}'),
+    Endpoint('inventory.list_fields', 'GET', '/api/inventory/?limit=200&fields=id,name,quantity'),
+    Endpoint('inventory.list_category', 'GET', '/api/inventory/?limit=50&category=Tools'),
+    Endpoint('inventory.search', 'GET', '/api/inventory/search?q=drill&limit=20'),
+    Endpoint('inventory.search_typo', 'GET', '/api/inventory/search?q=kyeboard&limit=20'),
+    Endpoint('inventory.get', 'GET', '/api/inventory/{item_id}'),
+    Endpoint('inventory.create', 'POST', '/api/inventory/', body=lambda ctx, n: {
+        'name': f"Created {ctx['tag']} {n}", 'category': 'Tools', 'quantity': 10, 'price': 4.5,
+        'supplier_id': ctx['supplier_id']}),
+    Endpoint('inventory.update', 'PUT', lambda ctx, n: f"/api/inventory/{ctx['item_ids'][n % len(ctx['item_ids'])]}",
+             body=lambda ctx, n: {'price': round(5 + n * 0.01, 2)}),
+    Endpoint('inventory.delete', 'DELETE', lambda ctx, n: f"/api/inventory/{ctx['doomed_items'][n]}"),
+    Endpoint('inventory.adjust', 'POST', lambda ctx, n: f"/api/inventory/{ctx['item_ids'][n % len(ctx['item_ids'])]}/adjust",
+             body=lambda ctx, n: {'delta': 1 if n % 2 else -1}),
+    Endpoint('inventory.adjust_batch', 'POST', '/api/inventory/adjust', body=lambda ctx, n: {
+        'adjustments': [{'id': item_id, 'delta': 1 if n % 2 else -1} for item_id in ctx['item_ids'][:20]]}),
+    Endpoint('inventory.bulk', 'POST', '/api/inventory/bulk', body=_bulk_csv, content_type='text/csv'),
+    Endpoint('inventory.low_stock', 'GET', '/api/inventory/low-stock'),
+    Endpoint('inventory.reorder_queue', 'GET', '/api/inventory/reorder-queue'),
+    Endpoint('inventory.stats', 'GET', '/api/inventory/stats'),
+
+    Endpoint('suppliers.list', 'GET', '/api/suppliers/'),
+    Endpoint('suppliers.get', 'GET', '/api/suppliers/{supplier_id}'),
+    Endpoint('suppliers.items', 'GET', '/api/suppliers/{supplier_id}/items'),
+    Endpoint('suppliers.create', 'POST', '/api/suppliers/', body=lambda ctx, n: {
+        'name': f"Created Supplier {ctx['tag']} {n}", 'email': f"s{ctx['tag']}{n}@bench.local"}),
+    Endpoint('suppliers.update', 'POST', '/api/suppliers/{supplier_id}',
+             body=lambda ctx, n: {'phone': f'555-{n:04d}'}),
+    Endpoint('suppliers.delete', 'DELETE', lambda ctx, n: f"/api/suppliers/{ctx['doomed_suppliers'][n]}"),
+
+    Endpoint('reports.inventory_csv', 'GET', '/api/reports/inventory-csv', heavy=True),
+    Endpoint('reports.suppliers_csv', 'GET', '/api/reports/suppliers-csv', heavy=True),
+    Endpoint('reports.inventory_pdf', 'GET', '/api/reports/inventory-pdf', heavy=True),
+    Endpoint('reports.low_stock_pdf', 'GET', '/api/reports/low-stock-pdf', heavy=True),
+    Endpoint('reports.activity_logs', 'GET', '/api/reports/activity-logs?limit=50'),
+    Endpoint('reports.activity_logs_filtered', 'GET',
+             '/api/reports/activity-logs?limit=50&resource_type=item&resource_id={item_id}'),
+    Endpoint('reports.create_job', 'POST', '/api/reports/jobs', body={'type': 'low-stock-pdf'}),
+    Endpoint('reports.get_job', 'GET', '/api/reports/jobs/{job_id}', setup=_finished_job),
+    Endpoint('reports.download_job', 'GET', '/api/reports/jobs/{job_id}/download', setup=_finished_job),
+
+    Endpoint('users.list', 'GET', '/api/users/'),
+    Endpoint('users.get', 'GET', '/api/users/{user_id}'),
+    Endpoint('users.create', 'POST', '/api/users/', heavy=True, body=lambda ctx, n: {
+        'username': f"u{ctx['tag']}{n}", 'email': f"u{ctx['tag']}{n}@bench.local",
+        'password': 'bench-pass', 'role': 'staff'}),
+    Endpoint('users.update', 'PUT', '/api/users/{user_id}',
+             body=lambda ctx, n: {'email': f"bench{ctx['tag']}{n}@bench.local"}),
+    Endpoint('users.delete', 'DELETE', lambda ctx, n: f"/api/users/{ctx['doomed_users'][n]}"),
+    Endpoint('users.stats', 'GET', '/api/users/stats'),
+]
+
+
+def percentiles(timings):
+    ordered = sorted(timings)
+
+    def at(fraction):
+        return round(ordered[max(int(len(ordered) * fraction + 0.5) - 1, 0)], 3)
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p50_ms': round(statistics.median(ordered), 3),
+        'p90_ms': at(0.90),
+        'p95_ms': at(0.95),
+        'p99_ms': at(0.99),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def prepare(app, client, calls):
+    """Rows and ids the endpoints need; rows for the delete endpoints are created up front"""
+    tag = uuid.uuid4().hex[:6]
+    with app.app_context():
+        # Seeded items with room for -1 adjustments, spread over the id range
+        step = max(db.session.query(db.func.max(Item.id)).scalar() // 100, 1)
+        candidates = db.session.query(Item.id).filter(Item.quantity > 20).order_by(Item.id)
+        item_ids = [row[0] for row in candidates.filter(Item.id % step == step // 2).limit(50).all()] \
+            or [row[0] for row in candidates.limit(50).all()]
+        supplier_id = db.session.query(db.func.min(Item.supplier_id)).scalar()
+
+        bench = User(username=f'b{tag}', email=f'b{tag}@bench.local', role='staff')
+        bench.set_password('bench-a')
+        staff = User(username=f's{tag}', email=f's{tag}@bench.local', role='staff')
+        staff.set_password('bench-pass')
+        db.session.add_all([bench, staff])
+        db.session.flush()
+        doomed_users = db.session.execute(db.insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {'username': f'd{tag}{n}', 'email': f'd{tag}{n}@bench.local', 'password_hash': 'x', 'role': 'staff'}
+            for n in range(calls)
+        ]).scalars().all()
+        doomed_suppliers = db.session.execute(db.insert(Supplier).returning(Supplier.id, sort_by_parameter_order=True), [
+            {'name': f'Doomed {tag} {n}'} for n in range(calls)
+        ]).scalars().all()
+        doomed_items = db.session.execute(db.insert(Item).returning(Item.id, sort_by_parameter_order=True), [
+            {'name': f'Doomed {tag} {n}', 'category': 'Tools', 'quantity': 50, 'price': 1.0, 'reorder_level': 5}
+            for n in range(calls)
+        ]).scalars().all()
+        db.session.commit()
+        ctx = {
+            'tag': tag, 'item_ids': item_ids, 'item_id': item_ids[0], 'supplier_id': supplier_id,
+            'user_id': staff.id, 'doomed_users': doomed_users, 'doomed_suppliers': doomed_suppliers,
+            'doomed_items': doomed_items,
+        }
+
+    ctx['headers'] = {'admin': auth_headers(client), 'bench': auth_headers(client, f'b{tag}', 'bench-a')}
+    ctx['cursor'] = client.get('/api/inventory/?limit=50', headers=ctx['headers']['admin']).get_json()['next_cursor']
+    _finished_job(client, ctx)
+    return ctx
+
+
+def run_client(app, endpoints, repeat, heavy_repeat, warmup):
+    """Phase 1: every endpoint through the test client, one call at a time"""
+    client = app.test_client()
+    ctx = prepare(app, client, max(repeat, heavy_repeat) + warmup)
+    results = {}
+    for endpoint in endpoints:
+        calls = heavy_repeat if endpoint.heavy else repeat
+        if endpoint.setup:
+            endpoint.setup(client, ctx)
+        for n in range(warmup):
+            endpoint.call(client, ctx, n).close()
+
+        timings, queries, statuses = [], [], Counter()
+        for n in range(warmup, warmup + calls):
+            with count_queries(app) as counter:
+                started = time.perf_counter()
+                response = endpoint.call(client, ctx, n)
+                response.get_data()  # Streamed bodies (CSV) are produced here
+                timings.append((time.perf_counter() - started) * 1000)
+            response.close()
+            queries.append(counter['count'])
+            statuses[response.status_code] += 1
+
+        results[endpoint.name] = {
+            **percentiles(timings),
+            'throughput_rps': round(len(timings) / (sum(timings) / 1000), 2),
+            'queries_per_request': round(statistics.fmean(queries), 2),
+            'max_queries': max(queries),
+            'errors': sum(count for status, count in statuses.items() if status >= 400),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
+        print(f"  {endpoint.name:<34} p50 {results[endpoint.name]['p50_ms']:>9.2f}ms  "
+              f"p95 {results[endpoint.name]['p95_ms']:>9.2f}ms  "
+              f"{results[endpoint.name]['queries_per_request']:>6.1f} queries  "
+              f"{'errors ' + str(results[endpoint.name]['statuses']) if results[endpoint.name]['errors'] else ''}")
+    return results, ctx
+
+
+def start_dev_server(database_url):
+    """run.py under the production config, for hosts without gunicorn"""
+    port = free_port()
+    env = {**os.environ, 'DATABASE_URL': database_url, 'PORT': str(port), 'FLASK_ENV': 'production'}
+    process = subprocess.Popen([sys.executable, 'run.py'], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'run.py exited with {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            if request(connection, 'GET', '/api/health')[0] == 200:
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit('run.py did not become ready within 60s')
+
+
+def peak_rss_kib(pid):
+    """Peak RSS (VmHWM) of a process and all of its descendants, e.g. gunicorn workers"""
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                total += next((int(line.split()[1]) for line in status if line.startswith('VmHWM:')), 0)
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except OSError:
+            continue
+    return total
+
+
+def run_http(app, endpoints, ctx, clients, seconds, workers, worker_class, threads):
+    """Phase 2: each read endpoint over HTTP from `clients` processes"""
+    database_url = app.config['SQLALCHEMY_DATABASE_URI']
+    try:
+        import gunicorn  # noqa: F401
+        process, base_url = start_server(database_url, workers, worker_class, threads)
+        server = f'gunicorn {worker_class} x{workers}'
+    except ImportError:
+        process, base_url = start_dev_server(database_url)
+        server = 'run.py (gunicorn is not installed)'
+    print(f"HTTP: {server}, {clients} clients, {seconds:g}s per endpoint")
+
+    results = {}
+    try:
+        token = login(base_url)
+        for endpoint in endpoints:
+            if not endpoint.is_read:
+                continue
+            result = drive(base_url, clients, seconds, paths=[endpoint.url(ctx, 0)], token=token)
+            results[endpoint.name] = {
+                'requests': result['requests'],
+                'throughput_rps': round(result['rps'], 2),
+                'p50_ms': round(result['p50'], 3),
+                'p95_ms': round(result['p95'], 3),
+                'p99_ms': round(result['p99'], 3),
+                'errors': result['errors'],
+            }
+            print(f"  {endpoint.name:<34} {result['rps']:>9.1f} req/s  p50 {result['p50']:>8.2f}ms  "
+                  f"p99 {result['p99']:>8.2f}ms  {'errors ' + str(result['errors']) if result['errors'] else ''}")
+        server_rss = peak_rss_kib(process.pid)
+    finally:
+        stop_server(process)
+    return results, {'server': server, 'peak_rss_kib': server_rss}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def select_endpoints(only, skip):
+    return [endpoint for endpoint in ENDPOINTS
+            if (not only or re.search(only, endpoint.name)) and not (skip and re.search(skip, endpoint.name))]
+
+
+def run(args):
+    endpoints = select_endpoints(args.only, args.skip)
+    started = time.perf_counter()
+    app = make_app()
+    seed(app, suppliers=args.suppliers, items=args.items, low_stock_ratio=args.low_stock_ratio, logs=args.logs)
+    seed_seconds = time.perf_counter() - started
+    print(f"Seeded {args.items} items, {args.suppliers} suppliers, {args.logs} activity logs "
+          f"in {seed_seconds:.1f}s")
+
+    print(f"Test client: {args.repeat} calls per endpoint ({args.heavy_repeat} for heavy ones)")
+    client_results, ctx = run_client(app, endpoints, args.repeat, args.heavy_repeat, args.warmup)
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key != 'func'},
+        },
+        'scale': {'items': args.items, 'suppliers': args.suppliers, 'logs': args.logs,
+                  'seed_seconds': round(seed_seconds, 2)},
+        'client': client_results,
+        'peak_rss_kib': {'client': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+    }
+
+    if not args.no_http:
+        report['http'], server = run_http(app, endpoints, ctx, args.clients, args.http_seconds,
+                                          args.workers, args.worker_class, args.threads)
+        report['meta']['server'] = server['server']
+        report['peak_rss_kib']['server'] = server['peak_rss_kib']
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Peak RSS: {report['peak_rss_kib']}")
+    print(f"Wrote {output}")
+
+
+# (section, metric, higher is worse, latency) checked by compare
+COMPARED = [
+    ('client', 'p50_ms', True, True),
+    ('client', 'p95_ms', True, True),
+    ('client', 'queries_per_request', True, False),
+    ('client', 'errors', True, False),
+    ('http', 'throughput_rps', False, False),
+    ('http', 'p95_ms', True, True),
+    ('http', 'errors', True, False),
+]
+
+
+def regressed(metric, base, head, higher_is_worse, latency, threshold, min_ms):
+    if metric in ('queries_per_request', 'errors'):
+        return head > base
+    change = (head - base) if higher_is_worse else (base - head)
+    if latency and change <= min_ms:
+        return False
+    return base > 0 and change / base > threshold
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    if base.get('scale', {}).get('items') != head.get('scale', {}).get('items'):
+        print(f"warning: different scales ({base['scale']} vs {head['scale']}), numbers are not comparable")
+    print(f"base {base['meta'].get('git_revision')} ({base['meta']['created_at']})  "
+          f"head {head['meta'].get('git_revision')} ({head['meta']['created_at']})")
+    print(f"{'endpoint':<36} {'metric':<26} {'base':>10} {'head':>10} {'change':>8}")
+
+    regressions = 0
+    for section, metric, higher_is_worse, latency in COMPARED:
+        for name in sorted(set(base.get(section, {})) & set(head.get(section, {}))):
+            before, after = base[section][name][metric], head[section][name][metric]
+            bad = regressed(metric, before, after, higher_is_worse, latency, args.threshold, args.min_ms)
+            regressions += bad
+            if bad or args.all:
+                change = f'{(after - before) / before * 100:+.0f}%' if before else 'new'
+                print(f"{name:<36} {section + '.' + metric:<26} {before:>10} {after:>10} {change:>8}"
+                      f"{'  REGRESSION' if bad else ''}")
+
+    for process in sorted(set(base.get('peak_rss_kib', {})) & set(head.get('peak_rss_kib', {}))):
+        before, after = base['peak_rss_kib'][process], head['peak_rss_kib'][process]
+        bad = before > 0 and (after - before) / before > args.threshold
+        regressions += bad
+        print(f"{'peak RSS':<36} {process + ' KiB':<26} {before:>10} {after:>10} "
+              f"{(after - before) / before * 100 if before else 0:>+7.0f}%{'  REGRESSION' if bad else ''}")
+
+    missing = sorted(set(base.get('client', {})) - set(head.get('client', {})))
+    if missing:
+        print(f"not in head: {', '.join(missing)}")
+    print(f"{regressions} regression(s) (threshold {args.threshold:.0%}, latency floor {args.min_ms:g}ms)")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='seed, benchmark every endpoint and write a JSON report')
+    run_parser.add_argument('--items', type=int, default=10000)
+    run_parser.add_argument('--suppliers', type=int, default=500)
+    run_parser.add_argument('--logs', type=int, default=50000, help='activity log rows')
+    run_parser.add_argument('--low-stock-ratio', type=float, default=0.05)
+    run_parser.add_argument('--repeat', type=int, default=50, help='test client calls per endpoint')
+    run_parser.add_argument('--heavy-repeat', type=int, default=3, help='calls per heavy endpoint')
+    run_parser.add_argument('--warmup', type=int, default=2)
+    run_parser.add_argument('--only', help='regex: benchmark only matching endpoint names')
+    run_parser.add_argument('--skip', help='regex: skip matching endpoint names')
+    run_parser.add_argument('--no-http', action='store_true', help='test client phase only')
+    run_parser.add_argument('--http-seconds', type=float, default=3, help='load per read endpoint')
+    run_parser.add_argument('--clients', type=int, default=4, help='concurrent HTTP client processes')
+    run_parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    run_parser.add_argument('--worker-class', default='gthread', choices=['sync', 'gthread', 'eventlet'])
+    run_parser.add_argument('--threads', type=int, default=4)
+    run_parser.add_argument('--output', help='JSON report path (default: benchmarks/results/suite-<time>.json)')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two reports')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--threshold', type=float, default=0.15, help='relative change counted as a regression')
+    compare_parser.add_argument('--min-ms', type=float, default=1.0, help='ignore latency changes smaller than this')
+    compare_parser.add_argument('--all', action='store_true', help='print every metric, not just regressions')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
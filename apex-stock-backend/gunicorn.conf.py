@@ -0,0 +1,94 @@
+"""
+Gunicorn settings for the production server, all overridable from the environment
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+GUNICORN_WORKER_CLASS  sync (default), gthread or eventlet (needed for Socket.IO)
+WEB_CONCURRENCY        worker processes (default: 2 x CPUs + 1, or 1 for eventlet)
+GUNICORN_THREADS       threads per gthread worker (default 4)
+GUNICORN_WORKER_CONNECTIONS  concurrent greenlets per eventlet worker (default 10000)
+GUNICORN_PRELOAD       load the app once in the master before forking (default on, except eventlet)
+PORT / GUNICORN_BIND, GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_KEEPALIVE,
+GUNICORN_MAX_REQUESTS, GUNICORN_MAX_REQUESTS_JITTER, GUNICORN_LOG_LEVEL
+PROMETHEUS_MULTIPROC_DIR  where workers keep their metric files (default /tmp/apex-stock-metrics)
+
+Each worker gets its own database pool, sized to what it can actually use
+at once (1 connection per sync worker, one per thread for gthread) unless
+DB_POOL_SIZE / DB_MAX_OVERFLOW are set explicitly. Likewise password
+hashing may occupy at most threads - 1 of a gthread worker's threads
+(PASSWORD_HASH_WORKERS), so a login storm leaves one for other requests.
+"""
+import multiprocessing
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class not in ('sync', 'gthread', 'eventlet'):
+    raise ValueError(f"GUNICORN_WORKER_CLASS must be sync, gthread or eventlet, got '{worker_class}'")
+
+# One eventlet worker serves many connections; more would not share Socket.IO state
+default_workers = 1 if worker_class == 'eventlet' else multiprocessing.cpu_count() * 2 + 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+threads = int(os.getenv('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 10000))  # Each Socket.IO subscriber holds one
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', 5000)}")
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))  # A silent worker is killed and replaced after this
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))  # SIGTERM: time to finish in-flight requests
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))  # Recycle workers after this many requests; 0 never
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# eventlet monkey patches in the worker, after a preloaded app would already be imported
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false' if worker_class == 'eventlet' else 'true').lower() == 'true'
+
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+accesslog = '-'
+errorlog = '-'
+
+# Read by app.config when the app is imported, which happens after this file runs
+if worker_class == 'eventlet':
+    os.environ.setdefault('DB_POOL_SIZE', str(min(worker_connections, 20)))
+    os.environ.setdefault('DB_MAX_OVERFLOW', '10')
+else:
+    os.environ.setdefault('DB_POOL_SIZE', str(threads))
+    os.environ.setdefault('DB_MAX_OVERFLOW', '2')
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', str(max(min(2, threads - 1), 1)))
+os.environ.setdefault('FLASK_ENV', 'production')
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'eventlet' if worker_class == 'eventlet' else 'threading')
+
+# Each worker writes its metrics to its own files here; /metrics in any worker sums them all.
+# Must exist before prometheus_client is imported, which a preloaded app does right after this file
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/apex-stock-metrics')
+os.makedirs(metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    # Files left by a previous run would be added to this run's totals
+    for name in os.listdir(metrics_dir):
+        if name.endswith('.db'):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def post_fork(server, worker):
+    # Connections opened by the preloaded app in the master must not be shared with workers
+    if server.cfg.preload_app:
+        from wsgi import app
+        from app.models import db
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Write any activity log entries still queued before the process goes away
+    app = getattr(worker, 'wsgi', None)
+    if app is not None and 'activity_log' in getattr(app, 'extensions', {}):
+        app.extensions['activity_log'].stop()
+
+
+def child_exit(server, worker):
+    # Runs in the master: drop the dead worker's live gauges (pool connections in use)
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid, metrics_dir)
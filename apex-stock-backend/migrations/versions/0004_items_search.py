@@ -0,0 +1,44 @@
+"""items search
+
+The SQLite FTS5 tables app.search ranks item matches with, filled from
+the items already there. Nothing to do on other databases, or when
+SQLite was built without FTS5: search then uses the trigram index.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 01:42:05.604873
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    try:
+        op.execute(
+            "CREATE VIRTUAL TABLE items_fts USING fts5("
+            "name, category, supplier_name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    except sa.exc.OperationalError:
+        return
+    op.execute("CREATE VIRTUAL TABLE items_fts_vocab USING fts5vocab(items_fts, 'row')")
+    op.execute(
+        "INSERT INTO items_fts (rowid, name, category, supplier_name) "
+        "SELECT items.id, items.name, items.category, COALESCE(suppliers.name, '') "
+        "FROM items LEFT JOIN suppliers ON suppliers.id = items.supplier_id"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS items_fts_vocab')
+        op.execute('DROP TABLE IF EXISTS items_fts')
@@ -0,0 +1,50 @@
+"""items low stock flag and reorder queue
+
+items.is_low_stock is a plain nullable column, so adding it is a catalog
+change on PostgreSQL rather than a table rewrite: the write paths keep it
+from now on (app.reorder), the items-low-stock backfill fills the existing
+rows and 0013 builds the partial index over it afterwards. The reorder
+queue starts with every item that is already at or below its reorder level.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 01:36:02.718144
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_low_stock', sa.Boolean(), nullable=True))
+
+    reorder_queue = op.create_table('reorder_queue',
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('queued_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], ),
+    sa.PrimaryKeyConstraint('item_id')
+    )
+    items = sa.table('items', sa.column('id'), sa.column('quantity'), sa.column('reorder_level'))
+    op.execute(reorder_queue.insert().from_select(
+        ['item_id', 'quantity', 'queued_at'],
+        sa.select(items.c.id, items.c.quantity, sa.literal(datetime.utcnow(), sa.DateTime()))
+        .where(items.c.quantity <= items.c.reorder_level)
+    ))
+
+
+def downgrade():
+    op.drop_table('reorder_queue')
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_column('is_low_stock')
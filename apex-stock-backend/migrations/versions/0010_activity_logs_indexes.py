@@ -0,0 +1,35 @@
+"""activity logs indexes
+
+Newest-first pages and the archive cutoff (timestamp), per-record history
+(resource) and per-user history (user, timestamp). Built online, see
+app.migration_ops.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 01:38:27.905316
+
+"""
+from app.migration_ops import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_activity_logs_timestamp', 'activity_logs', ['timestamp']),
+    ('ix_activity_logs_resource', 'activity_logs', ['resource_type', 'resource_id']),
+    ('ix_activity_logs_user_timestamp', 'activity_logs', ['user_id', 'timestamp']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index_online(name, table)
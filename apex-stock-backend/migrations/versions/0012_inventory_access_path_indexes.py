@@ -0,0 +1,38 @@
+"""inventory access path indexes
+
+Indexes for the list sorts, category filter, supplier item lookups,
+report job lookup and role counts that benchmarks/query_plans.py found
+reading whole tables. Built online, see app.migration_ops.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 01:09:42.161789
+
+"""
+from app.migration_ops import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_items_name', 'items', ['name', 'id']),
+    ('ix_items_category_name', 'items', ['category', 'name', 'id']),
+    ('ix_items_updated_at', 'items', ['updated_at', 'id']),
+    ('ix_items_supplier_id', 'items', ['supplier_id']),
+    ('ix_report_jobs_lookup', 'report_jobs', ['report_type', 'data_key']),
+    ('ix_users_role', 'users', ['role']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index_online(name, table)
@@ -0,0 +1,48 @@
+"""items low stock index
+
+The partial index that serves low-stock reads, built once items.is_low_stock
+is filled so the fill does not have to maintain it row by row. Run the
+backfill before this revision:
+
+    flask db upgrade 0012 && flask backfill items-low-stock && flask db upgrade
+
+Rows it has not reached (or every row, when upgrading straight to head) are
+filled here first; after a finished backfill that is a read of the table
+that changes nothing. Built online, see app.migration_ops.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17 01:52:14.406311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migration_ops import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    items = sa.table('items', sa.column('quantity'), sa.column('reorder_level'),
+                     sa.column('is_low_stock', sa.Boolean()))
+    op.execute(
+        items.update()
+        .where(items.c.is_low_stock.is_(None))
+        .values(is_low_stock=items.c.quantity <= items.c.reorder_level)
+    )
+
+    # Compiled per dialect: 'is_low_stock = 1' on SQLite, 'is_low_stock = true' on PostgreSQL, as in the model
+    create_index_online(
+        'ix_items_low_stock', 'items', ['supplier_id'],
+        where=sa.column('is_low_stock', sa.Boolean()) == sa.true()
+    )
+
+
+def downgrade():
+    drop_index_online('ix_items_low_stock', 'items')
@@ -1,13 +1,23 @@
 import os 
+import click
 from app import create_app
 from app.models import db, User
+from app.database import init_migrations, upgrade_database
+from app.stats import rebuild_stats, check_stats
+from app.versions import bump_version
+from app.search import rebuild_search_index, get_search_index
+from app.reorder import rebuild_reorder_queue
+from app.activity_archive import archive_activity_logs
+from app.backfill import BackfillError, run_backfill, backfill_status
 
 app = create_app(os.getenv('FLASK_ENV', 'development'))
+init_migrations(app)  # `flask db ...` (migrations/)
 
 @app.cli.command()
 def init_db():
+    """Create the schema or apply pending migrations (a pre-migrations database is adopted first)"""
     with app.app_context():
-        db.create_all()
+        upgrade_database()
         print("Database initialized!")
 
 
@@ -77,9 +87,85 @@ def seed_data():
         for item in items:
             db.session.add(item)
 
+        bump_version('items', 'suppliers')
         db.session.commit()
+        rebuild_stats()
+        rebuild_search_index()
+        rebuild_reorder_queue()
         print(f"✅ Seeded {len(items)} items and 2 suppliers!")
 
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the dashboard aggregate tables from a full scan"""
+    with app.app_context():
+        live = rebuild_stats()
+        print(f"✅ Stats rebuilt: {live['total_items']} items in {len(live['categories'])} categories")
+
+
+@app.cli.command('rebuild-reorder-queue')
+def rebuild_reorder_queue_command():
+    """Queue every low-stock item missing from the reorder queue and drop restocked ones"""
+    with app.app_context():
+        queued, removed = rebuild_reorder_queue()
+        print(f"✅ Reorder queue rebuilt: {queued} queued, {removed} removed")
+
+
+@app.cli.command('archive-activity-logs')
+@click.option('--days', type=int, default=None, help='Keep this many days (default: ACTIVITY_LOG_RETENTION_DAYS)')
+def archive_activity_logs_command(days):
+    """Move activity logs past the retention period into monthly .jsonl.gz archives"""
+    with app.app_context():
+        archived, files = archive_activity_logs(app, retention_days=days)
+        print(f"✅ Archived {archived} activity logs into {len(files)} file(s)")
+        for path in files:
+            print(f"   {path}")
+
+
+@app.cli.command('backfill')
+@click.argument('name', required=False)
+@click.option('--batch-size', type=int, default=None, help='Starting rows per batch (default: BACKFILL_BATCH_SIZE)')
+@click.option('--duty-cycle', type=float, default=None, help='Share of time spent working (default: BACKFILL_DUTY_CYCLE)')
+@click.option('--max-seconds', type=int, default=None, help='Stop after this long; the next run resumes')
+@click.option('--restart', is_flag=True, help='Start over from the first row')
+def backfill_command(name, batch_size, duty_cycle, max_seconds, restart):
+    """Run a data backfill in throttled, resumable batches; without NAME, list backfills and their progress"""
+    with app.app_context():
+        if name is None:
+            for progress in backfill_status():
+                done = f", {progress['rows_done']} rows, up to key {progress['last_key']}" if 'rows_done' in progress else ''
+                print(f"   {progress['name']}: {progress['status']}{done}")
+            return
+        try:
+            progress = run_backfill(app, name, batch_size, duty_cycle, restart, max_seconds)
+        except BackfillError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+        print(f"✅ Backfill {name} {progress['status']}: {progress['rows_done']} rows in {progress['batches']} batches")
+
+
+@app.cli.command('check-stats')
+def check_stats_command():
+    """Compare the dashboard aggregate tables against a live scan"""
+    with app.app_context():
+        problems = check_stats()
+        if problems:
+            print("❌ Stats are out of sync:")
+            for problem in problems:
+                print(f"   {problem}")
+            print("   Run: flask rebuild-stats")
+            raise SystemExit(1)
+        print("✅ Stats match the items table")
+
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every item for /api/inventory/search"""
+    with app.app_context():
+        rebuild_search_index()
+        print(f"✅ Search index rebuilt ({get_search_index().name} backend)")
+
         
+# Development server only; production runs gunicorn -c gunicorn.conf.py wsgi:app
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)), debug=app.config['DEBUG'])
@@ -1,12 +1,23 @@
+import os
+import sys
+import time
+
 from app import create_app
 from app.models import db, User, Supplier, Item
+from app.database import init_migrations, upgrade_database
+from app.stats import rebuild_stats
+from app.versions import bump_version
+from app.search import rebuild_search_index
+from app.reorder import rebuild_reorder_queue
 
-app = create_app()
+# Built once a command is known, so printing the usage does not boot the app
+app = None
 
 def init_db():
-    """Initialize the database with tables"""
+    """Create the tables or apply pending migrations (same as flask init-db)"""
+    init_migrations(app)
     with app.app_context():
-        db.create_all()
+        upgrade_database()
         print("✅ Database tables created!")
 
 def seed_admin():
@@ -80,10 +91,24 @@ def seed_data():
         for item in items:
             db.session.add(item)
         
+        bump_version('items', 'suppliers')
         db.session.commit()
+        rebuild_stats()
+        rebuild_search_index()
+        rebuild_reorder_queue()
         
         print(f"✅ Seeded {len(items)} items and 2 suppliers!")
 
+def seed_synthetic(items, suppliers, logs):
+    """Bulk insert generated suppliers, items and activity logs (benchmarks/common.py)"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+    from common import seed
+
+    started = time.perf_counter()
+    seed(app, suppliers=suppliers, items=items, logs=logs)
+    print(f"✅ Seeded {items} items, {suppliers} suppliers and {logs} activity logs "
+          f"in {time.perf_counter() - started:.1f}s")
+
 def reset_db():
     """Drop all tables and recreate"""
     with app.app_context():
@@ -98,18 +123,19 @@ def reset_db():
         print("✅ Database reset complete!")
 
 if __name__ == '__main__':
-    import sys
-    
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python seed.py init       - Create database tables")
         print("  python seed.py admin      - Create admin user")
         print("  python seed.py data       - Add sample data")
         print("  python seed.py all        - Do all of the above")
+        print("  python seed.py synthetic ITEMS [SUPPLIERS] [LOGS]")
+        print("                            - Add generated data at scale, e.g. synthetic 100000 2000 500000")
         print("  python seed.py reset      - Reset database (DANGEROUS)")
         sys.exit(1)
     
     command = sys.argv[1]
+    app = create_app()
     
     if command == 'init':
         init_db()
@@ -121,6 +147,15 @@ if __name__ == '__main__':
         init_db()
         seed_admin()
         seed_data()
+    elif command == 'synthetic':
+        if len(sys.argv) < 3:
+            print("❌ Usage: python seed.py synthetic ITEMS [SUPPLIERS] [LOGS]")
+            sys.exit(1)
+        counts = [int(arg) for arg in sys.argv[2:5]]
+        items = counts[0]
+        suppliers = counts[1] if len(counts) > 1 else max(items // 100, 1)
+        logs = counts[2] if len(counts) > 2 else items
+        seed_synthetic(items, suppliers, logs)
     elif command == 'reset':
         reset_db()
     else:
@@ -0,0 +1,7 @@
+"""
+WSGI entry point for production servers: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))
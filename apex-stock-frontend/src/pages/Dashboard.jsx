@@ -17,10 +17,10 @@ export default function Dashboard() {
     try {
       const [statsRes, activitiesRes] = await Promise.all([
         inventoryAPI.getStats(),
-        reportAPI.getActivityLogs(10),
+        reportAPI.getActivityLogs({ limit: 10 }),
       ]);
       setStats(statsRes.data);
-      setActivities(activitiesRes.data);
+      setActivities(activitiesRes.data.logs);
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
     } finally {
@@ -5,6 +5,8 @@ import './Inventory.css';
 
 export default function Inventory() {
   const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [suppliers, setSuppliers] = useState([]);
   const [showModal, setShowModal] = useState(false);
   const [editingItem, setEditingItem] = useState(null);
@@ -19,19 +21,44 @@ export default function Inventory() {
   });
 
   useEffect(() => {
-    fetchItems();
     fetchSuppliers();
   }, []);
 
+  // Search runs on the server; wait for a pause in typing before querying
+  useEffect(() => {
+    const timer = setTimeout(fetchItems, searchTerm.trim() ? 250 : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const loadPage = (params = {}) => {
+    const query = searchTerm.trim();
+    return query ? inventoryAPI.search({ ...params, q: query }) : inventoryAPI.getAll(params);
+  };
+
   const fetchItems = async () => {
     try {
-      const response = await inventoryAPI.getAll();
-      setItems(response.data);
+      const response = await loadPage();
+      setItems(response.data.items);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching items:', error);
     }
   };
 
+  const fetchMoreItems = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await loadPage({ cursor: nextCursor });
+      setItems((prev) => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching more items:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchSuppliers = async () => {
     try {
       const response = await supplierAPI.getAll();
@@ -45,7 +72,8 @@ export default function Inventory() {
     e.preventDefault();
     try {
       if (editingItem) {
-        await inventoryAPI.update(editingItem.id, formData);
+        // The version makes the server refuse the save if someone else changed the item meanwhile
+        await inventoryAPI.update(editingItem.id, { ...formData, version: editingItem.version });
       } else {
         await inventoryAPI.create(formData);
       }
@@ -56,6 +84,10 @@ export default function Inventory() {
       console.error('Error response:', error.response);
       const errorMsg = error.response?.data?.error || error.message || 'Operation failed';
       alert(`Error: ${errorMsg}`);
+      if (error.response?.status === 409) {
+        fetchItems();
+        closeModal();
+      }
     }
   };
 
@@ -99,11 +131,6 @@ export default function Inventory() {
     setEditingItem(null);
   };
 
-  const filteredItems = items.filter((item) =>
-    item.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    item.category.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   return (
     <div className="page-container">
       <div className="page-header">
@@ -141,7 +168,7 @@ export default function Inventory() {
             </tr>
           </thead>
           <tbody>
-            {filteredItems.map((item) => (
+            {items.map((item) => (
               <tr key={item.id}>
                 <td className="font-medium">{item.name}</td>
                 <td>{item.category}</td>
@@ -175,6 +202,13 @@ export default function Inventory() {
             ))}
           </tbody>
         </table>
+        {nextCursor && (
+          <div className="load-more">
+            <button onClick={fetchMoreItems} className="btn-secondary" disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load More'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Modal */}
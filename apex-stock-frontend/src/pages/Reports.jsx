@@ -1,15 +1,51 @@
+import { useState } from 'react';
 import { reportAPI } from '../services/api';
 import { FileText, Download, AlertTriangle, Package, TruckIcon } from 'lucide-react';
 import './Reports.css';
 
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// PDFs render in the background: queue a job, poll it until it is done, then fetch the file
+async function downloadPdfReport(type, filename) {
+  let { data: job } = await reportAPI.createJob(type);
+  while (job.status === 'queued' || job.status === 'running') {
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    ({ data: job } = await reportAPI.getJob(job.id));
+  }
+  if (job.status !== 'done') {
+    throw new Error(job.error || 'Report rendering failed');
+  }
+
+  const { data } = await reportAPI.downloadJob(job.id);
+  const url = URL.createObjectURL(data);
+  const link = document.createElement('a');
+  link.href = url;
+  link.download = filename;
+  link.click();
+  URL.revokeObjectURL(url);
+}
+
 export default function Reports() {
+  const [preparing, setPreparing] = useState(null);
+
+  const downloadPdf = async (title, type, filename) => {
+    setPreparing(title);
+    try {
+      await downloadPdfReport(type, filename);
+    } catch (error) {
+      alert(error.response?.data?.error || error.message || 'Report download failed');
+    } finally {
+      setPreparing(null);
+    }
+  };
+
   const reports = [
     {
       title: 'Inventory Report (PDF)',
       description: 'Complete inventory list with all details',
       icon: Package,
       color: 'blue',
-      action: () => reportAPI.downloadInventoryPDF(),
+      action: () => downloadPdf('Inventory Report (PDF)', 'inventory-pdf', 'inventory_report.pdf'),
     },
     {
       title: 'Inventory Report (CSV)',
@@ -23,7 +59,7 @@ export default function Reports() {
       description: 'Items that need immediate reordering',
       icon: AlertTriangle,
       color: 'red',
-      action: () => reportAPI.downloadLowStockPDF(),
+      action: () => downloadPdf('Low Stock Alert (PDF)', 'low-stock-pdf', 'low_stock_report.pdf'),
     },
     {
       title: 'Suppliers Report (CSV)',
@@ -49,9 +85,13 @@ export default function Reports() {
             </div>
             <h3 className="report-title">{report.title}</h3>
             <p className="report-description">{report.description}</p>
-            <button onClick={report.action} className="download-button">
+            <button
+              onClick={report.action}
+              className="download-button"
+              disabled={preparing === report.title}
+            >
               <Download size={18} />
-              <span>Download</span>
+              <span>{preparing === report.title ? 'Preparing...' : 'Download'}</span>
             </button>
           </div>
         ))}
@@ -62,8 +102,9 @@ export default function Reports() {
         <div>
           <h4>About Reports</h4>
           <p>
-            All reports are generated in real-time based on your current inventory data.
-            PDF reports include formatting and styling, while CSV files can be opened in
+            All reports are generated from your current inventory data. PDF reports are
+            rendered in the background and download as soon as they are ready; they include
+            formatting and styling, while CSV files can be opened in
             Excel or Google Sheets for further analysis.
           </p>
         </div>
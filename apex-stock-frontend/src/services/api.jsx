@@ -7,6 +7,53 @@ const api = axios.create({
   headers: {
     'Content-Type': 'application/json',
   },
+  // 304 Not Modified is answered from the ETag cache below, not treated as an error
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+});
+
+// Conditional GETs: remember the last body and ETag per URL, send If-None-Match
+// next time and reuse the body when the server answers 304
+const ETAG_CACHE_SIZE = 100;
+const etagCache = new Map();
+
+export const clearEtagCache = () => etagCache.clear();
+
+api.interceptors.request.use((config) => {
+  if ((config.method || 'get').toLowerCase() === 'get' && config.responseType !== 'blob') {
+    const cached = etagCache.get(api.getUri(config));
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag;
+    }
+  }
+  return config;
+});
+
+api.interceptors.response.use((response) => {
+  const { config } = response;
+  if ((config.method || 'get').toLowerCase() !== 'get') {
+    return response;
+  }
+  const key = api.getUri(config);
+  if (response.status === 304) {
+    const cached = etagCache.get(key);
+    if (cached) {
+      // Move to the end so the least recently used entry is evicted first
+      etagCache.delete(key);
+      etagCache.set(key, cached);
+      return { ...response, status: 200, data: cached.data };
+    }
+    // Nothing cached to reuse (e.g. cleared meanwhile): fetch the body unconditionally
+    return api.request({ ...config, headers: { ...config.headers, 'If-None-Match': undefined } });
+  }
+  const etag = response.headers.etag;
+  if (etag) {
+    etagCache.delete(key);
+    etagCache.set(key, { etag, data: response.data });
+    if (etagCache.size > ETAG_CACHE_SIZE) {
+      etagCache.delete(etagCache.keys().next().value);
+    }
+  }
+  return response;
 });
 
 api.interceptors.request.use((config) => {
@@ -43,11 +90,23 @@ export const authAPI = {
 
 // INVENTORY ENDPOINTS
 export const inventoryAPI = {
-  getAll: (category) => api.get('/inventory/', { params: { category } }),
+  // params: { category, limit, sort, fields, cursor } - returns { items, next_cursor, limit }
+  getAll: (params = {}) => api.get('/inventory/', { params }),
+  // params: { q, limit, cursor } - ranked, typo tolerant matches, same response shape as getAll
+  search: (params) => api.get('/inventory/search', { params }),
   getById: (id) => api.get(`/inventory/${id}/`),
   create: (itemData) => api.post('/inventory/', itemData),
+  // file: a .csv, .jsonl or .json File - returns { received, created, updated, failed, errors }
+  bulkImport: (file) => api.post('/inventory/bulk', file, {
+    headers: { 'Content-Type': file.name.endsWith('.csv') ? 'text/csv'
+      : file.name.endsWith('.jsonl') ? 'application/x-ndjson' : 'application/json' },
+  }),
   update: (id, itemData) => api.put(`/inventory/${id}/`, itemData),
   delete: (id) => api.delete(`/inventory/${id}/`),
+  // Relative stock change, e.g. adjust(3, -2) - refused with 409 if stock would go below zero
+  adjust: (id, delta, reason) => api.post(`/inventory/${id}/adjust`, { delta, reason }),
+  // adjustments: [{ id, delta }] - applied all or nothing
+  adjustMany: (adjustments, reason) => api.post('/inventory/adjust', { adjustments, reason }),
   getLowStock: () => api.get('/inventory/low-stock/'),
   getStats: () => api.get('/inventory/stats/'),
 };
@@ -75,11 +134,14 @@ export const userAPI = {
 
 // REPORT ENDPOINTS (Admin only)
 export const reportAPI = {
-  getActivityLogs: (limit = 20) => api.get('/reports/activity-logs', { params: { limit } }),
-  downloadInventoryPDF: () => window.open(`${API_BASE_URL}/reports/inventory-pdf`),
+  // params: { limit, user_id, action, resource_type, resource_id, since, until, cursor } - returns { logs, next_cursor, limit }
+  getActivityLogs: (params = {}) => api.get('/reports/activity-logs', { params }),
   downloadInventoryCSV: () => window.open(`${API_BASE_URL}/reports/inventory-csv`),
-  downloadLowStockPDF: () => window.open(`${API_BASE_URL}/reports/low-stock-pdf`),
   downloadSuppliersCSV: () => window.open(`${API_BASE_URL}/reports/suppliers-csv`),
+  // Background PDF rendering: create a job, poll it until status is 'done', then download
+  createJob: (type) => api.post('/reports/jobs', { type }),
+  getJob: (id) => api.get(`/reports/jobs/${id}`),
+  downloadJob: (id) => api.get(`/reports/jobs/${id}/download`, { responseType: 'blob' }),
 };
 
 export default api;
\ No newline at end of file